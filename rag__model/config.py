@@ -2,23 +2,60 @@
 Configuration management using Pydantic Settings
 """
 
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cache, cached_property
+
+
+class LLMSettings(BaseSettings):
+    """LLM provider credentials and model names (loaded on first use)"""
+    
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+        validate_default=False,
+        extra="ignore"
+    )
+    
+    # API Keys
+    openai_api_key: str = ""
+    anthropic_api_key: str = ""
+    gemini_api_key: str = ""
+    groq_api_key: str = ""
+    
+    # Models
+    openai_model: str = "gpt-4o"
+    openai_fast_model: str = "gpt-4o-mini"  # casual chatbot turns
+    openai_analysis_model: str = "gpt-4o-mini"  # schema-constrained voice analysis
+    anthropic_model: str = "claude-3-opus-20240229"
+    gemini_model: str = "gemini-1.5-pro"
+    groq_model: str = "llama-3.3-70b-versatile"
+    
+    # OpenAI rate limiting
+    openai_max_concurrency: int = 16
+    openai_max_retries: int = 5
 
 
 class Settings(BaseSettings):
     """Application settings"""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+        validate_default=False,
+        extra="ignore"
+    )
+    
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
-    debug: bool = True
+    debug: bool = True  # also enables auto-reload (single worker) under `python main.py`
+    workers: int = 2  # uvicorn worker processes (each loads its own embedding/Whisper models)
     
     # API Keys
-    openai_api_key: str = ""
-    anthropic_api_key: str = ""
-    gemini_api_key: str = ""
-    groq_api_key: str = ""
     huggingface_api_key: str = ""
     
     # Authentication
@@ -27,12 +64,9 @@ class Settings(BaseSettings):
     
     # LLM Configuration
     default_llm_provider: str = "openai"
-    openai_model: str = "gpt-4o"
-    anthropic_model: str = "claude-3-opus-20240229"
-    gemini_model: str = "gemini-1.5-pro"
-    groq_model: str = "llama-3.3-70b-versatile"
     llm_temperature: float = 0.7
     llm_max_tokens: int = 2000
+    chandas_llm_timeout: float = 20.0  # seconds before chandas identification answers with the pattern fallback
     
     # Qdrant Configuration
     qdrant_host: str = "localhost"
@@ -46,6 +80,28 @@ class Settings(BaseSettings):
     grammar_collection: str = "grammar_rules"
     branding_collection: str = "branding_vocab"
     
+    # Semantic response cache (near-duplicate prompt reuse)
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_lsh_bits: int = 8
+    semantic_cache_lsh_tables: int = 4
+    voice_cache_threshold: float = 0.95  # voice analysis / shloka context reuse
+    
+    # RAG search micro-batching (concurrent searches share one embedding call + Qdrant query)
+    rag_batch_size: int = 32
+    rag_batch_ms: float = 5.0
+    
+    # Shared response cache (Redis, across workers) - empty URL disables it
+    redis_url: str = ""
+    response_cache_ttl: int = 86400
+    
+    # Voice transcription - local faster-whisper when installed, else the OpenAI Whisper API
+    whisper_local: bool = True
+    whisper_model: str = "small"
+    whisper_device: str = "cpu"  # "cuda" for GPU
+    whisper_compute_type: str = "int8"  # "float16" on GPU
+    whisper_batch_size: int = 8  # speech chunks decoded together per recording
+    whisper_workers: int = 2  # concurrent transcriptions on the shared model
+    
     # Logging
     log_level: str = "INFO"
     log_format: str = "json"
@@ -53,12 +109,13 @@ class Settings(BaseSettings):
     # CORS
     allowed_origins: str = "*"
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    @cached_property
+    def llm(self) -> LLMSettings:
+        """Provider keys and models, parsed only when an LLM client needs them"""
+        return LLMSettings()
 
 
-@lru_cache()
+@cache
 def get_settings() -> Settings:
     """Get cached settings instance"""
     return Settings()
@@ -1,5 +1,10 @@
 """Controllers package initialization"""
 
+import asyncio
+
+from models import build_model_schemas
+from services.chandas_service import get_chandas_service
+from services.llm_service import get_llm_service
 from .chandas_controller import get_chandas_controller, ChandasController
 from .shloka_controller import get_shloka_controller, ShlokaController
 from .tagline_controller import get_tagline_controller, TaglineController
@@ -8,7 +13,47 @@ from .knowledgebase_controller import get_knowledgebase_controller, KnowledgeBas
 from .voice_controller import get_voice_controller, VoiceController
 from .chatbot_controller import get_chatbot_controller, ChatbotController
 
+# Sample verse run through metre identification at startup to load the metre data
+_WARMUP_VERSE = "धर्मक्षेत्रे कुरुक्षेत्रे समवेता युयुत्सवः"
+
+
+def _build_controllers() -> ChatbotController:
+    """
+    Construct every controller and service singleton (blocking: prompt files, embedding
+    model, Qdrant, metre data) and build the API models' deferred schemas
+    """
+    build_model_schemas()
+    get_chandas_service().identify_metre(_WARMUP_VERSE)
+    get_llm_service()
+    get_chandas_controller()
+    get_shloka_controller()
+    get_tagline_controller()
+    get_meaning_controller()
+    get_knowledgebase_controller()
+    get_voice_controller()
+    return get_chatbot_controller()
+
+
+async def warmup() -> None:
+    """
+    Build every controller singleton up front and prime the shared clients
+    (OpenAI connection pool, local embedding model, shloka index, metre data) so the
+    first request doesn't pay for it
+    
+    Construction does blocking file and network I/O, so it runs in a worker thread
+    rather than on the event loop.
+    """
+    chatbot = await asyncio.to_thread(_build_controllers)
+    
+    await asyncio.gather(
+        chatbot.llm_client.warmup(),
+        asyncio.to_thread(chatbot.rag_client.warmup),
+        get_voice_controller().warmup()
+    )
+
+
 __all__ = [
+    'warmup',
     'get_chandas_controller',
     'ChandasController',
     'get_shloka_controller',
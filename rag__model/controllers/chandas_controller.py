@@ -2,36 +2,98 @@
 Chandas Controller - Business logic for prosody identification
 """
 
+import asyncio
 import logging
 import re
-from typing import Dict, Any, List
+from collections import Counter
+from functools import cache, lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import json
 
-from models import ChandasIdentifyRequest, ChandasIdentifyResponse, SyllableInfo
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from models import ChandasIdentifyRequest, ChandasIdentifyResponse, IdentificationStep
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
 from config import get_settings
 from utils.chandas_patterns import detect_chandas
+from utils.cache import LRUCache, hash_key
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Precompiled patterns used on every identification request
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Deletion table for danda/double danda and every character regex \s matches
+_STRIP_TABLE = str.maketrans('', '', (
+    '।॥'
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+))
+
+# Step-4 explanations that need no formatting, keyed by total syllable count
+_MATCH_EXPLANATIONS = {
+    32: "32 syllables (8 per quarter × 4 quarters) matches Anushtup meter structure",
+    56: "56 syllables (14 per quarter × 4 quarters) matches Vasantatilaka structure",
+}
+
+# Constant step descriptions for the identification process
+_STEP1_DESC = "Remove punctuation marks (।॥), whitespace, and newlines to get clean Devanagari text"
+_STEP2_DESC = "Split text into syllables using Devanagari rules: consonant + vowel + optional dependent marks (ा, ि, ी, ु, ू, े, ै, ो, ौ, ं, ः) + optional halant (्) + conjunct consonants"
+_STEP3_DESC = (
+    "Classify each syllable based on prosodic weight:\n"
+    "• Laghu (L): Short vowel (अ, इ, उ, ऋ) without conjunct\n"
+    "• Guru (G): Long vowel (आ, ई, ऊ, ए, ऐ, ओ, औ) OR short vowel + conjunct OR anusvara (ं) OR visarga (ः) OR end of line"
+)
+_STEP4_DESC = (
+    "Compare syllable count and L-G pattern against database of known chandas:\n"
+    "• Anushtup: 32 syllables, flexible pattern\n"
+    "• Indravajra: 44 syllables, GGLGGLLGLLG pattern\n"
+    "• Upendravajra: 44 syllables, LGLGGLLGLLG pattern\n"
+    "• Vasantatilaka: 56 syllables\n"
+    "• Malini: 60 syllables\n"
+    "• Shardula-vikridita: 76 syllables"
+)
+_STEP5_DESC = (
+    "Calculate confidence based on:\n"
+    "• Pattern match accuracy (exact vs partial)\n"
+    "• Syllable count alignment with known meters\n"
+    "• Consistency of L-G pattern across quarters\n"
+    "• Presence of standard chandas markers"
+)
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, appending '...' only when something was dropped"""
+    head = text[:limit]
+    return head + "..." if len(head) < len(text) else head
+
+
+@lru_cache()
+def _load_system_prompt() -> str:
+    """Load chandas system prompt (read from disk once per process)"""
+    try:
+        with open("prompts/chandas_system.txt", 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        # Fallback system prompt
+        return """You are an expert in Sanskrit prosody. Analyze syllable patterns (Laghu=short, Guru=long) to identify the meter. Return JSON: chandas_name, syllable_breakdown (array), laghu_guru_pattern, explanation, confidence."""
+
+
 class ChandasController:
     """Controller for chandas identification operations"""
     
     def __init__(self):
         self.llm_client = get_llm_client()
         self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
-    
-    def _load_system_prompt(self) -> str:
-        """Load chandas system prompt"""
-        try:
-            with open("prompts/chandas_system.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            # Fallback system prompt
-            return """You are an expert in Sanskrit prosody. Analyze syllable patterns (Laghu=short, Guru=long) to identify the meter. Return JSON: chandas_name, syllable_breakdown (array), laghu_guru_pattern, explanation, confidence."""
+        self.system_prompt = _load_system_prompt()
+        self._result_cache = LRUCache(maxsize=1024)
     
     async def identify_chandas(self, request: ChandasIdentifyRequest) -> ChandasIdentifyResponse:
         """
@@ -44,73 +106,89 @@ class ChandasController:
             ChandasIdentifyResponse with identified meter
         """
         try:
-            logger.info(f"Identifying chandas for shloka")
+            logger.info("Identifying chandas for shloka")
             
-            # Try LLM first with proper prompt
-            try:
-                logger.info(">> Attempting OpenAI API for chandas identification...")
-                
-                # Use system prompt for better results
-                messages = [
-                    {
-                        "role": "system",
-                        "content": self.system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze this Sanskrit shloka and identify its meter:\n\n{request.shloka}\n\nReturn ONLY valid JSON with the required fields."
-                    }
-                ]
-                
-                response_text = await self.llm_client.chat_completion(
-                    messages=messages,
-                    provider="openai",
-                    temperature=0.3
-                )
-                
-                # Parse LLM response
-                result = self._parse_llm_response(response_text)
-                logger.info(f">> OPENAI SUCCESS - {result['chandas_name']} (conf: {result.get('confidence', 'N/A')})")
+            cache_key = hash_key(" ".join(request.shloka.split()))
+            cached = self._result_cache.get(cache_key)
+            llm_result = None
+            
+            if cached is not None:
+                logger.info(">> CACHE HIT - %s", cached['chandas_name'])
+                result = dict(cached)
+            else:
+                # Run the pattern-based fallback in a worker thread while the LLM call is in flight
+                fallback_task = asyncio.create_task(asyncio.to_thread(detect_chandas, request.shloka))
                 
-            except Exception as llm_error:
-                # OpenAI failed - use algorithmic fallback
-                logger.warning(f">> OPENAI FAILED: {str(llm_error)[:100]}")
-                logger.info(">> Using pattern-based fallback algorithm...")
-                result = detect_chandas(request.shloka)
-                logger.info(f">> FALLBACK identified: {result['chandas_name']} (conf: {result['confidence']})")
+                # Try LLM first with proper prompt - bounded, so a slow or hung OpenAI call
+                # (timeouts plus SDK retries) falls back instead of holding the request
+                try:
+                    result, parsed = await asyncio.wait_for(
+                        self._identify_with_llm(request.shloka),
+                        timeout=settings.chandas_llm_timeout
+                    )
+                    if parsed:
+                        llm_result = dict(result)
+                    fallback_task.cancel()
+                    
+                except asyncio.TimeoutError:
+                    logger.warning(">> OPENAI TIMED OUT after %gs - using pattern-based fallback", settings.chandas_llm_timeout)
+                    result = await fallback_task
+                    logger.info(">> FALLBACK identified: %s (conf: %s)", result['chandas_name'], result['confidence'])
+                    
+                except Exception as llm_error:
+                    # OpenAI failed - use the algorithmic fallback, usually finished by now
+                    logger.warning(">> OPENAI FAILED: %.100s", llm_error)
+                    logger.info(">> Using pattern-based fallback algorithm...")
+                    result = await fallback_task
+                    logger.info(">> FALLBACK identified: %s (conf: %s)", result['chandas_name'], result['confidence'])
+            
+            # Add step-by-step identification process explanation (skipped for name-only callers)
+            if request.include_process:
+                result['identification_process'] = self._generate_identification_process(request.shloka, result)
             
-            # Add step-by-step identification process explanation
-            result['identification_process'] = self._generate_identification_process(request.shloka, result)
+            # Single validation pass - syllable and step dicts are checked against their TypedDicts here
+            response = ChandasIdentifyResponse(**result)
             
-            return ChandasIdentifyResponse(**result)
+            # Only validated JSON answers from the LLM are cached, so a transient outage (or a
+            # refusal / truncated reply parsed as plain text) doesn't pin a degraded result
+            if llm_result is not None:
+                self._result_cache.set(cache_key, llm_result)
+            
+            return response
             
         except Exception as e:
-            logger.error(f"Chandas identification failed: {str(e)}")
+            logger.error("Chandas identification failed: %s", e)
             raise
     
-    async def _get_chandas_context(self) -> str:
-        """Get relevant context from knowledge base"""
-        try:
-            # In production, you'd search with actual embeddings
-            # For now, return basic context
-            context = """
-Common Sanskrit Meters:
-1. Anushtup: 32 syllables (8 per quarter), most common in epics
-2. Indravajra: 44 syllables (11 per quarter), pattern: GGLGGLLGLLG
-3. Upendravajra: 44 syllables, pattern: LGLGGLLGLLG
-4. Vasantatilaka: 56 syllables (14 per quarter)
-5. Malini: 60 syllables (15 per quarter)
-6. Shardula-vikridita: 76 syllables (19 per quarter)
-
-Laghu (L): Short syllable - single mÄtrÄ
-Guru (G): Long syllable - two mÄtrÄs
-"""
-            return context
-        except Exception as e:
-            logger.warning(f"Failed to get context: {str(e)}")
-            return ""
+    async def _identify_with_llm(self, shloka: str) -> Tuple[Dict[str, Any], bool]:
+        """Identify chandas via OpenAI using the chandas system prompt (result, parsed_successfully)"""
+        logger.info(">> Attempting OpenAI API for chandas identification...")
+        
+        # Use system prompt for better results
+        messages = [
+            {
+                "role": "system",
+                "content": self.system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"Analyze this Sanskrit shloka and identify its meter:\n\n{shloka}\n\nReturn ONLY valid JSON with the required fields."
+            }
+        ]
+        
+        response_text = await self.llm_client.chat_completion(
+            messages=messages,
+            provider="openai",
+            temperature=0.3
+        )
+        
+        # Parse LLM response
+        result, parsed = self._parse_llm_response(response_text)
+        logger.info(">> OPENAI SUCCESS - %s (conf: %s)", result['chandas_name'], result.get('confidence', 'N/A'))
+        
+        return result, parsed
     
-    def _generate_identification_process(self, shloka: str, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _generate_identification_process(self, shloka: str, result: Dict[str, Any]) -> List[IdentificationStep]:
         """
         Generate step-by-step explanation of the mathematical process used to identify chandas
         
@@ -121,78 +199,75 @@ Guru (G): Long syllable - two mÄtrÄs
         Returns:
             List of identification steps
         """
+        # Nothing reliable to walk through - a single stub step avoids a misleading breakdown
+        if result.get('confidence', 0) < 0.3 or result.get('chandas_name') in (None, '', 'Unknown'):
+            return [IdentificationStep(
+                step_number=1,
+                step_name="Insufficient Data",
+                description="Pattern could not be reliably identified.",
+                result=_truncate(result.get('explanation') or '', 200)
+            )]
+        
         steps = []
         
         # Step 1: Text Preprocessing
-        cleaned_text = re.sub(r'[।॥\n\r\s]+', '', shloka)
-        steps.append({
-            "step_number": 1,
-            "step_name": "Text Preprocessing",
-            "description": "Remove punctuation marks (।॥), whitespace, and newlines to get clean Devanagari text",
-            "result": f"Cleaned text: {cleaned_text[:50]}{'...' if len(cleaned_text) > 50 else ''}"
-        })
+        cleaned_text = shloka.translate(_STRIP_TABLE)
+        steps.append(IdentificationStep(
+            step_number=1,
+            step_name="Text Preprocessing",
+            description=_STEP1_DESC,
+            result=f"Cleaned text: {_truncate(cleaned_text, 50)}"
+        ))
         
         # Step 2: Syllable Segmentation
-        syllable_count = len(result.get('syllable_breakdown', []))
-        sample_syllables = result.get('syllable_breakdown', [])[:5]
+        syllable_breakdown = result.get('syllable_breakdown') or ()
+        syllable_count = len(syllable_breakdown)
         
-        # Handle both dict and SyllableInfo objects
-        sample_texts = []
-        for s in sample_syllables:
-            if isinstance(s, dict):
-                sample_texts.append(s.get('syllable', ''))
-            else:
-                sample_texts.append(getattr(s, 'syllable', ''))
-        
-        sample_text = ", ".join(sample_texts)
-        if len(result.get('syllable_breakdown', [])) > 5:
+        # Both LLM and fallback results carry plain syllable dicts
+        sample_text = ", ".join([s.get('syllable', '') for s in syllable_breakdown[:5]])
+        if syllable_count > 5:
             sample_text += "..."
         
-        steps.append({
-            "step_number": 2,
-            "step_name": "Syllable Segmentation (Akshara Vibhajana)",
-            "description": "Split text into syllables using Devanagari rules: consonant + vowel + optional dependent marks (ा, ि, ी, ु, ू, े, ै, ो, ौ, ं, ः) + optional halant (्) + conjunct consonants",
-            "result": f"Total syllables: {syllable_count}. Examples: {sample_text}"
-        })
+        steps.append(IdentificationStep(
+            step_number=2,
+            step_name="Syllable Segmentation (Akshara Vibhajana)",
+            description=_STEP2_DESC,
+            result=f"Total syllables: {syllable_count}. Examples: {sample_text}"
+        ))
         
         # Step 3: Laghu-Guru Classification
         pattern = result.get('laghu_guru_pattern', '')
-        laghu_count = pattern.count('L')
-        guru_count = pattern.count('G')
-        
-        classification_rules = [
-            "• Laghu (L): Short vowel (अ, इ, उ, ऋ) without conjunct",
-            "• Guru (G): Long vowel (आ, ई, ऊ, ए, ऐ, ओ, औ) OR short vowel + conjunct OR anusvara (ं) OR visarga (ः) OR end of line"
-        ]
+        # One pass over the pattern; LLM patterns may also contain spaces or |/S marks
+        symbol_counts = Counter(pattern)
+        laghu_count = symbol_counts['L']
+        guru_count = symbol_counts['G']
         
-        steps.append({
-            "step_number": 3,
-            "step_name": "Laghu-Guru Classification (Mātrā Analysis)",
-            "description": "Classify each syllable based on prosodic weight:\n" + "\n".join(classification_rules),
-            "result": f"Pattern: {pattern}\nLaghu: {laghu_count}, Guru: {guru_count}"
-        })
+        steps.append(IdentificationStep(
+            step_number=3,
+            step_name="Laghu-Guru Classification (Mātrā Analysis)",
+            description=_STEP3_DESC,
+            result=f"Pattern: {pattern}\nLaghu: {laghu_count}, Guru: {guru_count}"
+        ))
         
         # Step 4: Pattern Matching
         chandas_name = result.get('chandas_name', 'Unknown')
         
-        if syllable_count == 32:
-            match_explanation = "32 syllables (8 per quarter × 4 quarters) matches Anushtup meter structure"
-        elif syllable_count == 44:
-            match_explanation = f"44 syllables (11 per quarter × 4 quarters). Pattern {pattern} matched against Indravajra/Upendravajra templates"
-        elif syllable_count == 56:
-            match_explanation = "56 syllables (14 per quarter × 4 quarters) matches Vasantatilaka structure"
-        elif syllable_count % 8 == 0:
-            quarters = syllable_count // 8
-            match_explanation = f"{syllable_count} syllables = {quarters} quarters of 8. Likely Anushtup variant"
-        else:
-            match_explanation = f"{syllable_count} syllables analyzed. Pattern compared against database of known chandas signatures"
+        match_explanation = _MATCH_EXPLANATIONS.get(syllable_count)
+        if match_explanation is None:
+            if syllable_count == 44:
+                match_explanation = f"44 syllables (11 per quarter × 4 quarters). Pattern {pattern} matched against Indravajra/Upendravajra templates"
+            elif syllable_count % 8 == 0:
+                quarters = syllable_count // 8
+                match_explanation = f"{syllable_count} syllables = {quarters} quarters of 8. Likely Anushtup variant"
+            else:
+                match_explanation = f"{syllable_count} syllables analyzed. Pattern compared against database of known chandas signatures"
         
-        steps.append({
-            "step_number": 4,
-            "step_name": "Pattern Matching (Chandas Parichaya)",
-            "description": "Compare syllable count and L-G pattern against database of known chandas:\n• Anushtup: 32 syllables, flexible pattern\n• Indravajra: 44 syllables, GGLGGLLGLLG pattern\n• Upendravajra: 44 syllables, LGLGGLLGLLG pattern\n• Vasantatilaka: 56 syllables\n• Malini: 60 syllables\n• Shardula-vikridita: 76 syllables",
-            "result": f"Matched: {chandas_name}\n{match_explanation}"
-        })
+        steps.append(IdentificationStep(
+            step_number=4,
+            step_name="Pattern Matching (Chandas Parichaya)",
+            description=_STEP4_DESC,
+            result=f"Matched: {chandas_name}\n{match_explanation}"
+        ))
         
         # Step 5: Confidence Calculation
         confidence = result.get('confidence', 0.5)
@@ -206,42 +281,56 @@ Guru (G): Long syllable - two mÄtrÄs
         else:
             confidence_reason = "Low confidence - unusual pattern or insufficient data"
         
-        steps.append({
-            "step_number": 5,
-            "step_name": "Confidence Score Calculation",
-            "description": "Calculate confidence based on:\n• Pattern match accuracy (exact vs partial)\n• Syllable count alignment with known meters\n• Consistency of L-G pattern across quarters\n• Presence of standard chandas markers",
-            "result": f"Confidence: {confidence:.2f}\nReason: {confidence_reason}"
-        })
+        steps.append(IdentificationStep(
+            step_number=5,
+            step_name="Confidence Score Calculation",
+            description=_STEP5_DESC,
+            result=f"Confidence: {confidence:.2f}\nReason: {confidence_reason}"
+        ))
         
         return steps
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse LLM response to extract structured data"""
+    def _fast_parse_json(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Single-pass JSON extraction: decode the outermost { ... } span directly
+        
+        Returns None if the span is missing or not valid JSON, so the caller
+        can fall back to fence stripping.
+        """
+        start, end = response_text.find("{"), response_text.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        
+        json_str = response_text[start:end + 1]
         try:
-            # Try to extract JSON from various formats
-            json_str = response_text.strip()
-            
-            # Remove markdown code blocks
-            if "```json" in json_str:
-                json_str = json_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_str:
-                json_str = json_str.split("```")[1].split("```")[0].strip()
-            
-            # Find JSON object in text (look for { ... })
-            if not json_str.startswith("{"):
-                import re
-                json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-            
-            data = json.loads(json_str)
+            if ORJSON_AVAILABLE:
+                return orjson.loads(json_str.encode())
+            return json.loads(json_str)
+        except ValueError:
+            return None
+    
+    def _parse_llm_response(self, response_text: str) -> Tuple[Dict[str, Any], bool]:
+        """Parse LLM response to extract structured data (result, parsed_successfully)"""
+        try:
+            data = self._fast_parse_json(response_text)
             
-            # Ensure syllable_breakdown is list of SyllableInfo
-            if "syllable_breakdown" in data and data["syllable_breakdown"]:
-                data["syllable_breakdown"] = [
-                    SyllableInfo(**item) if isinstance(item, dict) else item
-                    for item in data["syllable_breakdown"]
-                ]
+            if data is None:
+                # Try to extract JSON from various formats
+                json_str = response_text.strip()
+                
+                # Remove markdown code blocks
+                if "```json" in json_str:
+                    json_str = json_str.split("```json")[1].split("```")[0].strip()
+                elif "```" in json_str:
+                    json_str = json_str.split("```")[1].split("```")[0].strip()
+                
+                # Find JSON object in text (look for { ... })
+                if not json_str.startswith("{"):
+                    json_match = _JSON_RE.search(json_str)
+                    if json_match:
+                        json_str = json_match.group(0)
+                
+                data = json.loads(json_str)
             
             # Set defaults if missing
             data.setdefault("chandas_name", "Unknown")
@@ -257,10 +346,10 @@ Guru (G): Long syllable - two mÄtrÄs
                 data["syllable_breakdown"] = fallback_result.get("syllable_breakdown", [])
                 data["laghu_guru_pattern"] = fallback_result.get("laghu_guru_pattern", "")
             
-            return data
+            return data, True
             
         except Exception as e:
-            logger.warning(f"Failed to parse as JSON: {str(e)}, treating as plain text")
+            logger.warning("Failed to parse as JSON: %s, treating as plain text", e)
             # Extract meter name from plain text response
             meter_name = response_text.strip().split('\n')[0] if response_text else "Unknown"
             # Clean up common patterns
@@ -274,19 +363,17 @@ Guru (G): Long syllable - two mÄtrÄs
                 "laghu_guru_pattern": "",
                 "explanation": response_text,
                 "confidence": 0.7
-            }
-
-
-# Singleton instance
-_chandas_controller: ChandasController = None
+            }, False
 
 
+@cache
 def get_chandas_controller() -> ChandasController:
     """Get or create chandas controller singleton"""
-    global _chandas_controller
-    
-    if _chandas_controller is None:
-        _chandas_controller = ChandasController()
-    
-    return _chandas_controller
+    return ChandasController()
+
 
+# Warm the fallback detector (and its compiled regex) at import, not on the first failed LLM call
+try:
+    detect_chandas("")
+except Exception as e:
+    logger.warning("Chandas fallback warm-up failed: %s", e)
@@ -2,46 +2,251 @@
 Chatbot Controller - Multimodal Sanskrit AI assistant
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List, Optional
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, AsyncIterator
 import base64
+import io
+
+import aiofiles
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    import tiktoken
+    _TOKEN_ENCODING = tiktoken.get_encoding("o200k_base")  # GPT-4o tokenizer
+except Exception:
+    _TOKEN_ENCODING = None
 
 from models import ChatRequest, ChatResponse, ChatMessage
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
+from services.semantic_cache import SemanticCache
 from config import get_settings
+from utils.cache import hash_key
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+def _keyword_re(*keywords: str, flags: int = 0) -> re.Pattern:
+    """Compile plain substrings into one alternation (same semantics as `kw in text`)"""
+    return re.compile("|".join(map(re.escape, keywords)), flags)
+
+
+# RAG routing keyword scans, compiled once per process
+_CASUAL_RE = _keyword_re(
+    'hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening',
+    'how are you', 'what\'s up', 'thanks', 'thank you', 'bye', 'goodbye',
+    'who are you', 'what can you do', 'help me', 'what is your name'
+)
+_GREETING_SANSKRIT_RE = _keyword_re(
+    'shloka', 'chandas', 'meter', 'verse', 'sanskrit', 'pronunciation',
+    'anushtup', 'indravajra', 'meaning', 'translation', 'bhagavad',
+    'ramayana', 'upanishad', 'veda', 'गीता', 'श्लोक'
+)
+_SHORT_SANSKRIT_RE = _keyword_re(
+    'shloka', 'chandas', 'meter', 'verse', 'sanskrit', 'pronunciation',
+    'meaning', 'translation', 'anushtup'
+)
+_FEATURE_RE = _keyword_re(
+    'how does', 'can you', 'what features', 'what can', 'how to use',
+    'how do i', 'show me how'
+)
+_FEATURE_SANSKRIT_RE = _keyword_re('shloka', 'verse', 'meter', 'chandas', 'pronunciation')
+
+# Follow-up suggestions: first matching keyword group wins, checked in order
+_METER_SUGGESTIONS = (
+    "Can you show me an example?",
+    "How do I identify this meter?",
+    "What are the rules for this chandas?"
+)
+_SHLOKA_SUGGESTIONS = (
+    "Can you analyze this shloka?",
+    "What is the meter of this verse?",
+    "What does this shloka mean?"
+)
+_PRONUNCIATION_SUGGESTIONS = (
+    "Can you check my pronunciation?",
+    "How should I practice?",
+    "What are common mistakes?"
+)
+_MEANING_SUGGESTIONS = (
+    "Can you explain word-by-word?",
+    "What is the cultural context?",
+    "Are there other interpretations?"
+)
+_DEFAULT_SUGGESTIONS = (
+    "Tell me more about Sanskrit meters",
+    "How does the voice analyzer work?",
+    "Can you generate a shloka?"
+)
+_SUGGESTION_TABLE = (
+    (_keyword_re('meter', 'chandas', flags=re.IGNORECASE), _METER_SUGGESTIONS),
+    (_keyword_re('shloka', 'verse', flags=re.IGNORECASE), _SHLOKA_SUGGESTIONS),
+    (_keyword_re('pronunciation', 'pronounce', flags=re.IGNORECASE), _PRONUNCIATION_SUGGESTIONS),
+    (_keyword_re('meaning', 'translation', flags=re.IGNORECASE), _MEANING_SUGGESTIONS),
+)
+
+# Source file path -> book name: last path component minus a tempfile "tmp" prefix and .pdf suffix
+_BOOK_NAME_RE = re.compile(r'(?:^|[\\/])(?:tmp)?([^\\/]*?)(?:\.pdf)?$', re.IGNORECASE)
+_HAS_ALPHA_RE = re.compile(r'[^\W\d_]')
+
+# Any letter above U+0900 (Devanagari and later scripts): word chars minus digits/underscore/lower code points
+_INDIC_LETTER_RE = re.compile(r'[^\W\d_\x00-\u0900]')
+
+
+# RAG context selection: candidate pool per collection, final size, MMR trade-off and a
+# character budget (~1500 tokens) that bounds prompt prefill
+_RAG_POOL_LIMITS = {"shlokas": 6, "chandas": 4}
+_RAG_TOP_K = 5
+_MMR_LAMBDA = 0.7
+_RAG_CONTEXT_CHAR_BUDGET = 6000
+
+
+def _mmr_select(documents: List[Dict[str, Any]], k: int, lambda_mult: float = _MMR_LAMBDA) -> List[Dict[str, Any]]:
+    """
+    Maximal Marginal Relevance selection
+    
+    Repeatedly picks the document maximizing
+    lambda * relevance - (1 - lambda) * max similarity to already-picked documents,
+    so near-duplicates don't crowd out other context. Relevance is the search score.
+    Documents without vectors are taken in their given (score) order.
+    
+    Args:
+        documents: Candidates sorted by descending score, each with a "vector"
+        k: Number of documents to select
+        lambda_mult: Relevance weight (1.0 = plain score order)
+        
+    Returns:
+        Selected documents in pick order
+    """
+    vectors = [doc.get('vector') for doc in documents]
+    if any(v is None for v in vectors):
+        return documents[:k]
+    
+    norms = [math.sqrt(sum(x * x for x in v)) or 1.0 for v in vectors]
+    max_sim = [0.0] * len(documents)
+    remaining = list(range(len(documents)))
+    selected = []
+    
+    while remaining and len(selected) < k:
+        best = max(
+            remaining,
+            key=lambda i: lambda_mult * documents[i].get('score', 0) - (1 - lambda_mult) * max_sim[i]
+        )
+        remaining.remove(best)
+        selected.append(documents[best])
+        
+        for i in remaining:
+            sim = sum(x * y for x, y in zip(vectors[i], vectors[best])) / (norms[i] * norms[best])
+            max_sim[i] = max(max_sim[i], sim)
+    
+    return selected
+
+
+# Prompt tokens allotted to prior conversation turns
+_HISTORY_TOKEN_BUDGET = 2000
+
+# Most history messages that can fit the budget (each costs at least 4 framing tokens);
+# older ones are never sent, so callers needn't validate them
+HISTORY_MAX_MESSAGES = _HISTORY_TOKEN_BUDGET // 4
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str) -> int:
+    """
+    Token count of a message (memoized - clients resend the same history every turn)
+    
+    Uses tiktoken when installed; otherwise estimates ~4 ASCII characters per token
+    and one token per non-ASCII character (Devanagari tokenizes densely).
+    """
+    if _TOKEN_ENCODING is not None:
+        return len(_TOKEN_ENCODING.encode(text))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+# Longest image side sent to GPT-4o Vision - larger uploads only add prefill tokens
+_VISION_MAX_SIDE = 1024
+
+
+def _encode_image(raw: bytes) -> str:
+    """Downscale (when Pillow is installed) and base64-encode an image for the Vision API"""
+    if PIL_AVAILABLE:
+        try:
+            with Image.open(io.BytesIO(raw)) as image:
+                if max(image.size) > _VISION_MAX_SIDE:
+                    image.thumbnail((_VISION_MAX_SIDE, _VISION_MAX_SIDE))
+                    buffer = io.BytesIO()
+                    image.convert("RGB").save(buffer, format="JPEG", quality=90)
+                    raw = buffer.getvalue()
+        except Exception as e:
+            logger.warning(f"Image downscale skipped: {str(e)}")
+    
+    return base64.b64encode(raw).decode('utf-8')
+
+
+@lru_cache()
+def _load_system_prompt() -> str:
+    """Load chatbot system prompt (read from disk once per process)"""
+    try:
+        with open("prompts/chatbot_system.txt", 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        # Fallback system prompt
+        return """You are a Sanskrit AI assistant specialized in helping users with Sanskrit language processing."""
+
+
+@lru_cache()
+def _load_krishna_prompt() -> str:
+    """Load Krishna persona prompt (read from disk once per process)"""
+    try:
+        with open("prompts/krishna_persona.txt", 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        # Fallback Krishna prompt
+        return """You are Lord Krishna, sharing divine wisdom and guidance with devotees."""
+
+
+@dataclass
+class _ChatTurn:
+    """Prepared chat turn: resolved query plus either a cached answer or LLM messages"""
+    user_query: str
+    cache_scope: str
+    cached: Optional[ChatResponse] = None
+    rag_context: List[Dict[str, Any]] = field(default_factory=list)
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    model: Optional[str] = None
+
+
+def _metadata(response: ChatResponse) -> Dict[str, Any]:
+    """Streaming metadata frame: every ChatResponse field except the (already streamed) text"""
+    data = response.to_dict()
+    del data["response"]
+    return data
+
+
 class ChatbotController:
     """Controller for Sanskrit AI chatbot operations"""
     
     def __init__(self):
         self.llm_client = get_llm_client()
         self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
-        self.krishna_prompt = self._load_krishna_prompt()
-    
-    def _load_system_prompt(self) -> str:
-        """Load chatbot system prompt"""
-        try:
-            with open("prompts/chatbot_system.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            # Fallback system prompt
-            return """You are a Sanskrit AI assistant specialized in helping users with Sanskrit language processing."""
-    
-    def _load_krishna_prompt(self) -> str:
-        """Load Krishna persona prompt"""
-        try:
-            with open("prompts/krishna_persona.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            # Fallback Krishna prompt
-            return """You are Lord Krishna, sharing divine wisdom and guidance with devotees."""
+        self.response_cache = SemanticCache(threshold=0.93)
+        self.system_prompt = _load_system_prompt()
+        self.krishna_prompt = _load_krishna_prompt()
     
     async def process_chat(
         self, 
@@ -68,127 +273,219 @@ class ChatbotController:
         try:
             logger.info(f"🤖 Processing chatbot request - Input type: {input_type}")
             
-            # Step 1: Convert input to text
-            if input_type == "text":
-                user_query = message
-                if not user_query or not user_query.strip():
-                    raise ValueError("Message cannot be empty for text input")
-            elif input_type == "voice":
-                user_query = await self._transcribe_audio(audio_path)
-                logger.info(f"🎤 Transcribed: {user_query}")
-            elif input_type == "image":
-                user_query = await self._extract_text_from_image(image_path)
-                logger.info(f"🖼️ Extracted from image: {user_query}")
-            else:
-                raise ValueError(f"Unsupported input type: {input_type}")
-            
-            # Step 2: Decide if RAG is needed (smart routing)
-            needs_rag = self._should_use_rag(user_query)
-            
-            if needs_rag:
-                logger.info("📚 Using RAG knowledge base for context")
-                rag_context = await self._get_rag_context(user_query)
-            else:
-                logger.info("💬 Casual chat - skipping RAG search")
-                rag_context = []
-            
-            # Step 3: Build conversation messages
-            messages = self._build_conversation(
-                user_query=user_query,
-                rag_context=rag_context,
-                conversation_history=conversation_history or [],
-                persona=persona
+            turn = await self._prepare_turn(
+                message, input_type, audio_path, image_path, conversation_history, persona
             )
+            if turn.cached is not None:
+                return turn.cached
             
             # Step 4: Get LLM response
             response_text = await self.llm_client.chat_completion(
-                messages=messages,
+                messages=turn.messages,
                 provider="openai",
+                model=turn.model,
                 temperature=0.7,
                 max_tokens=1000
             )
             
-            # Step 5: Extract sources from RAG context
-            sources = self._extract_sources(rag_context) if needs_rag else []
-            
-            # Step 6: Generate follow-up suggestions
-            suggestions = self._generate_suggestions(user_query, response_text)
+            return await self._finish_turn(turn, response_text)
             
-            logger.info(f"✅ Chatbot response generated successfully")
+        except Exception as e:
+            logger.error(f"Chatbot processing failed: {str(e)}")
+            raise
+    
+    async def process_chat_stream(
+        self,
+        message: Optional[str],
+        input_type: str,
+        audio_path: Optional[str] = None,
+        image_path: Optional[str] = None,
+        conversation_history: List[ChatMessage] = None,
+        persona: str = "default"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_chat
+        
+        Yields {"event": "token", "data": str} for each piece of the answer as the LLM
+        produces it, then one {"event": "metadata", "data": {...}} with the remaining
+        ChatResponse fields (input_detected, sources, confidence, suggestions).
+        """
+        try:
+            logger.info(f"🤖 Processing streaming chatbot request - Input type: {input_type}")
             
-            return ChatResponse(
-                response=response_text,
-                input_detected=user_query,
-                sources=sources,
-                confidence=0.85,  # Can be enhanced with confidence scoring
-                suggestions=suggestions
+            turn = await self._prepare_turn(
+                message, input_type, audio_path, image_path, conversation_history, persona
             )
+            if turn.cached is not None:
+                yield {"event": "token", "data": turn.cached.response}
+                yield {"event": "metadata", "data": _metadata(turn.cached)}
+                return
+            
+            # Step 4: Stream LLM response - each token is forwarded as soon as it arrives
+            chunks = []
+            async for token in self.llm_client.chat_completion_stream(
+                messages=turn.messages,
+                provider="openai",
+                model=turn.model,
+                temperature=0.7,
+                max_tokens=1000
+            ):
+                chunks.append(token)
+                yield {"event": "token", "data": token}
+            
+            response = await self._finish_turn(turn, "".join(chunks))
+            yield {"event": "metadata", "data": _metadata(response)}
             
         except Exception as e:
-            logger.error(f"Chatbot processing failed: {str(e)}")
+            logger.error(f"Chatbot streaming failed: {str(e)}")
             raise
     
-    def _should_use_rag(self, query: str) -> bool:
+    async def _prepare_turn(
+        self,
+        message: Optional[str],
+        input_type: str,
+        audio_path: Optional[str],
+        image_path: Optional[str],
+        conversation_history: Optional[List[ChatMessage]],
+        persona: str
+    ) -> _ChatTurn:
+        """Steps 1-3 shared by process_chat and process_chat_stream"""
+        # Step 1: Convert input to text (voice/image extraction is started as a task
+        # so the OpenAI round-trip overlaps with formatting the conversation history)
+        extract_task = None
+        if input_type == "text":
+            user_query = message
+            if not user_query or not user_query.strip():
+                raise ValueError("Message cannot be empty for text input")
+        elif input_type == "voice":
+            extract_task = asyncio.create_task(self._transcribe_audio(audio_path))
+        elif input_type == "image":
+            extract_task = asyncio.create_task(self._extract_text_from_image(image_path))
+        else:
+            raise ValueError(f"Unsupported input type: {input_type}")
+        
+        history_messages = self._build_history_messages(conversation_history or [])
+        
+        if input_type == "voice":
+            user_query = await extract_task
+            logger.info(f"🎤 Transcribed: {user_query}")
+        elif input_type == "image":
+            user_query = await extract_task
+            logger.info(f"🖼️ Extracted from image: {user_query}")
+        
+        # Answers depend on persona and recent history as well as the query itself
+        cache_scope = hash_key(
+            persona,
+            *[f"{m['role']}:{m['content']}" for m in history_messages]
+        ).hex()
+        cached = await self.response_cache.get(user_query, scope=cache_scope)
+        if cached is not None:
+            return _ChatTurn(
+                user_query=user_query,
+                cache_scope=cache_scope,
+                cached=cached.model_copy(update={"input_detected": user_query})
+            )
+        
+        # Step 2: Decide if RAG is needed and which model answers (smart routing) -
+        # only Sanskrit content goes to the large model
+        tier = self._classify_query(user_query)
+        if tier == "sanskrit":
+            logger.info("📚 Using RAG knowledge base for context")
+            rag_context = await self._get_rag_context(user_query)
+            model = None  # configured default model
+        else:
+            logger.info(f"💬 {tier.capitalize()} chat - skipping RAG search, using fast model")
+            rag_context = []
+            model = settings.llm.openai_fast_model
+        
+        # Step 3: Build conversation messages
+        messages = self._build_conversation(
+            user_query=user_query,
+            rag_context=rag_context,
+            history_messages=history_messages,
+            persona=persona
+        )
+        
+        return _ChatTurn(
+            user_query=user_query,
+            cache_scope=cache_scope,
+            rag_context=rag_context,
+            messages=messages,
+            model=model
+        )
+    
+    async def _finish_turn(self, turn: _ChatTurn, response_text: str) -> ChatResponse:
+        """Steps 5-6: attach sources and suggestions, then cache the response"""
+        # Step 5: Extract sources from RAG context
+        sources = self._extract_sources(turn.rag_context)
+        
+        # Step 6: Generate follow-up suggestions
+        suggestions = self._generate_suggestions(turn.user_query, response_text)
+        
+        logger.info(f"✅ Chatbot response generated successfully")
+        
+        response = ChatResponse(
+            response=response_text,
+            input_detected=turn.user_query,
+            sources=sources,
+            confidence=0.85,  # Can be enhanced with confidence scoring
+            suggestions=suggestions
+        )
+        await self.response_cache.put(turn.user_query, response, scope=turn.cache_scope)
+        
+        return response
+    
+    def _classify_query(self, query: str) -> str:
         """
-        Determine if RAG search is needed based on query content
+        Route a query based on its content
         
-        Returns True if query is about Sanskrit-specific content that would benefit from RAG
+        Returns:
+            "sanskrit" for Sanskrit-specific content that benefits from RAG and the large
+            model, "casual" for greetings and short small talk, "feature" for questions
+            about the assistant's capabilities
         """
         query_lower = query.lower()
         
         # Casual greetings and general chat - no RAG needed
-        casual_patterns = [
-            'hello', 'hi', 'hey', 'good morning', 'good afternoon', 'good evening',
-            'how are you', 'what\'s up', 'thanks', 'thank you', 'bye', 'goodbye',
-            'who are you', 'what can you do', 'help me', 'what is your name'
-        ]
-        
-        # Check if it's just a greeting
-        if any(pattern in query_lower for pattern in casual_patterns):
+        if _CASUAL_RE.search(query_lower):
             # But if they mention Sanskrit topics in greeting, still use RAG
-            sanskrit_keywords = [
-                'shloka', 'chandas', 'meter', 'verse', 'sanskrit', 'pronunciation',
-                'anushtup', 'indravajra', 'meaning', 'translation', 'bhagavad',
-                'ramayana', 'upanishad', 'veda', 'गीता', 'श्लोक'
-            ]
-            if any(keyword in query_lower for keyword in sanskrit_keywords):
-                return True
-            return False
+            return "sanskrit" if _GREETING_SANSKRIT_RE.search(query_lower) else "casual"
         
-        # Short queries without Sanskrit keywords - likely casual
-        if len(query.split()) <= 3 and not any(c.isalpha() and ord(c) > 2304 for c in query):
+        # Short queries without Sanskrit keywords - likely casual (maxsplit keeps long
+        # queries from being split into a full word list just to count to three)
+        if len(query.split(None, 3)) <= 3 and not _INDIC_LETTER_RE.search(query):
             # Check if it has Sanskrit keywords
-            sanskrit_keywords = [
-                'shloka', 'chandas', 'meter', 'verse', 'sanskrit', 'pronunciation',
-                'meaning', 'translation', 'anushtup'
-            ]
-            if not any(keyword in query_lower for keyword in sanskrit_keywords):
-                return False
+            if not _SHORT_SANSKRIT_RE.search(query_lower):
+                return "casual"
         
         # Questions about features/capabilities - no RAG needed
-        feature_patterns = [
-            'how does', 'can you', 'what features', 'what can', 'how to use',
-            'how do i', 'show me how'
-        ]
-        if any(pattern in query_lower for pattern in feature_patterns):
+        if _FEATURE_RE.search(query_lower):
             # Unless asking specifically about Sanskrit content
-            if not any(word in query_lower for word in ['shloka', 'verse', 'meter', 'chandas', 'pronunciation']):
-                return False
+            if not _FEATURE_SANSKRIT_RE.search(query_lower):
+                return "feature"
         
         # Everything else - use RAG (Sanskrit content, analysis, specific questions)
-        return True
+        return "sanskrit"
+    
+    def _get_openai_client(self):
+        """Shared, connection-pooled AsyncOpenAI client owned by the LLM client"""
+        client = self.llm_client.openai_client
+        if client is None:
+            raise RuntimeError("OpenAI client not initialized - check OPENAI_API_KEY")
+        return client
     
     async def _transcribe_audio(self, audio_path: str) -> str:
         """Transcribe audio to text using OpenAI Whisper"""
         try:
-            import openai
+            client = self._get_openai_client()
             
-            client = openai.OpenAI(api_key=settings.openai_api_key)
+            async with aiofiles.open(audio_path, 'rb') as audio_file:
+                audio_data = await audio_file.read()
             
-            with open(audio_path, 'rb') as audio_file:
-                transcript = client.audio.transcriptions.create(
+            async with self.llm_client.openai_semaphore:
+                transcript = await client.audio.transcriptions.create(
                     model="whisper-1",
-                    file=audio_file,
+                    file=(os.path.basename(audio_path), audio_data),
                     prompt="Sanskrit text or question about Sanskrit language"
                 )
             
@@ -201,35 +498,35 @@ class ChatbotController:
     async def _extract_text_from_image(self, image_path: str) -> str:
         """Extract text from image using GPT-4 Vision"""
         try:
-            import openai
+            client = self._get_openai_client()
             
-            # Read and encode image
-            with open(image_path, 'rb') as image_file:
-                image_data = base64.b64encode(image_file.read()).decode('utf-8')
+            # Read image, then downscale/encode it in a worker thread (CPU-bound on large uploads)
+            async with aiofiles.open(image_path, 'rb') as image_file:
+                raw = await image_file.read()
+            image_data = await asyncio.to_thread(_encode_image, raw)
             
-            client = openai.OpenAI(api_key=settings.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Extract any Sanskrit text or questions about Sanskrit from this image. If it contains Sanskrit verse, preserve the Devanagari script. If it's a question in English/other language, extract that. Be precise."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_data}"
+            async with self.llm_client.openai_semaphore:
+                response = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "text",
+                                    "text": "Extract any Sanskrit text or questions about Sanskrit from this image. If it contains Sanskrit verse, preserve the Devanagari script. If it's a question in English/other language, extract that. Be precise."
+                                },
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:image/jpeg;base64,{image_data}"
+                                    }
                                 }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=500
-            )
+                            ]
+                        }
+                    ],
+                    max_tokens=500
+                )
             
             return response.choices[0].message.content
             
@@ -240,44 +537,74 @@ class ChatbotController:
     async def _get_rag_context(self, query: str) -> List[Dict[str, Any]]:
         """Search RAG knowledge base for relevant context"""
         try:
-            # Search across all collections
-            results = []
+            # Search shlokas and chandas patterns collections with one shared query embedding,
+            # fetching a slightly larger pool (with vectors) for diversification
+            results_by_collection = await self.rag_client.search_multi(
+                [
+                    (settings.shlokas_collection, _RAG_POOL_LIMITS["shlokas"]),
+                    (settings.chandas_collection, _RAG_POOL_LIMITS["chandas"])
+                ],
+                query_text=query,
+                with_vectors=True
+            )
+            results = [doc for docs in results_by_collection for doc in docs]
             
-            # Search shlokas collection
-            try:
-                shloka_results = await self.rag_client.search_documents(
-                    collection=settings.shlokas_collection,
-                    query_text=query,
-                    limit=3
-                )
-                results.extend(shloka_results)
-            except Exception as e:
-                logger.warning(f"Shloka search failed: {str(e)}")
+            # Order by score (ties broken by id so identical retrievals always produce the
+            # same prompt bytes) and drop chunks whose text is already in the pool
+            results.sort(key=lambda x: (-x.get('score', 0), str(x.get('id', ''))))
+            seen_content = set()
+            pool = []
+            for doc in results:
+                content = doc.get('content', '').strip()
+                if content not in seen_content:
+                    seen_content.add(content)
+                    pool.append(doc)
             
-            # Search chandas patterns collection
-            try:
-                chandas_results = await self.rag_client.search_documents(
-                    collection=settings.chandas_collection,
-                    query_text=query,
-                    limit=2
-                )
-                results.extend(chandas_results)
-            except Exception as e:
-                logger.warning(f"Chandas search failed: {str(e)}")
+            # Diversify, then keep within the context budget (always at least one chunk)
+            context = []
+            used_chars = 0
+            for doc in _mmr_select(pool, _RAG_TOP_K):
+                doc.pop('vector', None)
+                used_chars += len(doc.get('content', ''))
+                if context and used_chars > _RAG_CONTEXT_CHAR_BUDGET:
+                    break
+                context.append(doc)
             
-            # Sort by score and return top results
-            results.sort(key=lambda x: x.get('score', 0), reverse=True)
-            return results[:5]
+            return context
             
         except Exception as e:
             logger.error(f"RAG context retrieval failed: {str(e)}")
             return []
     
+    def _build_history_messages(self, conversation_history: List[ChatMessage]) -> List[Dict[str, str]]:
+        """
+        Format prior conversation turns for the LLM (independent of the current query)
+        
+        Keeps the most recent messages that fit in the history token budget, so prompt
+        length (and time to first token) stays bounded however long the dialog gets.
+        """
+        kept = []
+        used_tokens = 0
+        for msg in reversed(conversation_history):
+            used_tokens += _count_tokens(msg["content"]) + 4  # per-message role/framing overhead
+            if used_tokens > _HISTORY_TOKEN_BUDGET:
+                break
+            kept.append({
+                "role": msg["role"],
+                "content": msg["content"]
+            })
+        
+        if len(kept) < len(conversation_history):
+            logger.info(f"✂️ Trimmed history to {len(kept)}/{len(conversation_history)} messages")
+        
+        kept.reverse()
+        return kept
+    
     def _build_conversation(
         self,
         user_query: str,
         rag_context: List[Dict[str, Any]],
-        conversation_history: List[ChatMessage],
+        history_messages: List[Dict[str, str]],
         persona: str = "default"
     ) -> List[Dict[str, str]]:
         """Build conversation messages for LLM"""
@@ -288,31 +615,29 @@ class ChatbotController:
         else:
             base_prompt = self.system_prompt
         
-        # Format RAG context
-        if rag_context:
-            context_text = "\n\n".join([
-                f"Source: {r.get('metadata', {}).get('source', 'Unknown')}\n{r.get('content', '')}"
-                for r in rag_context
-            ])
-            system_content = f"{base_prompt}\n\n**Available Context from Knowledge Base:**\n{context_text}"
-        else:
-            system_content = base_prompt
-        
-        # Build messages
+        # Build messages - the persona prompt is always the first message, byte-identical
+        # across requests, so the provider's prompt cache can reuse its prefill
         messages = [
             {
                 "role": "system",
-                "content": system_content
+                "content": base_prompt
             }
         ]
         
-        # Add conversation history
-        for msg in conversation_history[-10:]:  # Keep last 10 messages for context
+        # RAG context goes in a separate system message after the static prefix
+        if rag_context:
+            context_text = "\n\n".join([
+                f"Source: {r.get('metadata', {}).get('source', 'Unknown')}\n{r.get('content', '')}"
+                for r in rag_context
+            ])
             messages.append({
-                "role": msg.role,
-                "content": msg.content
+                "role": "system",
+                "content": f"**Available Context from Knowledge Base:**\n{context_text}"
             })
         
+        # Add conversation history
+        messages.extend(history_messages)
+        
         # Add current user query
         messages.append({
             "role": "user",
@@ -334,13 +659,11 @@ class ChatbotController:
             
             # Extract readable book name from filename
             if '\\' in source_file or '/' in source_file:
-                # It's a file path - get just the filename
-                book_name = source_file.split('\\')[-1].split('/')[-1]
-                # Remove .pdf extension and temp prefixes
-                book_name = book_name.replace('.pdf', '').replace('tmp', '').strip('_-')
+                # It's a file path - filename without temp prefix and .pdf extension
+                book_name = _BOOK_NAME_RE.search(source_file).group(1).strip('_-')
                 
                 # If it's still messy (like "pfn18mz1"), use a generic name
-                if len(book_name) < 10 or not any(c.isalpha() for c in book_name):
+                if len(book_name) < 10 or not _HAS_ALPHA_RE.search(book_name):
                     book_name = metadata.get('title', 'Sanskrit Text')
             else:
                 book_name = source_file
@@ -358,52 +681,24 @@ class ChatbotController:
             if source_str not in seen:
                 sources.append(source_str)
                 seen.add(source_str)
+                if len(sources) == 3:  # Top 3 unique sources
+                    break
         
-        return sources[:3]  # Return top 3 unique sources
+        return sources
     
     def _generate_suggestions(self, query: str, response: str) -> List[str]:
         """Generate follow-up question suggestions"""
-        # Smart suggestions based on query keywords
-        suggestions = []
-        
-        query_lower = query.lower()
-        
-        if "meter" in query_lower or "chandas" in query_lower:
-            suggestions = [
-                "Can you show me an example?",
-                "How do I identify this meter?",
-                "What are the rules for this chandas?"
-            ]
-        elif "shloka" in query_lower or "verse" in query_lower:
-            suggestions = [
-                "Can you analyze this shloka?",
-                "What is the meter of this verse?",
-                "What does this shloka mean?"
-            ]
-        elif "pronunciation" in query_lower or "pronounce" in query_lower:
-            suggestions = [
-                "Can you check my pronunciation?",
-                "How should I practice?",
-                "What are common mistakes?"
-            ]
-        elif "meaning" in query_lower or "translation" in query_lower:
-            suggestions = [
-                "Can you explain word-by-word?",
-                "What is the cultural context?",
-                "Are there other interpretations?"
-            ]
-        else:
-            suggestions = [
-                "Tell me more about Sanskrit meters",
-                "How does the voice analyzer work?",
-                "Can you generate a shloka?"
-            ]
+        # Smart suggestions based on query keywords (case-insensitive, no lowercased copy)
+        for pattern, suggestions in _SUGGESTION_TABLE:
+            if pattern.search(query):
+                return list(suggestions)
         
-        return suggestions
+        return list(_DEFAULT_SUGGESTIONS)
 
 
 # Singleton instance
 _chatbot_controller: ChatbotController = None
+_chatbot_controller_lock = threading.Lock()
 
 
 def get_chatbot_controller() -> ChatbotController:
@@ -411,6 +706,10 @@ def get_chatbot_controller() -> ChatbotController:
     global _chatbot_controller
     
     if _chatbot_controller is None:
-        _chatbot_controller = ChatbotController()
+        # Concurrent first requests (sync dependencies run in the threadpool) must not
+        # each build their own instance
+        with _chatbot_controller_lock:
+            if _chatbot_controller is None:
+                _chatbot_controller = ChatbotController()
     
     return _chatbot_controller
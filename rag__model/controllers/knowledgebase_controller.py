@@ -3,6 +3,7 @@ Knowledge Base Controller - Business logic for RAG operations
 """
 
 import logging
+import threading
 from typing import List
 
 from models import (
@@ -222,6 +223,7 @@ class KnowledgeBaseController:
 
 # Singleton instance
 _kb_controller: KnowledgeBaseController = None
+_kb_controller_lock = threading.Lock()
 
 
 def get_knowledgebase_controller() -> KnowledgeBaseController:
@@ -229,6 +231,8 @@ def get_knowledgebase_controller() -> KnowledgeBaseController:
     global _kb_controller
     
     if _kb_controller is None:
-        _kb_controller = KnowledgeBaseController()
+        with _kb_controller_lock:
+            if _kb_controller is None:
+                _kb_controller = KnowledgeBaseController()
     
     return _kb_controller
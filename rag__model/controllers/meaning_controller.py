@@ -3,33 +3,43 @@ Meaning Controller - Business logic for Sanskrit translation and meaning extract
 """
 
 import logging
+import threading
 import json
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 
-from models import MeaningRequest, MeaningResponse
+from models import MeaningRequest, MeaningResponse, MeaningBatchStatus
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
 from config import get_settings
+from utils.cache import LRUCache, hash_key
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Grammar reference appended to the prompt when context is requested
+_GRAMMAR_CONTEXT = """
+Sanskrit Grammar Reference:
+- Nominal cases: 8 cases (vibhakti) - nominative to locative
+- Sandhi rules: Vowel and consonant combination rules
+- Samasa: Compound formations (tatpurusha, bahuvrihi, etc.)
+- Verb forms: Present, past, future tenses with various moods
 
-class MeaningController:
-    """Controller for Sanskrit meaning extraction"""
-    
-    def __init__(self):
-        self.llm_client = get_llm_client()
-        self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
-    
-    def _load_system_prompt(self) -> str:
-        """Load meaning extraction system prompt"""
-        try:
-            with open("prompts/meaning_system.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return """You are an expert Sanskrit scholar and translator.
+Common patterns:
+- -म् (-m) ending: Neuter nominative/accusative singular
+- -ः (-ḥ) ending: Masculine nominative singular
+- -ा (-ā) ending: Feminine nominative singular
+"""
+
+
+@lru_cache()
+def _load_system_prompt() -> str:
+    """Load meaning extraction system prompt (read from disk once per process)"""
+    try:
+        with open("prompts/meaning_system.txt", 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return """You are an expert Sanskrit scholar and translator.
 Your task is to provide accurate translations, detailed word-by-word meanings, and interesting facts.
 
 Provide:
@@ -47,6 +57,16 @@ Return response as JSON with:
 - unique_facts: Interesting facts about the shloka
 - unknown_facts: Lesser-known or obscure facts
 - notes: Grammatical and interpretive notes"""
+
+
+class MeaningController:
+    """Controller for Sanskrit meaning extraction"""
+    
+    def __init__(self):
+        self.llm_client = get_llm_client()
+        self.rag_client = get_rag_client()
+        self.system_prompt = _load_system_prompt()
+        self._result_cache = LRUCache(maxsize=1024)
     
     async def extract_meaning(self, request: MeaningRequest) -> MeaningResponse:
         """
@@ -61,13 +81,51 @@ Return response as JSON with:
         try:
             logger.info(f"📖 Extracting meaning for verse")
             
-            # Get grammar context if needed
-            context = ""
-            if request.include_context:
-                context = await self._get_grammar_context()
+            # Verses are deterministic inputs - exact-match hits skip the LLM round-trip
+            cache_key = hash_key(
+                " ".join(request.verse.split()),
+                str(request.include_word_meanings),
+                str(request.include_context)
+            )
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                logger.info("⚡ Meaning cache hit")
+                return cached
             
             # Build user prompt
-            user_prompt = f"""Translate and analyze this Sanskrit verse:
+            user_prompt = self._build_user_prompt(request)
+            
+            # Get LLM response
+            response_text = await self.llm_client.structured_completion(
+                system_prompt=self.system_prompt,
+                user_prompt=user_prompt,
+                temperature=0.3,  # Lower temperature for accuracy
+                json_mode=True
+            )
+            
+            # Parse response
+            result, parsed = self._parse_llm_response(response_text)
+            
+            logger.info(f"✅ Translation completed")
+            
+            response = MeaningResponse(**result)
+            
+            # Placeholder answers from unparseable LLM output are not cached
+            if parsed:
+                self._result_cache.set(cache_key, response)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Meaning extraction failed: {str(e)}")
+            raise
+    
+    def _build_user_prompt(self, request: MeaningRequest) -> str:
+        """Build the translation prompt for a verse (shared by interactive and batch paths)"""
+        # Get grammar context if needed
+        context = _GRAMMAR_CONTEXT if request.include_context else ""
+        
+        return f"""Translate and analyze this Sanskrit verse:
 
 Verse: {request.verse}
 
@@ -86,56 +144,109 @@ Provide:
 6. Unknown/obscure facts - rare interpretations, hidden meanings, scholarly insights
 
 Return as JSON with fields: translation, word_meanings (dict), context, unique_facts, unknown_facts, notes"""
+    
+    async def submit_batch(self, requests: List[MeaningRequest]) -> MeaningBatchStatus:
+        """
+        Submit verses to the OpenAI Batch API for offline translation (e.g. knowledge base seeding)
+        
+        Batch jobs cost about half as much as interactive calls and complete within 24 hours;
+        poll get_batch() for results. Interactive callers should keep using extract_meaning.
+        
+        Args:
+            requests: Meaning extraction requests
             
-            # Get LLM response
-            response_text = await self.llm_client.structured_completion(
-                system_prompt=self.system_prompt,
-                user_prompt=user_prompt,
-                temperature=0.3  # Lower temperature for accuracy
+        Returns:
+            MeaningBatchStatus with the batch id and initial status
+        """
+        client = self.llm_client.openai_client
+        if client is None:
+            raise ValueError("OpenAI client not initialized - batch extraction requires OPENAI_API_KEY")
+        
+        lines = [
+            json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": settings.llm.openai_model,
+                    "messages": [
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": self._build_user_prompt(request)}
+                    ],
+                    "temperature": 0.3,
+                    "max_tokens": settings.llm_max_tokens,
+                    "response_format": {"type": "json_object"}
+                }
+            }, ensure_ascii=False)
+            for index, request in enumerate(requests)
+        ]
+        
+        async with self.llm_client.openai_semaphore:
+            batch_file = await client.files.create(
+                file=("meaning_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
             )
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+        
+        logger.info(f"📦 Submitted meaning batch {batch.id} ({len(requests)} verses)")
+        return MeaningBatchStatus(batch_id=batch.id, status=batch.status)
+    
+    async def get_batch(self, batch_id: str) -> MeaningBatchStatus:
+        """
+        Get the status of a batch job, with parsed results once it has completed
+        
+        Args:
+            batch_id: Id returned by submit_batch
             
-            # Parse response
-            result = self._parse_llm_response(response_text)
-            
-            logger.info(f"✅ Translation completed")
-            
-            return MeaningResponse(**result)
+        Returns:
+            MeaningBatchStatus; results are in submission order (None for failed items)
+        """
+        client = self.llm_client.openai_client
+        if client is None:
+            raise ValueError("OpenAI client not initialized - batch extraction requires OPENAI_API_KEY")
+        
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return MeaningBatchStatus(batch_id=batch.id, status=batch.status)
+        
+        output = await client.files.content(batch.output_file_id)
+        
+        results: List[Optional[MeaningResponse]] = [None] * batch.request_counts.total
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                logger.warning(f"Batch item {item.get('custom_id')} failed: {item.get('error')}")
+                continue
             
-        except Exception as e:
-            logger.error(f"Meaning extraction failed: {str(e)}")
-            raise
-    
-    async def _get_grammar_context(self) -> str:
-        """Get grammar rules context"""
-        try:
-            return """
-Sanskrit Grammar Reference:
-- Nominal cases: 8 cases (vibhakti) - nominative to locative
-- Sandhi rules: Vowel and consonant combination rules
-- Samasa: Compound formations (tatpurusha, bahuvrihi, etc.)
-- Verb forms: Present, past, future tenses with various moods
-
-Common patterns:
-- -म् (-m) ending: Neuter nominative/accusative singular
-- -ः (-ḥ) ending: Masculine nominative singular
-- -ा (-ā) ending: Feminine nominative singular
-"""
-        except Exception as e:
-            logger.warning(f"Failed to get grammar context: {str(e)}")
-            return ""
+            content = response["body"]["choices"][0]["message"]["content"]
+            result, _ = self._parse_llm_response(content)
+            results[int(item["custom_id"])] = MeaningResponse(**result)
+        
+        return MeaningBatchStatus(batch_id=batch.id, status=batch.status, results=results)
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse LLM response to extract structured data"""
+    def _parse_llm_response(self, response_text: str) -> Tuple[Dict[str, Any], bool]:
+        """Parse LLM response to extract structured data (data, parsed_successfully)"""
         try:
-            # Extract JSON
-            if "```json" in response_text:
-                json_str = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_str = response_text.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = response_text.strip()
-            
-            data = json.loads(json_str)
+            # JSON mode returns a bare object - fence stripping is only needed for
+            # providers without JSON mode
+            try:
+                data = json.loads(response_text)
+            except ValueError:
+                if "```json" in response_text:
+                    json_str = response_text.split("```json")[1].split("```")[0].strip()
+                elif "```" in response_text:
+                    json_str = response_text.split("```")[1].split("```")[0].strip()
+                else:
+                    json_str = response_text.strip()
+                
+                data = json.loads(json_str)
             
             # Set defaults
             data.setdefault("translation", "")
@@ -145,7 +256,7 @@ Common patterns:
             data.setdefault("unknown_facts", "")
             data.setdefault("notes", "")
             
-            return data
+            return data, True
             
         except Exception as e:
             logger.error(f"Failed to parse LLM response: {str(e)}")
@@ -156,11 +267,12 @@ Common patterns:
                 "unique_facts": "",
                 "unknown_facts": "",
                 "notes": "Translation failed"
-            }
+            }, False
 
 
 # Singleton instance
 _meaning_controller: MeaningController = None
+_meaning_controller_lock = threading.Lock()
 
 
 def get_meaning_controller() -> MeaningController:
@@ -168,6 +280,8 @@ def get_meaning_controller() -> MeaningController:
     global _meaning_controller
     
     if _meaning_controller is None:
-        _meaning_controller = MeaningController()
+        with _meaning_controller_lock:
+            if _meaning_controller is None:
+                _meaning_controller = MeaningController()
     
     return _meaning_controller
@@ -2,34 +2,84 @@
 Shloka Controller - Business logic for shloka generation
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any
+import re
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
 
 from models import ShlokaGenerateRequest, ShlokaGenerateResponse
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
+from services.response_cache import RedisResponseCache
+from services.semantic_cache import SemanticCache
 from config import get_settings
+from utils.cache import SingleFlight, hash_key
+from utils.helpers import load_prompt
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Body of the first ``` / ```json fenced block in an LLM response
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
 
-class ShlokaController:
-    """Controller for shloka generation operations"""
-    
-    def __init__(self):
-        self.llm_client = get_llm_client()
-        self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
-    
-    def _load_system_prompt(self) -> str:
-        """Load shloka generation system prompt"""
-        try:
-            with open("prompts/shloka_generate.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return """You are an expert Sanskrit poet and scholar.
+if MSGSPEC_AVAILABLE:
+    class _ShlokaLLMOut(msgspec.Struct):
+        """Shloka JSON as emitted by the LLM, decoded and type-checked in one pass"""
+        shloka: str = ""
+        meter: str = "Anushtup"
+        meaning: str = ""
+        pattern: str = ""
+
+# Output schema for providers with structured outputs (strict mode: every field required,
+# no extra keys) - the response is then bare JSON with no fence to strip
+_SHLOKA_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "shloka": {"type": "string"},
+        "meter": {"type": "string"},
+        "meaning": {"type": "string"},
+        "pattern": {"type": "string"}
+    },
+    "required": ["shloka", "meter", "meaning", "pattern"],
+    "additionalProperties": False
+}
+
+
+# Placeholder answer when the LLM output is unusable (our own constants - built once,
+# unvalidated, never cached)
+_FALLBACK_SHLOKA = ShlokaGenerateResponse.model_construct(
+    shloka="Error generating shloka",
+    meter="Unknown",
+    meaning="Unable to generate",
+    pattern=""
+)
+
+# Generation budget sized to the schema (a few Devanagari lines, English meaning and the
+# laghu-guru pattern, with room to spare) instead of the global llm_max_tokens default
+_MAX_TOKENS = 512
+
+# Malformed or mistyped LLM JSON (pydantic's ValidationError and both JSON decoders'
+# errors are ValueErrors)
+_PARSE_ERRORS: Tuple[type, ...] = (ValueError, msgspec.DecodeError) if MSGSPEC_AVAILABLE else (ValueError,)
+
+
+# Used when prompts/shloka_generate.txt is missing
+_DEFAULT_SYSTEM_PROMPT = """You are an expert Sanskrit poet and scholar.
 Your task is to compose beautiful, grammatically correct Sanskrit shlokas.
 
 Generate high-quality Sanskrit verses that:
@@ -43,109 +93,198 @@ Return response as JSON with:
 - meter: The chandas used
 - meaning: English translation and explanation
 - pattern: Laghu-Guru pattern"""
-    
-    async def generate_shloka(self, request: ShlokaGenerateRequest) -> ShlokaGenerateResponse:
-        """
-        Generate Sanskrit shloka based on parameters
-        
-        Args:
-            request: Shloka generation request
-            
-        Returns:
-            ShlokaGenerateResponse with generated shloka
-        """
-        try:
-            logger.info(f"✍️ Generating shloka - Theme: {request.theme}")
-            
-            # Get example shlokas for context
-            context = await self._get_shloka_examples(request)
-            
-            # Build user prompt
-            user_prompt = f"""Generate a Sanskrit shloka with the following parameters:
 
-Theme: {request.theme}
-Deity: {request.deity or 'N/A'}
-Mood: {request.mood}
-Style: {request.style}
-Preferred Meter: {request.meter or 'Choose appropriate meter'}
 
-Context - Example shlokas in similar style:
-{context}
+# User prompt for generate_shloka (filled with str.format - compiled once). Only the
+# per-request parameters: requirements and output format live in the system prompt,
+# which is identical across requests and prefix-cached
+_USER_PROMPT_TEMPLATE = """Generate a Sanskrit shloka with the following parameters:
 
-Requirements:
-1. Create an authentic Sanskrit verse
-2. Follow proper meter rules
-3. Capture the requested theme and mood
-4. Ensure grammatical correctness
-5. Provide English translation
-6. Include syllable pattern
+Theme: {theme}
+Deity: {deity}
+Mood: {mood}
+Style: {style}
+Preferred Meter: {meter}
 
-Return as JSON with fields: shloka, meter, meaning, pattern"""
-            
-            # Get LLM response
-            response_text = await self.llm_client.structured_completion(
-                system_prompt=self.system_prompt,
-                user_prompt=user_prompt,
-                temperature=0.8  # Higher temperature for creativity
-            )
-            
-            # Parse response
-            result = self._parse_llm_response(response_text)
-            
-            logger.info(f"✅ Generated shloka in {result['meter']} meter")
-            
-            return ShlokaGenerateResponse(**result)
-            
-        except Exception as e:
-            logger.error(f"Shloka generation failed: {str(e)}")
-            raise
-    
-    async def _get_shloka_examples(self, request: ShlokaGenerateRequest) -> str:
-        """Get example shlokas from knowledge base"""
-        try:
-            # Return relevant examples based on style and mood
-            examples = {
-                "devotional": """Example (Krishna devotion):
+Context - Example shlokas in similar style:
+{context}"""
+
+# Example shlokas per mood (built once - read-only)
+_SHLOKA_EXAMPLES: Mapping[str, str] = MappingProxyType({
+    "devotional": """Example (Krishna devotion):
 वसुदेवसुतं देवं कंसचाणूरमर्दनम्।
 देवकीपरमानन्दं कृष्णं वन्दे जगद्गुरुम्॥
 
 I bow to Krishna, son of Vasudeva, destroyer of Kamsa and Chanura,
 supreme joy of Devaki, teacher of the world.""",
-                
-                "philosophical": """Example (Bhagavad Gita style):
+    
+    "philosophical": """Example (Bhagavad Gita style):
 कर्मण्येवाधिकारस्ते मा फलेषु कदाचन।
 मा कर्मफलहेतुर्भूर्मा ते सङ्गोऽस्त्वकर्मणि॥
 
 You have right to action alone, never to its fruits.
 Do not be motivated by fruits of action, nor attach to inaction.""",
-                
-                "heroic": """Example (Heroic):
+    
+    "heroic": """Example (Heroic):
 पराक्रमो वीरवरस्य शौर्यं
 महाबलं संयुगे दर्शयित्वा।
 
 Displaying valor and great strength,
 The hero's prowess shines in battle."""
-            }
+})
+
+
+class ShlokaController:
+    """Controller for shloka generation operations"""
+    
+    def __init__(self):
+        self.llm_client = get_llm_client()
+        self.rag_client = get_rag_client()
+        self.system_prompt = load_prompt("prompts/shloka_generate.txt", _DEFAULT_SYSTEM_PROMPT)
+        self.response_cache = SemanticCache(
+            maxsize=1024,
+            shared=RedisResponseCache("shloka"),
+            model=ShlokaGenerateResponse
+        )
+        self._inflight = SingleFlight()
+    
+    async def generate_shloka(self, request: ShlokaGenerateRequest) -> ShlokaGenerateResponse:
+        """
+        Generate Sanskrit shloka based on parameters
+        
+        Args:
+            request: Shloka generation request
             
-            mood_key = request.mood.value if hasattr(request.mood, 'value') else str(request.mood)
-            return examples.get(mood_key, examples["devotional"])
+        Returns:
+            ShlokaGenerateResponse with generated shloka
+        """
+        logger.info(f"✍️ Generating shloka - Theme: {request.theme}")
+        
+        # Repeated (or reworded) requests return the earlier shloka without an LLM round-trip
+        cache_query, cache_scope = self._cache_query(request)
+        cached = await self.response_cache.get(cache_query, scope=cache_scope)
+        if cached is not None:
+            return cached
+        
+        # Identical requests already being generated share that one LLM call
+        return await self._inflight.run(
+            hash_key(cache_scope, " ".join(cache_query.split()).lower()),
+            lambda: self._generate(request, cache_query, cache_scope)
+        )
+    
+    async def _generate(
+        self,
+        request: ShlokaGenerateRequest,
+        cache_query: str,
+        cache_scope: str
+    ) -> ShlokaGenerateResponse:
+        """Cache-miss path: prompt the LLM, parse, validate and cache the result"""
+        # Get example shlokas context - here rather than in the caller, so requests joining an
+        # in-flight generation don't fetch context they never use
+        context = self._get_shloka_examples(request)
+        
+        # Build user prompt
+        user_prompt = _USER_PROMPT_TEMPLATE.format(
+            theme=request.theme,
+            deity=request.deity or 'N/A',
+            mood=request.mood,
+            style=request.style,
+            meter=request.meter or 'Choose appropriate meter',
+            context=context
+        )
+        
+        # Get LLM response
+        response_text = await self.llm_client.fenced_json_completion(
+            system_prompt=self.system_prompt,
+            user_prompt=user_prompt,
+            response_schema=_SHLOKA_SCHEMA,
+            temperature=0.8,  # Higher temperature for creativity
+            top_p=0.9,
+            max_tokens=_MAX_TOKENS
+        )
+        
+        # Parse response
+        response, parsed = self._parse_llm_response(response_text)
+        
+        logger.info(f"✅ Generated shloka in {response.meter} meter")
+        
+        if parsed:
+            await self.response_cache.put(cache_query, response, scope=cache_scope)
+        
+        return response
+    
+    async def generate_shloka_batch(
+        self,
+        requests: List[ShlokaGenerateRequest]
+    ) -> List[Optional[ShlokaGenerateResponse]]:
+        """
+        Generate several shlokas concurrently
+        
+        Requests fan out together; the LLM client's concurrency limit keeps the burst
+        within provider rate limits. A failed item doesn't fail the batch.
+        
+        Args:
+            requests: Shloka generation requests
             
-        except Exception as e:
-            logger.warning(f"Failed to get examples: {str(e)}")
-            return ""
+        Returns:
+            Responses in request order (None for items that failed)
+        """
+        logger.info(f"📦 Generating {len(requests)} shlokas concurrently")
+        
+        results = await asyncio.gather(
+            *(self.generate_shloka(request) for request in requests),
+            return_exceptions=True
+        )
+        
+        failed = sum(isinstance(r, BaseException) for r in results)
+        if failed:
+            logger.warning(f"⚠️ {failed}/{len(requests)} shlokas in batch failed")
+        
+        return [None if isinstance(r, BaseException) else r for r in results]
+    
+    @staticmethod
+    def _cache_query(request: ShlokaGenerateRequest) -> Tuple[str, str]:
+        """
+        Split a request into its free-text theme (matched semantically) and a scope of
+        fields that must match exactly (deity, mood, style, meter)
+        """
+        scope = hash_key(
+            " ".join((request.deity or "").split()).lower(),
+            request.mood,
+            request.style,
+            " ".join((request.meter or "").split()).lower()
+        ).hex()
+        return request.theme, scope
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse LLM response to extract structured data"""
+    def _get_shloka_examples(self, request: ShlokaGenerateRequest) -> str:
+        """Get example shlokas from knowledge base"""
+        # Return relevant examples based on style and mood
+        return _SHLOKA_EXAMPLES.get(request.mood, _SHLOKA_EXAMPLES["devotional"])
+    
+    def _parse_llm_response(self, response_text: str) -> Tuple[ShlokaGenerateResponse, bool]:
+        """Parse LLM response into a response model (response, parsed_successfully)"""
         try:
-            # Extract JSON from response
-            if "```json" in response_text:
-                json_str = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_str = response_text.split("```")[1].split("```")[0].strip()
+            # Schema-guided responses are bare JSON; otherwise extract the fenced block (if
+            # present, else use the whole response) in one regex pass
+            if response_text.lstrip().startswith("{"):
+                json_str = response_text
             else:
-                json_str = response_text.strip()
+                fence = _FENCE_RE.search(response_text)
+                json_str = fence.group(1) if fence else response_text
+            
+            if MSGSPEC_AVAILABLE:
+                # msgspec has already type-checked every field - no second validation pass
+                data = msgspec.json.decode(json_str, type=_ShlokaLLMOut)
+                return ShlokaGenerateResponse.model_construct(
+                    shloka=data.shloka,
+                    meter=data.meter,
+                    meaning=data.meaning,
+                    pattern=data.pattern
+                ), True
             
-            data = json.loads(json_str)
+            data = orjson.loads(json_str) if ORJSON_AVAILABLE else json.loads(json_str)
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
             
             # Set defaults
             data.setdefault("shloka", "")
@@ -153,20 +292,18 @@ The hero's prowess shines in battle."""
             data.setdefault("meaning", "")
             data.setdefault("pattern", "")
             
-            return data
+            # LLM output is untrusted - validated once, here, before it is cached and
+            # served to later requests as-is
+            return ShlokaGenerateResponse.model_validate(data), True
             
-        except Exception as e:
+        except _PARSE_ERRORS as e:
             logger.error(f"Failed to parse LLM response: {str(e)}")
-            return {
-                "shloka": "Error generating shloka",
-                "meter": "Unknown",
-                "meaning": "Unable to generate",
-                "pattern": ""
-            }
+            return _FALLBACK_SHLOKA, False
 
 
 # Singleton instance
 _shloka_controller: ShlokaController = None
+_shloka_controller_lock = threading.Lock()
 
 
 def get_shloka_controller() -> ShlokaController:
@@ -174,6 +311,8 @@ def get_shloka_controller() -> ShlokaController:
     global _shloka_controller
     
     if _shloka_controller is None:
-        _shloka_controller = ShlokaController()
+        with _shloka_controller_lock:
+            if _shloka_controller is None:
+                _shloka_controller = ShlokaController()
     
     return _shloka_controller
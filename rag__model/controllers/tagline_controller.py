@@ -2,34 +2,102 @@
 Tagline Controller - Business logic for Sanskrit branding taglines
 """
 
+import asyncio
 import logging
 import json
-from typing import Dict, Any, List
+import re
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
 
 from models import TaglineGenerateRequest, TaglineGenerateResponse, TaglineVariant
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
+from services.response_cache import RedisResponseCache
+from services.semantic_cache import SemanticCache
 from config import get_settings
+from utils.cache import SingleFlight, hash_key
+from utils.helpers import load_prompt
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Body of the first ``` / ```json fenced block in an LLM response
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL | re.IGNORECASE)
 
-class TaglineController:
-    """Controller for Sanskrit tagline generation"""
-    
-    def __init__(self):
-        self.llm_client = get_llm_client()
-        self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
+if MSGSPEC_AVAILABLE:
+    class _TaglineVariantOut(msgspec.Struct):
+        """One tagline variant as emitted by the LLM"""
+        tagline: str
+        translation: str
+        context: str
     
-    def _load_system_prompt(self) -> str:
-        """Load tagline system prompt"""
-        try:
-            with open("prompts/tagline_system.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            return """You are an expert in Sanskrit language and corporate branding.
+    class _TaglineLLMOut(msgspec.Struct):
+        """Tagline JSON as emitted by the LLM, decoded and type-checked in one pass"""
+        tagline: str = "ज्ञानं शक्तिः"
+        english_translation: str = "Knowledge is power"
+        meaning: str = ""
+        variants: List[_TaglineVariantOut] = []
+
+# Output schema for providers with structured outputs (strict mode: every field required,
+# no extra keys) - the response is then bare JSON with no fence to strip
+_TAGLINE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "tagline": {"type": "string"},
+        "english_translation": {"type": "string"},
+        "meaning": {"type": "string"},
+        "variants": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "tagline": {"type": "string"},
+                    "translation": {"type": "string"},
+                    "context": {"type": "string"}
+                },
+                "required": ["tagline", "translation", "context"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["tagline", "english_translation", "meaning", "variants"],
+    "additionalProperties": False
+}
+
+
+# Fallback tagline when the LLM output is unusable (our own constants - built once,
+# unvalidated, never cached)
+_FALLBACK_TAGLINE = TaglineGenerateResponse.model_construct(
+    tagline="सत्यं विजयते",
+    english_translation="Truth prevails",
+    meaning="Classic Sanskrit phrase",
+    variants=[]
+)
+
+# Generation budget sized to the schema (primary tagline + 3 variants in densely tokenized
+# Devanagari, translations, contexts, meaning) instead of the global llm_max_tokens default
+_MAX_TOKENS = 400
+
+# Malformed or mistyped LLM JSON (pydantic's ValidationError and both JSON decoders'
+# errors are ValueErrors)
+_PARSE_ERRORS: Tuple[type, ...] = (ValueError, msgspec.DecodeError) if MSGSPEC_AVAILABLE else (ValueError,)
+
+
+# Used when prompts/tagline_system.txt is missing
+_DEFAULT_SYSTEM_PROMPT = """You are an expert in Sanskrit language and corporate branding.
 Your task is to create impactful Sanskrit taglines for modern businesses.
 
 Create taglines that:
@@ -38,75 +106,31 @@ Create taglines that:
 - Are memorable and pronounceable
 - Work well in branding context
 - Convey professionalism
+- Are concise (3-7 words ideal)
 
 Return response as JSON with:
 - tagline: Primary Sanskrit tagline
 - english_translation: Direct translation
 - meaning: Detailed explanation
-- variants: Array of alternative versions"""
-    
-    async def generate_tagline(self, request: TaglineGenerateRequest) -> TaglineGenerateResponse:
-        """
-        Generate Sanskrit tagline for branding
-        
-        Args:
-            request: Tagline generation request
-            
-        Returns:
-            TaglineGenerateResponse with tagline and variants
-        """
-        try:
-            logger.info(f"🎯 Generating tagline for {request.company_name}")
-            
-            # Get branding vocabulary context
-            context = await self._get_branding_context(request)
-            
-            # Build user prompt
-            user_prompt = f"""Create a Sanskrit tagline for this company:
+- variants: Array of 3 alternative versions, each with tagline, translation, context"""
 
-Company Name: {request.company_name}
-Industry: {request.industry}
-Vision: {request.vision}
-Core Values: {', '.join(request.values)}
-Desired Tone: {request.tone}
 
-Branding vocabulary context:
-{context}
+# User prompt for generate_tagline (filled with str.format - compiled once). Only the
+# per-request brief: requirements and output format live in the system prompt
+_USER_PROMPT_TEMPLATE = """Create a Sanskrit tagline for this company:
 
-Requirements:
-1. Create 1 primary tagline and 3 alternative variants
-2. Keep it concise (3-7 words ideal)
-3. Ensure proper Sanskrit grammar
-4. Make it memorable and impactful
-5. Align with company values and vision
-6. Provide translations and context for each
+Company Name: {company_name}
+Industry: {industry}
+Vision: {vision}
+Core Values: {values}
+Desired Tone: {tone}
 
-Return as JSON with fields: tagline, english_translation, meaning, variants (array of objects with tagline, translation, context)"""
-            
-            # Get LLM response
-            response_text = await self.llm_client.structured_completion(
-                system_prompt=self.system_prompt,
-                user_prompt=user_prompt,
-                temperature=0.85  # High creativity for branding
-            )
-            
-            # Parse response
-            result = self._parse_llm_response(response_text)
-            
-            logger.info(f"✅ Generated tagline: {result['tagline']}")
-            
-            return TaglineGenerateResponse(**result)
-            
-        except Exception as e:
-            logger.error(f"Tagline generation failed: {str(e)}")
-            raise
-    
-    async def _get_branding_context(self, request: TaglineGenerateRequest) -> str:
-        """Get relevant branding vocabulary"""
-        try:
-            # Industry-specific Sanskrit terms
-            industry_vocab = {
-                "technology": """
+Branding vocabulary context:
+{context}"""
+
+# Industry-specific Sanskrit terms (built once - read-only)
+_INDUSTRY_VOCAB: Mapping[str, str] = MappingProxyType({
+    "technology": """
 Sanskrit terms for technology/innovation:
 - प्रौद्योगिकी (praudyogikī) - technology
 - नवीनता (navīnatā) - innovation
@@ -114,7 +138,7 @@ Sanskrit terms for technology/innovation:
 - विकासः (vikāsaḥ) - development
 - सृजनम् (sṛjanam) - creation
 """,
-                "education": """
+    "education": """
 Sanskrit terms for education:
 - विद्या (vidyā) - knowledge/education
 - शिक्षा (śikṣā) - teaching
@@ -122,7 +146,7 @@ Sanskrit terms for education:
 - गुरु (guru) - teacher
 - प्रज्ञा (prajñā) - intelligence
 """,
-                "healthcare": """
+    "healthcare": """
 Sanskrit terms for healthcare:
 - आरोग्यम् (ārogyam) - health
 - चिकित्सा (cikitsā) - treatment
@@ -130,16 +154,10 @@ Sanskrit terms for healthcare:
 - सेवा (sevā) - service
 - कल्याणम् (kalyāṇam) - well-being
 """
-            }
-            
-            # Get relevant vocabulary or use general
-            industry_key = request.industry.lower()
-            for key in industry_vocab:
-                if key in industry_key:
-                    return industry_vocab[key]
-            
-            # Default general business terms
-            return """
+})
+
+# Default general business terms
+_GENERAL_VOCAB = """
 General Sanskrit business terms:
 - उत्कर्षः (utkarṣaḥ) - excellence
 - नेतृत्वम् (netṛtvam) - leadership
@@ -147,30 +165,174 @@ General Sanskrit business terms:
 - सत्यम् (satyam) - truth
 - धर्मः (dharmaḥ) - righteousness/duty
 """
+
+
+class TaglineController:
+    """Controller for Sanskrit tagline generation"""
+    
+    def __init__(self):
+        self.llm_client = get_llm_client()
+        self.rag_client = get_rag_client()
+        self.system_prompt = load_prompt("prompts/tagline_system.txt", _DEFAULT_SYSTEM_PROMPT)
+        self.response_cache = SemanticCache(
+            maxsize=1024,
+            shared=RedisResponseCache("tagline"),
+            model=TaglineGenerateResponse
+        )
+        self._inflight = SingleFlight()
+    
+    async def generate_tagline(self, request: TaglineGenerateRequest) -> TaglineGenerateResponse:
+        """
+        Generate Sanskrit tagline for branding
+        
+        Args:
+            request: Tagline generation request
             
-        except Exception as e:
-            logger.warning(f"Failed to get branding context: {str(e)}")
-            return ""
+        Returns:
+            TaglineGenerateResponse with tagline and variants
+        """
+        logger.info(f"🎯 Generating tagline for {request.company_name}")
+        
+        # Repeated (or reworded) requests return the earlier taglines without an LLM round-trip
+        cache_query, cache_scope = self._cache_query(request)
+        cached = await self.response_cache.get(cache_query, scope=cache_scope)
+        if cached is not None:
+            return cached
+        
+        # Identical requests already being generated share that one LLM call
+        return await self._inflight.run(
+            hash_key(cache_scope, " ".join(cache_query.split()).lower()),
+            lambda: self._generate(request, cache_query, cache_scope)
+        )
     
-    def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse LLM response to extract structured data"""
+    async def _generate(
+        self,
+        request: TaglineGenerateRequest,
+        cache_query: str,
+        cache_scope: str
+    ) -> TaglineGenerateResponse:
+        """Cache-miss path: prompt the LLM, parse, validate and cache the result"""
+        # Get branding vocabulary context - here rather than in the caller, so requests joining an
+        # in-flight generation don't fetch context they never use
+        context = self._get_branding_context(request)
+        
+        # Build user prompt
+        user_prompt = _USER_PROMPT_TEMPLATE.format(
+            company_name=request.company_name,
+            industry=request.industry,
+            vision=request.vision,
+            values=', '.join(request.values),
+            tone=request.tone,
+            context=context
+        )
+        
+        # Get LLM response
+        response_text = await self.llm_client.fenced_json_completion(
+            system_prompt=self.system_prompt,
+            user_prompt=user_prompt,
+            response_schema=_TAGLINE_SCHEMA,
+            temperature=0.85,  # High creativity for branding
+            top_p=0.9,
+            max_tokens=_MAX_TOKENS
+        )
+        
+        # Parse response
+        response, parsed = self._parse_llm_response(response_text)
+        
+        logger.info(f"✅ Generated tagline: {response.tagline}")
+        
+        if parsed:
+            await self.response_cache.put(cache_query, response, scope=cache_scope)
+        
+        return response
+    
+    async def generate_tagline_batch(
+        self,
+        requests: List[TaglineGenerateRequest]
+    ) -> List[Optional[TaglineGenerateResponse]]:
+        """
+        Generate several taglines concurrently
+        
+        Requests fan out together; the LLM client's concurrency limit keeps the burst
+        within provider rate limits. A failed item doesn't fail the batch.
+        
+        Args:
+            requests: Tagline generation requests
+            
+        Returns:
+            Responses in request order (None for items that failed)
+        """
+        logger.info(f"📦 Generating {len(requests)} taglines concurrently")
+        
+        results = await asyncio.gather(
+            *(self.generate_tagline(request) for request in requests),
+            return_exceptions=True
+        )
+        
+        failed = sum(isinstance(r, BaseException) for r in results)
+        if failed:
+            logger.warning(f"⚠️ {failed}/{len(requests)} taglines in batch failed")
+        
+        return [None if isinstance(r, BaseException) else r for r in results]
+    
+    @staticmethod
+    def _cache_query(request: TaglineGenerateRequest) -> Tuple[str, str]:
+        """
+        Split a request into its free-text description (matched semantically) and a scope
+        that must match exactly - another company's taglines are never reused
+        """
+        values = ", ".join(sorted(" ".join(v.split()).lower() for v in request.values))
+        query = f"{request.industry}. {request.vision}. Values: {values}"
+        scope = hash_key(
+            " ".join(request.company_name.split()).lower(),
+            request.tone
+        ).hex()
+        return query, scope
+    
+    def _get_branding_context(self, request: TaglineGenerateRequest) -> str:
+        """Get relevant branding vocabulary"""
+        # Get relevant vocabulary (exact industry name first, then substring) or use general
+        industry_key = request.industry.lower()
+        vocab = _INDUSTRY_VOCAB.get(industry_key)
+        if vocab is not None:
+            return vocab
+        for key, vocab in _INDUSTRY_VOCAB.items():
+            if key in industry_key:
+                return vocab
+        
+        return _GENERAL_VOCAB
+    
+    def _parse_llm_response(self, response_text: str) -> Tuple[TaglineGenerateResponse, bool]:
+        """Parse LLM response into a response model (response, parsed_successfully)"""
         try:
-            # Extract JSON
-            if "```json" in response_text:
-                json_str = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_str = response_text.split("```")[1].split("```")[0].strip()
+            # Schema-guided responses are bare JSON; otherwise extract the fenced block (if
+            # present, else use the whole response) in one regex pass
+            if response_text.lstrip().startswith("{"):
+                json_str = response_text
             else:
-                json_str = response_text.strip()
+                fence = _FENCE_RE.search(response_text)
+                json_str = fence.group(1) if fence else response_text
             
-            data = json.loads(json_str)
+            if MSGSPEC_AVAILABLE:
+                # msgspec has already type-checked every field - no second validation pass
+                data = msgspec.json.decode(json_str, type=_TaglineLLMOut)
+                return TaglineGenerateResponse.model_construct(
+                    tagline=data.tagline,
+                    english_translation=data.english_translation,
+                    meaning=data.meaning,
+                    variants=[
+                        TaglineVariant(
+                            tagline=v.tagline,
+                            translation=v.translation,
+                            context=v.context
+                        )
+                        for v in data.variants
+                    ]
+                ), True
             
-            # Ensure variants is list of TaglineVariant
-            if "variants" in data and isinstance(data["variants"], list):
-                data["variants"] = [
-                    TaglineVariant(**v) if isinstance(v, dict) else v
-                    for v in data["variants"]
-                ]
+            data = orjson.loads(json_str) if ORJSON_AVAILABLE else json.loads(json_str)
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
             
             # Set defaults
             data.setdefault("tagline", "ज्ञानं शक्तिः")
@@ -178,20 +340,18 @@ General Sanskrit business terms:
             data.setdefault("meaning", "")
             data.setdefault("variants", [])
             
-            return data
+            # LLM output is untrusted - validated once, here, before it is cached and
+            # served to later requests as-is
+            return TaglineGenerateResponse.model_validate(data), True
             
-        except Exception as e:
+        except _PARSE_ERRORS as e:
             logger.error(f"Failed to parse LLM response: {str(e)}")
-            return {
-                "tagline": "सत्यं विजयते",
-                "english_translation": "Truth prevails",
-                "meaning": "Classic Sanskrit phrase",
-                "variants": []
-            }
+            return _FALLBACK_TAGLINE, False
 
 
 # Singleton instance
 _tagline_controller: TaglineController = None
+_tagline_controller_lock = threading.Lock()
 
 
 def get_tagline_controller() -> TaglineController:
@@ -199,6 +359,8 @@ def get_tagline_controller() -> TaglineController:
     global _tagline_controller
     
     if _tagline_controller is None:
-        _tagline_controller = TaglineController()
+        with _tagline_controller_lock:
+            if _tagline_controller is None:
+                _tagline_controller = TaglineController()
     
     return _tagline_controller
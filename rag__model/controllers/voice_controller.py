@@ -2,26 +2,115 @@
 Voice Karaoke Controller - Sanskrit pronunciation analysis
 """
 
+import asyncio
 import logging
 import json
 import os
-from typing import Dict, Any, Optional, List
+import threading
+from typing import AsyncIterator, Dict, Any, Iterator, Optional, List, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from models import (
     VoiceAnalyzeRequest, 
     VoiceAnalyzeResponse,
-    PronunciationError,
     AccuracyMetrics,
     IdentifiedShloka
 )
 from services.llm_client import get_llm_client
 from services.rag_client import get_rag_client
+from services.response_cache import RedisResponseCache
+from services.semantic_cache import SemanticCache
 from config import get_settings
+from utils.cache import hash_key
+from utils.helpers import extract_json, load_prompt
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Local Whisper (CTranslate2) - preferred over the OpenAI Whisper API when installed
+try:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+_TRANSCRIPTION_PROMPT = "Sanskrit shloka in Devanagari script"
+
+# A RAG match this strong on the first transcribed segment (typically the first line of
+# the verse) identifies the shloka without searching again on the full transcript
+_EARLY_MATCH_SCORE = 0.75
+
+# Structured-output schema for pronunciation analyses (OpenAI strict mode: every field
+# required, no extra keys) - the model can only return JSON with the fields the
+# response is built from
+_ANALYSIS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "overall_accuracy": {"type": "number"},
+        "word_accuracy": {"type": "number"},
+        "syllable_accuracy": {"type": "number"},
+        "meter_accuracy": {"type": "number"},
+        "pronunciation_clarity": {"type": "number"},
+        "errors": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "position": {"type": "integer"},
+                    "expected": {"type": "string"},
+                    "actual": {"type": "string"},
+                    "error_type": {"type": "string", "enum": ["syllable_mismatch", "word_wrong", "meter_deviation"]},
+                    "severity": {"type": "string", "enum": ["minor", "moderate", "major"]},
+                    "note": {"type": "string"}
+                },
+                "required": ["position", "expected", "actual", "error_type", "severity", "note"],
+                "additionalProperties": False
+            }
+        },
+        "suggestions": {"type": "string"},
+        "overall_feedback": {"type": "string"}
+    },
+    "required": [
+        "overall_accuracy", "word_accuracy", "syllable_accuracy", "meter_accuracy",
+        "pronunciation_clarity", "errors", "suggestions", "overall_feedback"
+    ],
+    "additionalProperties": False
+}
+
+_ANALYSIS_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {"name": "pronunciation_analysis", "schema": _ANALYSIS_SCHEMA, "strict": True}
+}
+
+# AccuracyMetrics fields, all scores in [0, 1]
+_SCORE_FIELDS = (
+    "overall_accuracy", "word_accuracy", "syllable_accuracy", "meter_accuracy", "pronunciation_clarity"
+)
+
+
+def _normalize_score(value: Any) -> float:
+    """
+    LLM score as a fraction in [0, 1]
+    
+    Answers on a percentage scale (1 < score <= 100) are rescaled; anything else out of
+    range raises ValueError, so the analysis is treated as unparsed rather than reported.
+    """
+    score = float(value)
+    if 1.0 < score <= 100.0:
+        score /= 100.0
+    if not 0.0 <= score <= 1.0:
+        raise ValueError(f"Score out of range: {value!r}")
+    return score
+
+# Used when prompts/voice_system.txt is missing
+_DEFAULT_SYSTEM_PROMPT = """You are an expert in Sanskrit pronunciation and prosody. Analyze transcribed Sanskrit text against reference shlokas to identify pronunciation errors, syllable mismatches, and meter deviations. Provide detailed, constructive feedback."""
+
 
 class VoiceController:
     """Controller for voice karaoke analysis operations"""
@@ -29,20 +118,35 @@ class VoiceController:
     def __init__(self):
         self.llm_client = get_llm_client()
         self.rag_client = get_rag_client()
-        self.system_prompt = self._load_system_prompt()
+        self.system_prompt = load_prompt("prompts/voice_system.txt", _DEFAULT_SYSTEM_PROMPT)
+        self._whisper = None  # local model, loaded on first transcription
+        self._whisper_lock = threading.Lock()
+        # Repeat / near-identical recitations reuse the earlier LLM analysis and context
+        self.analysis_cache = SemanticCache(threshold=settings.voice_cache_threshold)
+        # AI context for well-known verses is also shared across workers / restarts (Redis)
+        self.context_cache = SemanticCache(
+            threshold=settings.voice_cache_threshold,
+            shared=RedisResponseCache("voice-context"),
+            model=IdentifiedShloka
+        )
     
-    def _load_system_prompt(self) -> str:
-        """Load voice analysis system prompt"""
+    async def warmup(self) -> None:
+        """
+        Run one search against the shlokas collection so Qdrant has its index in memory
+        (and the query path is exercised) before the first recitation is identified
+        """
         try:
-            with open("prompts/voice_system.txt", 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            # Fallback system prompt
-            return """You are an expert in Sanskrit pronunciation and prosody. Analyze transcribed Sanskrit text against reference shlokas to identify pronunciation errors, syllable mismatches, and meter deviations. Provide detailed, constructive feedback."""
+            await self._search_shlokas("warmup", limit=1)
+            logger.info(f"✅ '{settings.shlokas_collection}' collection warmed")
+        except Exception as e:
+            logger.warning(f"⚠️ Shloka collection warm-up skipped: {str(e)}")
     
     async def transcribe_audio(self, audio_file_path: str) -> str:
         """
-        Transcribe audio file to Sanskrit text using OpenAI Whisper
+        Transcribe audio file to Sanskrit text using Whisper
+        
+        Runs faster-whisper locally when it is installed and enabled (WHISPER_LOCAL),
+        otherwise calls the OpenAI Whisper API.
         
         Args:
             audio_file_path: Path to audio file (wav, mp3, etc.)
@@ -50,77 +154,163 @@ class VoiceController:
         Returns:
             str: Transcribed Sanskrit text
         """
+        transcribed_text = "".join([segment async for segment in self.stream_transcribe(audio_file_path)]).strip()
+        logger.info("✅ Transcribed: %.100s...", transcribed_text)
+        
+        return transcribed_text
+    
+    async def stream_transcribe(self, audio_file_path: str) -> AsyncIterator[str]:
+        """
+        Transcribe audio, yielding transcript segments as soon as they are decoded
+        
+        Local faster-whisper decodes segment by segment; the OpenAI API returns the
+        whole transcript as a single segment.
+        
+        Args:
+            audio_file_path: Path to audio file (wav, mp3, etc.)
+            
+        Yields:
+            str: Transcript segments, in order
+        """
         try:
-            logger.info(f"🎤 Transcribing audio file: {audio_file_path}")
+            logger.info("🎤 Transcribing audio file: %s", audio_file_path)
             
-            # Use OpenAI Whisper API for transcription
-            with open(audio_file_path, 'rb') as audio_file:
-                # Call OpenAI Whisper API
-                if not self.llm_client.openai_client:
-                    raise ValueError("OpenAI client not initialized. Check API key configuration.")
-                
-                transcription = await self.llm_client.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    # Note: Whisper doesn't support Sanskrit directly, so we omit language to auto-detect
-                    # or use "hi" for Hindi which handles Devanagari script well
-                    response_format="text",
-                    prompt="Sanskrit shloka in Devanagari script"  # Hint for better transcription
-                )
+            if not (FASTER_WHISPER_AVAILABLE and settings.whisper_local):
+                yield await self._transcribe_openai(audio_file_path)
+                return
+            
+            # CTranslate2 decoding is synchronous - a worker thread consumes the segment
+            # generator and hands each segment to the event loop
+            loop = asyncio.get_running_loop()
+            queue: "asyncio.Queue[Any]" = asyncio.Queue()
             
-            transcribed_text = transcription if isinstance(transcription, str) else transcription.text
-            logger.info(f"✅ Transcribed: {transcribed_text[:100]}...")
+            def produce() -> None:
+                try:
+                    for segment in self._transcribe_local(audio_file_path):
+                        loop.call_soon_threadsafe(queue.put_nowait, segment.text)
+                except BaseException as e:
+                    loop.call_soon_threadsafe(queue.put_nowait, e)
+                else:
+                    loop.call_soon_threadsafe(queue.put_nowait, None)
             
-            return transcribed_text
+            producer = asyncio.create_task(asyncio.to_thread(produce))
+            try:
+                while (item := await queue.get()) is not None:
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                await producer
             
         except Exception as e:
             logger.error(f"Transcription failed: {str(e)}")
             raise
     
-    async def identify_shloka(self, transcribed_text: str, limit: int = 3) -> Optional[IdentifiedShloka]:
+    def _get_whisper(self) -> "BatchedInferencePipeline":
+        """
+        Local Whisper pipeline (loaded once, on first use)
+        
+        The pipeline decodes a recording's speech chunks as one batch; `num_workers`
+        lets transcriptions from concurrent requests run in parallel on the model.
+        """
+        if self._whisper is None:
+            with self._whisper_lock:
+                if self._whisper is None:
+                    logger.info(f"📥 Loading Whisper model: {settings.whisper_model} ({settings.whisper_device}, {settings.whisper_compute_type})")
+                    self._whisper = BatchedInferencePipeline(
+                        model=WhisperModel(
+                            settings.whisper_model,
+                            device=settings.whisper_device,
+                            compute_type=settings.whisper_compute_type,
+                            num_workers=settings.whisper_workers
+                        )
+                    )
+        return self._whisper
+    
+    def _transcribe_local(self, audio_file_path: str) -> Iterator[Any]:
+        """Transcribe with local faster-whisper (blocking, segments decoded lazily)"""
+        segments, _ = self._get_whisper().transcribe(
+            audio_file_path,
+            language="hi",  # Whisper has weak Sanskrit support; Hindi handles Devanagari well
+            beam_size=1,
+            vad_filter=True,  # skip silence and split speech into chunks to batch
+            batch_size=settings.whisper_batch_size,
+            initial_prompt=_TRANSCRIPTION_PROMPT
+        )
+        # segments is a generator - decoding happens while it is consumed
+        return segments
+    
+    async def _transcribe_openai(self, audio_file_path: str) -> str:
+        """Transcribe with the OpenAI Whisper API"""
+        # Call OpenAI Whisper API
+        if not self.llm_client.openai_client:
+            raise ValueError("OpenAI client not initialized. Check API key configuration.")
+        
+        # Read the recording in a worker thread - a blocking read would stall every request
+        audio_path = Path(audio_file_path)
+        audio_bytes = await asyncio.to_thread(audio_path.read_bytes)
+        
+        async with self.llm_client.openai_semaphore:
+            transcription = await self.llm_client.openai_client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(audio_path.name, audio_bytes),  # name tells the API the audio format
+                # Note: Whisper doesn't support Sanskrit directly, so we omit language to auto-detect
+                # or use "hi" for Hindi which handles Devanagari script well
+                response_format="text",
+                prompt=_TRANSCRIPTION_PROMPT  # Hint for better transcription
+            )
+        
+        return transcription if isinstance(transcription, str) else transcription.text
+    
+    async def identify_shloka(
+        self,
+        transcribed_text: str,
+        limit: int = 3,
+        search_results: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[IdentifiedShloka]:
         """
         Identify which shloka the user attempted to recite using RAG search
         
         Args:
             transcribed_text: Transcribed Sanskrit text
             limit: Number of top matches to consider
+            search_results: Results of a RAG search already run for this recitation
+                (skips the search)
             
         Returns:
             IdentifiedShloka or None if no good match found
         """
         try:
-            logger.info(f"🔍 Searching for matching shloka in '{settings.shlokas_collection}' collection...")
-            logger.info(f"   Query text: {transcribed_text[:100]}...")
-            
-            # Search in shlokas collection
-            try:
-                search_results = await self.rag_client.search_documents(
-                    collection=settings.shlokas_collection,  # Fixed: was collection_name
-                    query_text=transcribed_text,
-                    limit=limit
-                )
-                logger.info(f"   ✅ RAG search completed successfully")
-            except Exception as search_error:
-                logger.error(f"   ❌ RAG search failed: {str(search_error)}", exc_info=True)
-                logger.warning("   Falling back to AI context due to search error")
-                return await self._get_ai_shloka_context(transcribed_text)
+            if search_results is None:
+                logger.info("🔍 Searching for matching shloka in '%s' collection...", settings.shlokas_collection)
+                logger.info("   Query text: %.100s...", transcribed_text)
+                
+                # Search in shlokas collection
+                try:
+                    search_results = await self._search_shlokas(transcribed_text, limit)
+                    logger.info("   ✅ RAG search completed successfully")
+                except Exception as search_error:
+                    logger.error(f"   ❌ RAG search failed: {str(search_error)}", exc_info=True)
+                    logger.warning("   Falling back to AI context due to search error")
+                    return await self._get_ai_shloka_context(transcribed_text)
             
-            logger.info(f"   📊 RAG returned {len(search_results) if search_results else 0} results")
+            logger.info("   📊 RAG returned %d results", len(search_results) if search_results else 0)
             
             if not search_results or len(search_results) == 0:
                 logger.warning("⚠️ No matching shlokas found in knowledge base - using AI to provide context")
                 return await self._get_ai_shloka_context(transcribed_text)
             
             # Get best match and log all results for debugging
-            logger.info(f"📊 RAG Search Results (top {len(search_results)}):")
-            for idx, result in enumerate(search_results):
-                logger.info(f"  {idx+1}. Score: {result['score']:.3f} | Content: {result['content'][:80]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📊 RAG Search Results (top %d):", len(search_results))
+                for idx, result in enumerate(search_results):
+                    logger.debug("  %d. Score: %.3f | Content: %.80s...", idx + 1, result['score'], result['content'])
             
             best_match = search_results[0]
             
             # Lower threshold to 0.3 to be more lenient with pronunciation variations
             if best_match['score'] < 0.3:
-                logger.warning(f"Best match score too low: {best_match['score']:.3f} - using AI fallback")
+                logger.warning("Best match score too low: %.3f - using AI fallback", best_match['score'])
                 return await self._get_ai_shloka_context(transcribed_text)
             
             # Extract metadata
@@ -138,9 +328,9 @@ class VoiceController:
                 chunk_id=metadata.get('chunk_id')
             )
             
-            logger.info(f"✅ Identified shloka: {identified.source} (confidence: {identified.confidence:.2f})")
+            logger.info("✅ Identified shloka: %s (confidence: %.2f)", identified.source, identified.confidence)
             if identified.page_number:
-                logger.info(f"   📄 Found on page {identified.page_number} of {identified.source_file}")
+                logger.info("   📄 Found on page %s of %s", identified.page_number, identified.source_file)
             
             return identified
             
@@ -163,6 +353,69 @@ class VoiceController:
                     chunk_id=None
                 )
     
+    async def _search_shlokas(self, query_text: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """RAG search of the shlokas collection (batched with concurrent recitations)"""
+        return await self.rag_client.search_batched(
+            collection=settings.shlokas_collection,
+            query_text=query_text,
+            limit=limit
+        )
+    
+    async def _transcribe_with_early_search(
+        self,
+        audio_file_path: str
+    ) -> Tuple[str, Optional[str], "Optional[asyncio.Task[List[Dict[str, Any]]]]"]:
+        """
+        Transcribe a recitation, starting a RAG search on the first transcript segment
+        
+        Args:
+            audio_file_path: Path to user's audio recording
+            
+        Returns:
+            (transcribed text, text the early search ran on, early search task) - the
+            last two are None for an empty transcript
+        """
+        segments: List[str] = []
+        early_query = None
+        early_search = None
+        try:
+            async for segment in self.stream_transcribe(audio_file_path):
+                segments.append(segment)
+                if early_search is None and segment.strip():
+                    early_query = "".join(segments).strip()
+                    early_search = asyncio.create_task(self._search_shlokas(early_query))
+        except BaseException:
+            if early_search is not None:
+                early_search.cancel()
+            raise
+        
+        transcribed_text = "".join(segments).strip()
+        logger.info("✅ Transcribed: %.100s...", transcribed_text)
+        
+        return transcribed_text, early_query, early_search
+    
+    async def _identify_with_early_search(
+        self,
+        transcribed_text: str,
+        early_query: Optional[str],
+        early_search: "Optional[asyncio.Task[List[Dict[str, Any]]]]"
+    ) -> Optional[IdentifiedShloka]:
+        """
+        identify_shloka, reusing the early search when it already covers the whole
+        transcript or matched strongly enough to identify the verse
+        """
+        search_results = None
+        if early_search is not None:
+            try:
+                results = await early_search
+            except Exception as e:
+                logger.warning(f"⚠️ Early RAG search failed: {str(e)}")
+            else:
+                if early_query == transcribed_text or (results and results[0]['score'] >= _EARLY_MATCH_SCORE):
+                    search_results = results
+        
+        return await self.identify_shloka(transcribed_text, search_results=search_results)
+    
     async def _get_ai_shloka_context(self, transcribed_text: str) -> Optional[IdentifiedShloka]:
         """
         Use AI to provide context about the shloka when RAG search fails
@@ -173,6 +426,10 @@ class VoiceController:
         Returns:
             IdentifiedShloka with AI-generated context
         """
+        cached = await self.context_cache.get(transcribed_text)
+        if cached is not None:
+            return cached
+        
         try:
             logger.info("🤖 Using AI to identify shloka context...")
             
@@ -209,21 +466,7 @@ Return ONLY valid JSON:
             )
             
             # Parse JSON response
-            import json
-            import re
-            
-            json_str = response_text.strip()
-            if "```json" in json_str:
-                json_str = json_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_str:
-                json_str = json_str.split("```")[1].split("```")[0].strip()
-            
-            if not json_str.startswith("{"):
-                json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-            
-            data = json.loads(json_str)
+            data = extract_json(response_text)
             
             identified = IdentifiedShloka(
                 text=data.get('text', transcribed_text),
@@ -236,7 +479,8 @@ Return ONLY valid JSON:
                 chunk_id=None
             )
             
-            logger.info(f"✅ AI identified context: {identified.source}")
+            logger.info("✅ AI identified context: %s", identified.source)
+            await self.context_cache.put(transcribed_text, identified)
             return identified
             
         except Exception as e:
@@ -271,7 +515,7 @@ Return ONLY valid JSON:
             Dict with analysis results
         """
         try:
-            logger.info(f"📊 Analyzing pronunciation...")
+            logger.info("📊 Analyzing pronunciation...")
             
             # Determine reference text
             reference_text = reference_shloka
@@ -282,6 +526,13 @@ Return ONLY valid JSON:
                 # No reference available - provide general feedback
                 return await self._analyze_without_reference(transcribed_text)
             
+            # The analysis depends on the exact reference, so only transcripts compared
+            # against the same reference can share a cached analysis
+            cache_scope = hash_key(reference_text).hex()
+            cached = await self.analysis_cache.get(transcribed_text, scope=cache_scope)
+            if cached is not None:
+                return cached
+            
             # Create detailed analysis prompt
             analysis_prompt = f"""Analyze this Sanskrit pronunciation attempt:
 
@@ -333,16 +584,22 @@ Return ONLY valid JSON with this structure:
                 {"role": "user", "content": analysis_prompt}
             ]
             
+            # Schema-constrained scoring doesn't need the flagship model
             response_text = await self.llm_client.chat_completion(
                 messages=messages,
                 provider="openai",
+                model=settings.llm.openai_analysis_model,
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=2000,
+                response_format=_ANALYSIS_RESPONSE_FORMAT
             )
             
             # Parse JSON response
-            analysis = self._parse_analysis_response(response_text)
-            logger.info(f"✅ Analysis complete - Overall accuracy: {analysis['overall_accuracy']:.2f}")
+            analysis, parsed = self._parse_analysis_response(response_text)
+            logger.info("✅ Analysis complete - Overall accuracy: %.2f", analysis['overall_accuracy'])
+            
+            if parsed:
+                await self.analysis_cache.put(transcribed_text, analysis, scope=cache_scope)
             
             return analysis
             
@@ -354,6 +611,10 @@ Return ONLY valid JSON with this structure:
         """Analyze pronunciation without reference shloka"""
         logger.info("📊 Analyzing without reference - providing general feedback")
         
+        cached = await self.analysis_cache.get(transcribed_text)
+        if cached is not None:
+            return cached
+        
         analysis_prompt = f"""Analyze this Sanskrit recitation (no reference available):
 
 TEXT:
@@ -375,12 +636,17 @@ Return ONLY valid JSON with scores and feedback."""
         response_text = await self.llm_client.chat_completion(
             messages=messages,
             provider="openai",
-            temperature=0.3
+            model=settings.llm.openai_analysis_model,
+            temperature=0.3,
+            response_format=_ANALYSIS_RESPONSE_FORMAT
         )
         
         # Parse response
         try:
-            analysis = json.loads(response_text)
+            analysis = orjson.loads(response_text) if ORJSON_AVAILABLE else json.loads(response_text)
+            for field in _SCORE_FIELDS:
+                analysis[field] = _normalize_score(analysis[field])
+            await self.analysis_cache.put(transcribed_text, analysis)
         except:
             # Fallback response
             analysis = {
@@ -396,25 +662,11 @@ Return ONLY valid JSON with scores and feedback."""
         
         return analysis
     
-    def _parse_analysis_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse LLM analysis response to extract structured data"""
+    def _parse_analysis_response(self, response_text: str) -> Tuple[Dict[str, Any], bool]:
+        """Parse LLM analysis response to extract structured data (analysis, parsed_successfully)"""
         try:
-            # Clean JSON from markdown
-            json_str = response_text.strip()
-            
-            if "```json" in json_str:
-                json_str = json_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_str:
-                json_str = json_str.split("```")[1].split("```")[0].strip()
-            
-            # Find JSON object
-            if not json_str.startswith("{"):
-                import re
-                json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-            
-            analysis = json.loads(json_str)
+            # JSON object from the response (fenced or bare)
+            analysis = extract_json(response_text)
             
             # Ensure all required fields exist with defaults
             analysis.setdefault("overall_accuracy", 0.75)
@@ -422,11 +674,15 @@ Return ONLY valid JSON with scores and feedback."""
             analysis.setdefault("syllable_accuracy", 0.75)
             analysis.setdefault("meter_accuracy", 0.75)
             analysis.setdefault("pronunciation_clarity", 0.75)
+            
+            # One range check for all scores - a wrong scale fails the parse (not cached)
+            for field in _SCORE_FIELDS:
+                analysis[field] = _normalize_score(analysis[field])
             analysis.setdefault("errors", [])
             analysis.setdefault("suggestions", "Practice regularly to improve pronunciation.")
             analysis.setdefault("overall_feedback", "Good effort! Keep practicing.")
             
-            return analysis
+            return analysis, True
             
         except Exception as e:
             logger.warning(f"Failed to parse analysis JSON: {str(e)}")
@@ -440,7 +696,7 @@ Return ONLY valid JSON with scores and feedback."""
                 "errors": [],
                 "suggestions": "Continue practicing. Focus on clear pronunciation.",
                 "overall_feedback": "Good attempt! Keep working on your Sanskrit pronunciation."
-            }
+            }, False
     
     async def analyze_voice(
         self, 
@@ -458,18 +714,23 @@ Return ONLY valid JSON with scores and feedback."""
             VoiceAnalyzeResponse with complete analysis
         """
         try:
-            logger.info(f"🎵 Starting voice karaoke analysis...")
+            logger.info("🎵 Starting voice karaoke analysis...")
             
             # Step 1: Transcribe audio to text
-            transcribed_text = await self.transcribe_audio(audio_file_path)
-            logger.info(f"📝 Transcribed: {transcribed_text[:100]}...")
-            
-            # Step 2: Identify which shloka (if reference not provided)
+            # Step 2: Identify which shloka (if reference not provided) - retrieval starts
+            # on the first transcript segment, while the rest is still being transcribed
             identified_shloka = None
             if not request.reference_shloka:
                 logger.info("🔍 No reference provided - attempting to identify shloka...")
+                transcribed_text, early_query, early_search = await self._transcribe_with_early_search(audio_file_path)
+                identify_task = asyncio.create_task(
+                    self._identify_with_early_search(transcribed_text, early_query, early_search)
+                )
+                # The analysis cache lookup embeds the transcript - do that while
+                # retrieval runs rather than after it
+                await self.analysis_cache.prefetch(transcribed_text)
                 try:
-                    identified_shloka = await self.identify_shloka(transcribed_text)
+                    identified_shloka = await identify_task
                 except Exception as identify_error:
                     logger.error(f"❌ identify_shloka failed: {str(identify_error)}", exc_info=True)
                     # Force creation of generic context
@@ -485,7 +746,7 @@ Return ONLY valid JSON with scores and feedback."""
                     )
                 
                 if identified_shloka:
-                    logger.info(f"✅ Shloka identified: {identified_shloka.source}")
+                    logger.info("✅ Shloka identified: %s", identified_shloka.source)
                 else:
                     logger.error("❌❌ CRITICAL: identified_shloka is None even after all fallbacks!")
                     # Force non-null
@@ -500,7 +761,8 @@ Return ONLY valid JSON with scores and feedback."""
                         chunk_id=None
                     )
             else:
-                logger.info(f"📖 Using provided reference shloka")
+                transcribed_text = await self.transcribe_audio(audio_file_path)
+                logger.info("📖 Using provided reference shloka")
             
             # Step 3: Analyze pronunciation
             analysis = await self.analyze_pronunciation(
@@ -509,36 +771,23 @@ Return ONLY valid JSON with scores and feedback."""
                 identified_shloka=identified_shloka
             )
             
-            # Step 4: Build response
-            accuracy_metrics = AccuracyMetrics(
-                overall_accuracy=analysis['overall_accuracy'],
-                word_accuracy=analysis['word_accuracy'],
-                syllable_accuracy=analysis['syllable_accuracy'],
-                meter_accuracy=analysis['meter_accuracy'],
-                pronunciation_clarity=analysis['pronunciation_clarity']
+            # Step 4: Build response - scores were range-checked when the analysis was
+            # parsed, so the metrics model skips its per-field bound validators
+            accuracy_metrics = AccuracyMetrics.model_construct(
+                **{field: analysis[field] for field in _SCORE_FIELDS}
             )
             
-            errors = [
-                PronunciationError(**error) for error in analysis.get('errors', [])
-            ]
-            
-            # DEBUG: Log what we're about to return
-            logger.info(f"🔍 DEBUG - identified_shloka before response creation: {identified_shloka}")
-            logger.info(f"🔍 DEBUG - identified_shloka type: {type(identified_shloka)}")
-            if identified_shloka:
-                logger.info(f"🔍 DEBUG - identified_shloka.source: {identified_shloka.source}")
-            
+            # Error dicts are validated as PronunciationError shapes by the response model
             response = VoiceAnalyzeResponse(
                 transcribed_text=transcribed_text,
                 identified_shloka=identified_shloka,
                 accuracy_metrics=accuracy_metrics,
-                errors=errors,
+                errors=analysis.get('errors', []),
                 suggestions=analysis['suggestions'],
                 overall_feedback=analysis['overall_feedback']
             )
             
-            logger.info(f"✅ Voice analysis complete - Accuracy: {accuracy_metrics.overall_accuracy:.2%}")
-            logger.info(f"🔍 DEBUG - response.identified_shloka: {response.identified_shloka}")
+            logger.info("✅ Voice analysis complete - Accuracy: %.2f%%", accuracy_metrics.overall_accuracy * 100)
             
             return response
             
@@ -549,6 +798,7 @@ Return ONLY valid JSON with scores and feedback."""
 
 # Singleton instance
 _voice_controller: Optional[VoiceController] = None
+_voice_controller_lock = threading.Lock()
 
 
 def get_voice_controller() -> VoiceController:
@@ -556,6 +806,8 @@ def get_voice_controller() -> VoiceController:
     global _voice_controller
     
     if _voice_controller is None:
-        _voice_controller = VoiceController()
+        with _voice_controller_lock:
+            if _voice_controller is None:
+                _voice_controller = VoiceController()
     
     return _voice_controller
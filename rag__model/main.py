@@ -3,14 +3,18 @@ SvaramAI - Sanskrit AI Intelligence Suite
 Production-grade API for Sanskrit language processing
 """
 
+import hashlib
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import time
 
+from config import get_settings
+
 from routes import (
     chandas_routes,
     shloka_routes,
@@ -20,6 +24,7 @@ from routes import (
     voice_routes,
     chatbot_routes
 )
+from controllers import warmup
 
 
 
@@ -33,15 +38,18 @@ except ImportError:
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler"""
     logger.info("🚀 SvaramAI starting...")
+    await warmup()
     logger.info("✅ All modules initialized")
     yield
     logger.info("👋 SvaramAI shutting down...")
@@ -59,10 +67,11 @@ app = FastAPI(
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=[origin.strip() for origin in settings.allowed_origins.split(",")],  # ALLOWED_ORIGINS, comma-separated
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=600,  # browsers reuse a preflight for 10 minutes instead of one per upload
 )
 
 
@@ -72,21 +81,76 @@ async def log_requests(request: Request, call_next):
     """Log all incoming requests and measure response time"""
     start_time = time.time()
     
-    logger.info(f"📥 {request.method} {request.url.path}")
+    logger.info("📥 %s %s", request.method, request.url.path)
     
     response = await call_next(request)
     
     process_time = time.time() - start_time
     logger.info(
-        f"📤 {request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.3f}s"
+        "📤 %s %s - Status: %d - Time: %.3fs",
+        request.method, request.url.path, response.status_code, process_time
     )
     
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
 
+# Conditional GET middleware
+# Representation headers that don't belong on a 304 (it has no body)
+_CONTENT_HEADERS = frozenset({"content-length", "content-type", "content-encoding"})
+
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """Tag successful GET responses with an ETag and answer a matching If-None-Match with 304"""
+    response = await call_next(request)
+    
+    if (
+        request.method != "GET"
+        or response.status_code != 200
+        or response.headers.get("content-type", "").startswith("text/event-stream")
+    ):
+        return response
+    
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    # Weak: GZipMiddleware (outside this one) may send the same tag with a compressed body
+    opaque_tag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    etag = f"W/{opaque_tag}"
+    
+    headers = dict(response.headers)
+    headers["ETag"] = etag
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or opaque_tag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        # Same headers as the 200 would carry (Vary, CORS, ...), minus the body's
+        not_modified_headers = {k: v for k, v in headers.items() if k.lower() not in _CONTENT_HEADERS}
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=not_modified_headers)
+    
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+# Response compression (outermost - compresses what the middleware above produced)
+# Server-sent event routes bypass it: Starlette releases before event streams were
+# excluded from gzip hold streamed tokens in the compressor
+_UNCOMPRESSED_PATHS = frozenset({"/api/v1/chat/stream"})
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes streaming routes through uncompressed"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in _UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=512)
+
+
 # Global exception handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -173,12 +237,61 @@ app.include_router(voice_routes.router)
 app.include_router(chatbot_routes.router, tags=["Chatbot"])
 
 
+_build_openapi = app.openapi
+
+
+def openapi_with_examples():
+    """
+    OpenAPI schema with the example payloads from models_examples merged in
+    
+    Built once, on the first /docs or /openapi.json request.
+    """
+    if app.openapi_schema is None:
+        from models_examples import EXAMPLES
+        
+        schema = _build_openapi()
+        for name, component in schema.get("components", {}).get("schemas", {}).items():
+            if name in EXAMPLES:
+                component["example"] = EXAMPLES[name]
+        
+        # Bodies documented inline via openapi_extra (routes that parse the raw request)
+        for operations in schema.get("paths", {}).values():
+            for operation in operations.values():
+                body = operation.get("requestBody", {}).get("content", {}).get("application/json", {})
+                title = body.get("schema", {}).get("title")
+                if title in EXAMPLES:
+                    body["schema"]["example"] = EXAMPLES[title]
+    
+    return app.openapi_schema
+
+
+app.openapi = openapi_with_examples
+
+
 if __name__ == "__main__":
     import uvicorn
+    
+    # uvloop / httptools come with uvicorn[standard] (uvloop has no Windows build)
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    
     uvicorn.run(
         "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=settings.api_host,
+        port=settings.api_port,
+        loop=loop,
+        http=http,
+        # Reload supervises a single process; production runs WORKERS processes, each
+        # loading its own models and caches
+        reload=settings.debug,
+        workers=1 if settings.debug else settings.workers,
         log_level="info"
     )
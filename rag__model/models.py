@@ -2,41 +2,107 @@
 Pydantic models for all API endpoints
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from typing import Annotated, List, Dict, Literal, Optional, Any
+from typing_extensions import NotRequired, TypedDict  # pydantic needs typing_extensions' TypedDict before 3.12
 from enum import Enum
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+
+
+class APIModel(BaseModel):
+    """
+    Base for the API models
+    
+    Core schemas are built on first use rather than at import, so models behind routes
+    a process never serves don't pay for schema construction.
+    """
+    model_config = ConfigDict(defer_build=True)
+
+
+
+def build_model_schemas() -> None:
+    """Build the deferred core schemas of every API model (e.g. during startup warm-up)"""
+    pending = [APIModel]
+    while pending:
+        model = pending.pop()
+        pending.extend(model.__subclasses__())
+        model.model_rebuild()
+
+class CachedJSONModel(APIModel):
+    """
+    Response model that memoizes its JSON encoding
+    
+    For responses served repeatedly from a cache: the bytes are produced once, then
+    routes return them directly instead of re-validating and re-serializing the model.
+    
+    Subclasses on hot endpoints define `to_dict()`, a hand-written plain-dict form that
+    orjson encodes without pydantic-core walking the fields; without orjson (or a
+    to_dict) pydantic-core serializes the model.
+    """
+    _json: Optional[bytes] = PrivateAttr(default=None)
+    
+    def json_bytes(self) -> bytes:
+        """JSON encoding of the model (computed on first use)"""
+        if self._json is None:
+            to_dict = getattr(self, "to_dict", None)
+            if ORJSON_AVAILABLE and to_dict is not None:
+                self._json = orjson.dumps(to_dict())
+            else:
+                self._json = self.__pydantic_serializer__.to_json(self)
+        return self._json
+    
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "CachedJSONModel":
+        """Copy the model - the memoized encoding is dropped, since `update` may change fields"""
+        copy = super().model_copy(update=update, deep=deep)
+        copy._json = None
+        return copy
+    
+    @classmethod
+    def from_json_bytes(cls, data: bytes) -> "CachedJSONModel":
+        """Rebuild a model from json_bytes() output, reusing the bytes as its encoding"""
+        model = cls.model_validate_json(data)
+        model._json = data
+        return model
+
 
 # ==================== CHANDAS IDENTIFIER MODELS ====================
 
-class ChandasIdentifyRequest(BaseModel):
+class ChandasIdentifyRequest(APIModel):
     """Request model for chandas identification"""
     shloka: str = Field(..., description="Sanskrit shloka text to analyze")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्"
-            }
-        }
+    include_process: bool = Field(True, description="Include the step-by-step identification process in the response")
 
 
-class SyllableInfo(BaseModel):
+# Leaf items that responses carry by the dozen are TypedDicts: plain dicts, validated
+# as dict shapes by the containing model, with no per-item model instance
+
+class SyllableInfo(TypedDict):
     """Information about a syllable"""
     syllable: str
     type: str  # "laghu" or "guru"
     position: int
 
 
-class IdentificationStep(BaseModel):
+class IdentificationStep(TypedDict):
     """A step in the chandas identification process"""
-    step_number: int = Field(..., description="Step sequence number")
-    step_name: str = Field(..., description="Name of this step")
-    description: str = Field(..., description="What happens in this step")
-    result: str = Field(..., description="Result of this step")
+    step_number: Annotated[int, Field(description="Step sequence number")]
+    step_name: Annotated[str, Field(description="Name of this step")]
+    description: Annotated[str, Field(description="What happens in this step")]
+    result: Annotated[str, Field(description="Result of this step")]
 
 
-class ChandasIdentifyResponse(BaseModel):
+class ChandasIdentifyResponse(CachedJSONModel):
     """Response model for chandas identification"""
     chandas_name: str = Field(..., description="Identified meter name")
     syllable_breakdown: List[SyllableInfo] = Field(..., description="Syllable-wise breakdown")
@@ -45,68 +111,26 @@ class ChandasIdentifyResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score")
     identification_process: List[IdentificationStep] = Field(default_factory=list, description="Step-by-step mathematical process of how chandas was identified")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "chandas_name": "Anushtup",
-                "syllable_breakdown": [
-                    {"syllable": "va", "type": "laghu", "position": 1},
-                    {"syllable": "su", "type": "laghu", "position": 2}
-                ],
-                "laghu_guru_pattern": "LGGLGGLG",
-                "explanation": "This is Anushtup meter with 8 syllables per quarter",
-                "confidence": 0.95,
-                "identification_process": [
-                    {
-                        "step_number": 1,
-                        "step_name": "Text Preprocessing",
-                        "description": "Remove punctuation and normalize text",
-                        "result": "Cleaned text ready for syllable extraction"
-                    },
-                    {
-                        "step_number": 2,
-                        "step_name": "Syllable Segmentation",
-                        "description": "Split text into syllables using Devanagari script rules",
-                        "result": "32 syllables detected"
-                    },
-                    {
-                        "step_number": 3,
-                        "step_name": "Laghu-Guru Classification",
-                        "description": "Classify each syllable as Laghu (short) or Guru (long) based on vowel length and conjunct consonants",
-                        "result": "Pattern: LGGLGGLG LGGLGGLG LGGLGGLG LGGLGGLG"
-                    },
-                    {
-                        "step_number": 4,
-                        "step_name": "Pattern Matching",
-                        "description": "Match against known chandas patterns in database",
-                        "result": "Matched: Anushtup (32 syllables, 8 per quarter)"
-                    },
-                    {
-                        "step_number": 5,
-                        "step_name": "Confidence Calculation",
-                        "description": "Calculate confidence based on pattern match quality",
-                        "result": "Confidence: 0.95 (Exact match)"
-                    }
-                ]
-            }
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for JSON encoding (items are already plain dicts)"""
+        return {
+            "chandas_name": self.chandas_name,
+            "syllable_breakdown": self.syllable_breakdown,
+            "laghu_guru_pattern": self.laghu_guru_pattern,
+            "explanation": self.explanation,
+            "confidence": self.confidence,
+            "identification_process": self.identification_process
         }
 
 
 # ==================== SHLOKA ANALYZE MODELS ====================
 
-class ShlokaAnalyzeRequest(BaseModel):
+class ShlokaAnalyzeRequest(APIModel):
     """Request model for shloka analysis"""
     verse: str = Field(..., description="Sanskrit verse text to analyze")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "verse": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्"
-            }
-        }
 
 
-class ShlokaAnalyzeResponse(BaseModel):
+class ShlokaAnalyzeResponse(CachedJSONModel):
     """Response model for shloka analysis"""
     metre: str = Field(..., description="Identified metre name")
     scheme: str = Field(..., description="Metrical scheme")
@@ -115,23 +139,19 @@ class ShlokaAnalyzeResponse(BaseModel):
     syllable_count: List[int] = Field(default_factory=list, description="Syllable count per quarter")
     gana_pattern: str = Field(default="", description="Gana pattern")
     detected: bool = Field(..., description="Whether metre was successfully detected")
-    llm_output: Optional[Dict[str, Any]] = Field(default=None, description="LLM-based analysis and commentary")
+    llm_output: Optional[str] = Field(default=None, description="LLM-based analysis and commentary")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "metre": "Anushtup",
-                "scheme": "8-8-8-8",
-                "laghu_guru_pattern": "LGGLGGLG LGGLGGLG LGGLGGLG LGGLGGLG",
-                "confidence": 0.95,
-                "syllable_count": [8, 8, 8, 8],
-                "gana_pattern": "ma-ya-ra-ta",
-                "detected": True,
-                "llm_output": {
-                    "explanation": "This verse follows the Anushtup metre...",
-                    "commentary": "A well-structured verse in classical Sanskrit meter"
-                }
-            }
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for JSON encoding"""
+        return {
+            "metre": self.metre,
+            "scheme": self.scheme,
+            "laghu_guru_pattern": self.laghu_guru_pattern,
+            "confidence": self.confidence,
+            "syllable_count": self.syllable_count,
+            "gana_pattern": self.gana_pattern,
+            "detected": self.detected,
+            "llm_output": self.llm_output
         }
 
 
@@ -155,42 +175,46 @@ class StyleEnum(str, Enum):
     puranic = "puranic"
 
 
-class ShlokaGenerateRequest(BaseModel):
+def _enum_literal(enum: type) -> Any:
+    """Literal type over an Enum's values, so the allowed strings are listed only once"""
+    return Literal[tuple(member.value for member in enum)]
+
+
+# Request fields and route parameters use Literal types of the enum values: pydantic-core
+# checks membership against a precomputed set and the field holds the Literal's own
+# (interned) str constant, shared by every request
+MoodLiteral = _enum_literal(MoodEnum)
+StyleLiteral = _enum_literal(StyleEnum)
+
+
+class ShlokaGenerateRequest(APIModel):
     """Request model for shloka generation"""
     theme: str = Field(..., description="Main theme or subject")
     deity: Optional[str] = Field(None, description="Deity name if devotional")
-    mood: MoodEnum = Field(MoodEnum.devotional, description="Emotional tone")
-    style: StyleEnum = Field(StyleEnum.classical, description="Literary style")
+    mood: MoodLiteral = Field("devotional", description="Emotional tone")
+    style: StyleLiteral = Field("classical", description="Literary style")
     meter: Optional[str] = Field(None, description="Specific chandas to use")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "theme": "Krishna's divine play",
-                "deity": "Krishna",
-                "mood": "devotional",
-                "style": "classical",
-                "meter": "Anushtup"
-            }
-        }
 
 
-class ShlokaGenerateResponse(BaseModel):
+class ShlokaGenerateResponse(CachedJSONModel):
     """Response model for shloka generation"""
     shloka: str = Field(..., description="Generated Sanskrit shloka")
     meter: str = Field(..., description="Meter used")
     meaning: str = Field(..., description="English translation and explanation")
     pattern: str = Field(..., description="Laghu-Guru pattern")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्।\nदेवकीपरमानन्दं कृष्णं वन्दे जगद्गुरुम्॥",
-                "meter": "Anushtup",
-                "meaning": "I bow to Krishna, son of Vasudeva, destroyer of Kamsa and Chanura, supreme joy of Devaki, teacher of the world.",
-                "pattern": "LGGLGGLG LGGLGGLG"
-            }
-        }
+
+
+class ShlokaBatchRequest(APIModel):
+    """Request model for generating several shlokas at once"""
+    requests: List[ShlokaGenerateRequest] = Field(..., min_length=1, max_length=20, description="Shlokas to generate")
+
+
+class ShlokaBatchResponse(APIModel):
+    """Response model for batch shloka generation"""
+    results: List[Optional[ShlokaGenerateResponse]] = Field(
+        ...,
+        description="Results in request order (null for failed items)"
+    )
 
 
 # ==================== TAGLINE GENERATOR MODELS ====================
@@ -205,76 +229,56 @@ class ToneEnum(str, Enum):
     powerful = "powerful"
 
 
-class TaglineGenerateRequest(BaseModel):
+ToneLiteral = _enum_literal(ToneEnum)
+
+
+class TaglineGenerateRequest(APIModel):
     """Request model for Sanskrit tagline generation"""
     industry: str = Field(..., description="Industry or domain")
     company_name: str = Field(..., description="Company or brand name")
     vision: str = Field(..., description="Company vision or mission")
     values: List[str] = Field(..., description="Core values")
-    tone: ToneEnum = Field(ToneEnum.professional, description="Desired tone")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "industry": "Technology",
-                "company_name": "TechVeda",
-                "vision": "Empowering digital transformation",
-                "values": ["innovation", "excellence", "integrity"],
-                "tone": "professional"
-            }
-        }
+    tone: ToneLiteral = Field("professional", description="Desired tone")
 
 
-class TaglineVariant(BaseModel):
+class TaglineVariant(TypedDict):
     """A tagline variant"""
     tagline: str
     translation: str
     context: str
 
 
-class TaglineGenerateResponse(BaseModel):
+class TaglineGenerateResponse(CachedJSONModel):
     """Response model for tagline generation"""
     tagline: str = Field(..., description="Primary Sanskrit tagline")
     english_translation: str = Field(..., description="English translation")
     meaning: str = Field(..., description="Detailed meaning and context")
     variants: List[TaglineVariant] = Field(..., description="Alternative versions")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "tagline": "ज्ञानं शक्तिः प्रौद्योगिक्या",
-                "english_translation": "Knowledge is power through technology",
-                "meaning": "Combining ancient wisdom with modern technology",
-                "variants": [
-                    {
-                        "tagline": "नवीनता परम्परायाः",
-                        "translation": "Innovation from tradition",
-                        "context": "Emphasizes traditional roots"
-                    }
-                ]
-            }
-        }
+
+
+class TaglineBatchRequest(APIModel):
+    """Request model for generating taglines for several briefs at once"""
+    requests: List[TaglineGenerateRequest] = Field(..., min_length=1, max_length=20, description="Tagline briefs")
+
+
+class TaglineBatchResponse(APIModel):
+    """Response model for batch tagline generation"""
+    results: List[Optional[TaglineGenerateResponse]] = Field(
+        ...,
+        description="Results in request order (null for failed items)"
+    )
 
 
 # ==================== MEANING ENGINE MODELS ====================
 
-class MeaningRequest(BaseModel):
+class MeaningRequest(APIModel):
     """Request model for Sanskrit meaning extraction"""
     verse: str = Field(..., description="Sanskrit verse or text")
     include_word_meanings: bool = Field(True, description="Include word-by-word breakdown")
     include_context: bool = Field(True, description="Include historical/cultural context")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "verse": "सत्यं ज्ञानमनन्तं ब्रह्म",
-                "include_word_meanings": True,
-                "include_context": True
-            }
-        }
 
 
-class MeaningResponse(BaseModel):
+class MeaningResponse(APIModel):
     """Response model for meaning extraction"""
     translation: str = Field(..., description="Complete English translation")
     word_meanings: Dict[str, str] = Field(..., description="Word-by-word meanings")
@@ -282,23 +286,21 @@ class MeaningResponse(BaseModel):
     unique_facts: str = Field(default="", description="Interesting and unique facts about the shloka")
     unknown_facts: str = Field(default="", description="Lesser-known or obscure facts")
     notes: str = Field(..., description="Additional grammatical or interpretive notes")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "translation": "Truth, Knowledge, Infinite is Brahman",
-                "word_meanings": {
-                    "सत्यम्": "truth, reality",
-                    "ज्ञानम्": "knowledge, wisdom",
-                    "अनन्तम्": "infinite, endless",
-                    "ब्रह्म": "Brahman, the absolute"
-                },
-                "context": "From Taittiriya Upanishad, defining the nature of Brahman",
-                "unique_facts": "This definition appears in three Taittiriya texts and forms the basis of Advaita Vedanta philosophy",
-                "unknown_facts": "Some scholars believe this formulation influenced Buddhist epistemology",
-                "notes": "All three words are in neuter gender, nominative case"
-            }
-        }
+
+
+class MeaningBatchRequest(APIModel):
+    """Request model for offline batch meaning extraction"""
+    requests: List[MeaningRequest] = Field(..., min_length=1, description="Verses to translate")
+
+
+class MeaningBatchStatus(APIModel):
+    """Status of a batch meaning extraction job"""
+    batch_id: str = Field(..., description="OpenAI batch id")
+    status: str = Field(..., description="Batch status (validating, in_progress, completed, failed, ...)")
+    results: Optional[List[Optional[MeaningResponse]]] = Field(
+        None,
+        description="Results in submission order once completed (null for failed items)"
+    )
 
 
 # ==================== KNOWLEDGE BASE MODELS ====================
@@ -311,86 +313,112 @@ class CollectionEnum(str, Enum):
     branding_vocab = "branding_vocab"
 
 
-class DocumentAddRequest(BaseModel):
+CollectionLiteral = _enum_literal(CollectionEnum)
+
+# Metadata keys the app itself writes or reads back (PDF ingest, shloka lookup); other
+# keys are allowed, so these only pin down the types of the known ones
+_COMMON_META_PROPERTIES = {
+    "source": {"type": "string"},
+    "source_file": {"type": "string"},
+    "title": {"type": "string"},
+    "page": {"type": "integer"},
+    "page_number": {"type": "integer"},
+    "total_pages": {"type": "integer"},
+    "chunk_id": {"type": "integer"},
+}
+
+META_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "chandas_patterns": {
+        "type": "object",
+        "properties": {
+            **_COMMON_META_PROPERTIES,
+            "name": {"type": "string"},
+            "category": {"type": "string"},
+            "syllables": {"type": "integer", "minimum": 1},
+        },
+    },
+    "example_shlokas": {
+        "type": "object",
+        "properties": {
+            **_COMMON_META_PROPERTIES,
+            "meter": {"type": "string"},
+            "meaning": {"type": "string"},
+        },
+    },
+    "grammar_rules": {"type": "object", "properties": _COMMON_META_PROPERTIES},
+    "branding_vocab": {"type": "object", "properties": _COMMON_META_PROPERTIES},
+}
+
+# Compiled once per collection; compiling per request would cost more than validating
+_META_VALIDATORS = (
+    {name: fastjsonschema.compile(schema) for name, schema in META_SCHEMAS.items()}
+    if FASTJSONSCHEMA_AVAILABLE else {}
+)
+
+
+def validate_metadata(collection: str, metadata: Dict[str, Any]) -> None:
+    """
+    Check document metadata against its collection's schema
+    
+    A no-op when fastjsonschema isn't installed (metadata is then stored as given).
+    
+    Args:
+        collection: Target collection
+        metadata: Metadata from a DocumentAddRequest / DocumentUpdateRequest
+    
+    Raises:
+        ValueError: If the metadata doesn't match the schema
+    """
+    validator = _META_VALIDATORS.get(collection)
+    if validator is not None:
+        validator(metadata)
+
+
+class DocumentAddRequest(APIModel):
     """Request to add document to knowledge base"""
-    collection: CollectionEnum = Field(..., description="Target collection")
+    collection: CollectionLiteral = Field(..., description="Target collection")
     content: str = Field(..., description="Document content")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Document metadata")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "collection": "chandas_patterns",
-                "content": "Anushtup: 8 syllables per quarter, 32 total. Pattern: flexible with 5th syllable laghu",
-                "metadata": {
-                    "name": "Anushtup",
-                    "category": "sama-vritta",
-                    "syllables": 32
-                }
-            }
-        }
 
 
-class DocumentSearchRequest(BaseModel):
+class DocumentSearchRequest(APIModel):
     """Request to search documents"""
-    collection: CollectionEnum = Field(..., description="Collection to search")
+    collection: CollectionLiteral = Field(..., description="Collection to search")
     query: str = Field(..., description="Search query")
     limit: int = Field(5, ge=1, le=50, description="Maximum results")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "collection": "chandas_patterns",
-                "query": "meters with 8 syllables",
-                "limit": 5
-            }
-        }
 
 
-class SearchResult(BaseModel):
+class SearchResult(APIModel):
     """A single search result"""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+    
     id: str
     content: str
     metadata: Dict[str, Any]
     score: float
 
 
-class DocumentSearchResponse(BaseModel):
+class DocumentSearchResponse(APIModel):
     """Response from document search"""
     results: List[SearchResult] = Field(..., description="Search results")
     total: int = Field(..., description="Total number of results")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "results": [
-                    {
-                        "id": "doc_001",
-                        "content": "Anushtup meter description",
-                        "metadata": {"name": "Anushtup"},
-                        "score": 0.95
-                    }
-                ],
-                "total": 1
-            }
-        }
 
 
-class DocumentUpdateRequest(BaseModel):
+class DocumentUpdateRequest(APIModel):
     """Request to update a document"""
-    collection: CollectionEnum = Field(..., description="Collection name")
+    collection: CollectionLiteral = Field(..., description="Collection name")
     document_id: str = Field(..., description="Document ID to update")
     content: Optional[str] = Field(None, description="New content")
     metadata: Optional[Dict[str, Any]] = Field(None, description="New metadata")
 
 
-class DocumentDeleteRequest(BaseModel):
+class DocumentDeleteRequest(APIModel):
     """Request to delete a document"""
-    collection: CollectionEnum = Field(..., description="Collection name")
+    collection: CollectionLiteral = Field(..., description="Collection name")
     document_id: str = Field(..., description="Document ID to delete")
 
 
-class OperationResponse(BaseModel):
+class OperationResponse(APIModel):
     """Generic operation response"""
     success: bool = Field(..., description="Operation success status")
     message: str = Field(..., description="Status message")
@@ -399,29 +427,22 @@ class OperationResponse(BaseModel):
 
 # ==================== VOICE ANALYZER MODELS ====================
 
-class VoiceAnalyzeRequest(BaseModel):
+class VoiceAnalyzeRequest(APIModel):
     """Request for voice karaoke analysis"""
     reference_shloka: Optional[str] = Field(None, description="Expected shloka (optional, will auto-detect if not provided)")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "reference_shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्"
-            }
-        }
 
 
-class PronunciationError(BaseModel):
+class PronunciationError(TypedDict):
     """A pronunciation error detail"""
-    position: int = Field(..., description="Position in verse (word index)")
-    expected: str = Field(..., description="Expected pronunciation")
-    actual: str = Field(..., description="Actual pronunciation")
-    error_type: str = Field(..., description="Type of error: syllable_mismatch, word_wrong, meter_deviation")
-    severity: str = Field(..., description="Error severity: minor, moderate, major")
-    note: str = Field(..., description="Detailed explanation")
+    position: Annotated[int, Field(description="Position in verse (word index)")]
+    expected: Annotated[str, Field(description="Expected pronunciation")]
+    actual: Annotated[str, Field(description="Actual pronunciation")]
+    error_type: Annotated[str, Field(description="Type of error: syllable_mismatch, word_wrong, meter_deviation")]
+    severity: Annotated[str, Field(description="Error severity: minor, moderate, major")]
+    note: Annotated[str, Field(description="Detailed explanation")]
 
 
-class AccuracyMetrics(BaseModel):
+class AccuracyMetrics(APIModel):
     """Detailed accuracy metrics"""
     overall_accuracy: float = Field(..., ge=0.0, le=1.0, description="Overall accuracy score")
     word_accuracy: float = Field(..., ge=0.0, le=1.0, description="Word-level accuracy")
@@ -430,7 +451,7 @@ class AccuracyMetrics(BaseModel):
     pronunciation_clarity: float = Field(..., ge=0.0, le=1.0, description="Overall pronunciation clarity")
 
 
-class IdentifiedShloka(BaseModel):
+class IdentifiedShloka(CachedJSONModel):
     """Information about the identified shloka"""
     text: str = Field(..., description="Complete shloka text")
     source: str = Field(..., description="Source text (e.g., Bhagavad Gita 2.47)")
@@ -440,9 +461,22 @@ class IdentifiedShloka(BaseModel):
     page_number: Optional[int] = Field(None, description="Page number in source PDF (if available)")
     source_file: Optional[str] = Field(None, description="Source PDF filename (if from uploaded document)")
     chunk_id: Optional[int] = Field(None, description="Chunk ID in RAG database")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for JSON encoding"""
+        return {
+            "text": self.text,
+            "source": self.source,
+            "meter": self.meter,
+            "meaning": self.meaning,
+            "confidence": self.confidence,
+            "page_number": self.page_number,
+            "source_file": self.source_file,
+            "chunk_id": self.chunk_id
+        }
 
 
-class VoiceAnalyzeResponse(BaseModel):
+class VoiceAnalyzeResponse(CachedJSONModel):
     """Response from voice karaoke analyzer"""
     transcribed_text: str = Field(..., description="Transcribed Sanskrit text from audio")
     identified_shloka: Optional[IdentifiedShloka] = Field(None, description="Identified shloka details")
@@ -451,37 +485,22 @@ class VoiceAnalyzeResponse(BaseModel):
     suggestions: str = Field(..., description="Personalized improvement suggestions")
     overall_feedback: str = Field(..., description="Overall performance feedback")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "transcribed_text": "वसुदेव सुतं देवं कंसचाणूरमर्दनम्",
-                "identified_shloka": {
-                    "text": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्।\nदेवकीपरमानन्दं कृष्णं वन्दे जगद्गुरुम्॥",
-                    "source": "Krishna Stotram",
-                    "meter": "Anushtup",
-                    "meaning": "I bow to Krishna, son of Vasudeva, destroyer of Kamsa and Chanura, supreme joy of Devaki, teacher of the world.",
-                    "confidence": 0.92
-                },
-                "accuracy_metrics": {
-                    "overall_accuracy": 0.87,
-                    "word_accuracy": 0.90,
-                    "syllable_accuracy": 0.85,
-                    "meter_accuracy": 0.88,
-                    "pronunciation_clarity": 0.84
-                },
-                "errors": [
-                    {
-                        "position": 1,
-                        "expected": "वसुदेवसुतं",
-                        "actual": "वसुदेव सुतं",
-                        "error_type": "syllable_mismatch",
-                        "severity": "minor",
-                        "note": "Added extra space between compound words"
-                    }
-                ],
-                "suggestions": "Focus on connecting compound words smoothly. Practice the 'dev' sound with proper dental pronunciation.",
-                "overall_feedback": "Good attempt! Your pronunciation is 87% accurate. Main areas for improvement: compound word joining and dental consonant clarity."
-            }
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for JSON encoding"""
+        metrics = self.accuracy_metrics
+        return {
+            "transcribed_text": self.transcribed_text,
+            "identified_shloka": self.identified_shloka.to_dict() if self.identified_shloka is not None else None,
+            "accuracy_metrics": {
+                "overall_accuracy": metrics.overall_accuracy,
+                "word_accuracy": metrics.word_accuracy,
+                "syllable_accuracy": metrics.syllable_accuracy,
+                "meter_accuracy": metrics.meter_accuracy,
+                "pronunciation_clarity": metrics.pronunciation_clarity
+            },
+            "errors": self.errors,
+            "suggestions": self.suggestions,
+            "overall_feedback": self.overall_feedback
         }
 
 
@@ -500,32 +519,26 @@ class PersonaEnum(str, Enum):
     krishna = "krishna"
 
 
-class ChatMessage(BaseModel):
+InputTypeLiteral = _enum_literal(InputTypeEnum)
+PersonaLiteral = _enum_literal(PersonaEnum)
+
+
+class ChatMessage(TypedDict):
     """A single chat message"""
-    role: str = Field(..., description="Message role: user or assistant")
-    content: str = Field(..., description="Message content")
-    timestamp: Optional[float] = Field(None, description="Unix timestamp")
+    role: Annotated[str, Field(description="Message role: user or assistant")]
+    content: Annotated[str, Field(description="Message content")]
+    timestamp: NotRequired[Annotated[Optional[float], Field(description="Unix timestamp")]]
 
 
-class ChatRequest(BaseModel):
+class ChatRequest(APIModel):
     """Request model for chatbot"""
     message: Optional[str] = Field(None, description="Text message (required if input_type=text)")
-    input_type: InputTypeEnum = Field(InputTypeEnum.text, description="Type of input")
-    persona: PersonaEnum = Field(PersonaEnum.default, description="AI persona to use")
+    input_type: InputTypeLiteral = Field("text", description="Type of input")
+    persona: PersonaLiteral = Field("default", description="AI persona to use")
     conversation_history: List[ChatMessage] = Field(default_factory=list, description="Previous conversation context")
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "message": "What is Anushtup meter?",
-                "input_type": "text",
-                "persona": "default",
-                "conversation_history": []
-            }
-        }
 
 
-class ChatResponse(BaseModel):
+class ChatResponse(CachedJSONModel):
     """Response model from chatbot"""
     response: str = Field(..., description="Chatbot response text")
     input_detected: str = Field(..., description="Detected/transcribed input from user")
@@ -533,25 +546,20 @@ class ChatResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="Response confidence")
     suggestions: List[str] = Field(default_factory=list, description="Follow-up question suggestions")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "response": "Anushtup is the most common Sanskrit meter, consisting of 32 syllables divided into 4 quarters of 8 syllables each. It's widely used in epics like Mahabharata and Ramayana.",
-                "input_detected": "What is Anushtup meter?",
-                "sources": ["Chandas Knowledge Base", "Example Shlokas"],
-                "confidence": 0.95,
-                "suggestions": [
-                    "How do I identify Anushtup meter?",
-                    "What are other common Sanskrit meters?",
-                    "Can you show me an example of Anushtup?"
-                ]
-            }
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for JSON encoding"""
+        return {
+            "response": self.response,
+            "input_detected": self.input_detected,
+            "sources": self.sources,
+            "confidence": self.confidence,
+            "suggestions": self.suggestions
         }
 
 
 # ==================== COMMON MODELS ====================
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(APIModel):
     """Standard error response"""
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
@@ -0,0 +1,194 @@
+"""
+Example payloads for the OpenAPI docs, keyed by schema name
+
+Kept out of the model classes so they are only built when the schema is first
+requested (see main.py); importing `models` doesn't pay for them.
+"""
+
+from typing import Any, Dict
+
+EXAMPLES: Dict[str, Dict[str, Any]] = {
+    "ChandasIdentifyRequest": {
+        "shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्",
+        "include_process": True
+    },
+    "ChandasIdentifyResponse": {
+        "chandas_name": "Anushtup",
+        "syllable_breakdown": [
+            {"syllable": "va", "type": "laghu", "position": 1},
+            {"syllable": "su", "type": "laghu", "position": 2}
+        ],
+        "laghu_guru_pattern": "LGGLGGLG",
+        "explanation": "This is Anushtup meter with 8 syllables per quarter",
+        "confidence": 0.95,
+        "identification_process": [
+            {
+                "step_number": 1,
+                "step_name": "Text Preprocessing",
+                "description": "Remove punctuation and normalize text",
+                "result": "Cleaned text ready for syllable extraction"
+            },
+            {
+                "step_number": 2,
+                "step_name": "Syllable Segmentation",
+                "description": "Split text into syllables using Devanagari script rules",
+                "result": "32 syllables detected"
+            },
+            {
+                "step_number": 3,
+                "step_name": "Laghu-Guru Classification",
+                "description": "Classify each syllable as Laghu (short) or Guru (long) based on vowel length and conjunct consonants",
+                "result": "Pattern: LGGLGGLG LGGLGGLG LGGLGGLG LGGLGGLG"
+            },
+            {
+                "step_number": 4,
+                "step_name": "Pattern Matching",
+                "description": "Match against known chandas patterns in database",
+                "result": "Matched: Anushtup (32 syllables, 8 per quarter)"
+            },
+            {
+                "step_number": 5,
+                "step_name": "Confidence Calculation",
+                "description": "Calculate confidence based on pattern match quality",
+                "result": "Confidence: 0.95 (Exact match)"
+            }
+        ]
+    },
+    "ShlokaAnalyzeRequest": {
+        "verse": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्"
+    },
+    "ShlokaAnalyzeResponse": {
+        "metre": "Anushtup",
+        "scheme": "8-8-8-8",
+        "laghu_guru_pattern": "LGGLGGLG LGGLGGLG LGGLGGLG LGGLGGLG",
+        "confidence": 0.95,
+        "syllable_count": [8, 8, 8, 8],
+        "gana_pattern": "ma-ya-ra-ta",
+        "detected": True,
+        "llm_output": "This verse follows the Anushtup metre... A well-structured verse in classical Sanskrit meter"
+    },
+    "ShlokaGenerateRequest": {
+        "theme": "Krishna's divine play",
+        "deity": "Krishna",
+        "mood": "devotional",
+        "style": "classical",
+        "meter": "Anushtup"
+    },
+    "ShlokaGenerateResponse": {
+        "shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्।\nदेवकीपरमानन्दं कृष्णं वन्दे जगद्गुरुम्॥",
+        "meter": "Anushtup",
+        "meaning": "I bow to Krishna, son of Vasudeva, destroyer of Kamsa and Chanura, supreme joy of Devaki, teacher of the world.",
+        "pattern": "LGGLGGLG LGGLGGLG"
+    },
+    "TaglineGenerateRequest": {
+        "industry": "Technology",
+        "company_name": "TechVeda",
+        "vision": "Empowering digital transformation",
+        "values": ["innovation", "excellence", "integrity"],
+        "tone": "professional"
+    },
+    "TaglineGenerateResponse": {
+        "tagline": "ज्ञानं शक्तिः प्रौद्योगिक्या",
+        "english_translation": "Knowledge is power through technology",
+        "meaning": "Combining ancient wisdom with modern technology",
+        "variants": [
+            {
+                "tagline": "नवीनता परम्परायाः",
+                "translation": "Innovation from tradition",
+                "context": "Emphasizes traditional roots"
+            }
+        ]
+    },
+    "MeaningRequest": {
+        "verse": "सत्यं ज्ञानमनन्तं ब्रह्म",
+        "include_word_meanings": True,
+        "include_context": True
+    },
+    "MeaningResponse": {
+        "translation": "Truth, Knowledge, Infinite is Brahman",
+        "word_meanings": {
+            "सत्यम्": "truth, reality",
+            "ज्ञानम्": "knowledge, wisdom",
+            "अनन्तम्": "infinite, endless",
+            "ब्रह्म": "Brahman, the absolute"
+        },
+        "context": "From Taittiriya Upanishad, defining the nature of Brahman",
+        "unique_facts": "This definition appears in three Taittiriya texts and forms the basis of Advaita Vedanta philosophy",
+        "unknown_facts": "Some scholars believe this formulation influenced Buddhist epistemology",
+        "notes": "All three words are in neuter gender, nominative case"
+    },
+    "DocumentAddRequest": {
+        "collection": "chandas_patterns",
+        "content": "Anushtup: 8 syllables per quarter, 32 total. Pattern: flexible with 5th syllable laghu",
+        "metadata": {
+            "name": "Anushtup",
+            "category": "sama-vritta",
+            "syllables": 32
+        }
+    },
+    "DocumentSearchRequest": {
+        "collection": "chandas_patterns",
+        "query": "meters with 8 syllables",
+        "limit": 5
+    },
+    "DocumentSearchResponse": {
+        "results": [
+            {
+                "id": "doc_001",
+                "content": "Anushtup meter description",
+                "metadata": {"name": "Anushtup"},
+                "score": 0.95
+            }
+        ],
+        "total": 1
+    },
+    "VoiceAnalyzeRequest": {
+        "reference_shloka": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्"
+    },
+    "VoiceAnalyzeResponse": {
+        "transcribed_text": "वसुदेव सुतं देवं कंसचाणूरमर्दनम्",
+        "identified_shloka": {
+            "text": "वसुदेवसुतं देवं कंसचाणूरमर्दनम्।\nदेवकीपरमानन्दं कृष्णं वन्दे जगद्गुरुम्॥",
+            "source": "Krishna Stotram",
+            "meter": "Anushtup",
+            "meaning": "I bow to Krishna, son of Vasudeva, destroyer of Kamsa and Chanura, supreme joy of Devaki, teacher of the world.",
+            "confidence": 0.92
+        },
+        "accuracy_metrics": {
+            "overall_accuracy": 0.87,
+            "word_accuracy": 0.90,
+            "syllable_accuracy": 0.85,
+            "meter_accuracy": 0.88,
+            "pronunciation_clarity": 0.84
+        },
+        "errors": [
+            {
+                "position": 1,
+                "expected": "वसुदेवसुतं",
+                "actual": "वसुदेव सुतं",
+                "error_type": "syllable_mismatch",
+                "severity": "minor",
+                "note": "Added extra space between compound words"
+            }
+        ],
+        "suggestions": "Focus on connecting compound words smoothly. Practice the 'dev' sound with proper dental pronunciation.",
+        "overall_feedback": "Good attempt! Your pronunciation is 87% accurate. Main areas for improvement: compound word joining and dental consonant clarity."
+    },
+    "ChatRequest": {
+        "message": "What is Anushtup meter?",
+        "input_type": "text",
+        "persona": "default",
+        "conversation_history": []
+    },
+    "ChatResponse": {
+        "response": "Anushtup is the most common Sanskrit meter, consisting of 32 syllables divided into 4 quarters of 8 syllables each. It's widely used in epics like Mahabharata and Ramayana.",
+        "input_detected": "What is Anushtup meter?",
+        "sources": ["Chandas Knowledge Base", "Example Shlokas"],
+        "confidence": 0.95,
+        "suggestions": [
+            "How do I identify Anushtup meter?",
+            "What are other common Sanskrit meters?",
+            "Can you show me an example of Anushtup?"
+        ]
+    }
+}
@@ -2,22 +2,61 @@
 Routes for Chandas Identifier API
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
 import logging
+from typing import Any, Dict, Optional, Type, TypeVar
 
+from config import get_settings
 from models import ChandasIdentifyRequest, ChandasIdentifyResponse, ShlokaAnalyzeRequest, ShlokaAnalyzeResponse
 from controllers import get_chandas_controller, ChandasController
-from services.chandas_service import ChandasService
-from services.llm_service import LLMService
+from services.chandas_service import ChandasService, get_chandas_service
+from services.llm_service import LLMService, get_llm_service
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+# Request bodies are validated straight from the raw bytes by pydantic-core (no
+# json.loads + dict pass through FastAPI's body dependency)
+_IDENTIFY_ADAPTER = TypeAdapter(ChandasIdentifyRequest)
+_ANALYZE_ADAPTER = TypeAdapter(ShlokaAnalyzeRequest)
+
 
-@router.post("/chandas/identify", response_model=ChandasIdentifyResponse)
+def _request_body_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting a JSON body the route reads itself"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
+
+async def _parse_body(request: Request, adapter: TypeAdapter[T]) -> T:
+    """Validate the raw JSON body, reporting errors like FastAPI's own body validation"""
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+
+
+@router.post(
+    "/chandas/identify",
+    response_model=ChandasIdentifyResponse,
+    openapi_extra=_request_body_schema(ChandasIdentifyRequest)
+)
 async def identify_chandas(
-    request: ChandasIdentifyRequest,
+    raw_request: Request,
     controller: ChandasController = Depends(get_chandas_controller)
 ):
     """
@@ -26,6 +65,7 @@ async def identify_chandas(
     This endpoint analyzes the syllable pattern and identifies the prosodic meter.
     
     - **shloka**: Sanskrit verse to analyze
+    - **include_process**: Include the step-by-step process (default: true); set false to skip it
     
     Returns detailed analysis including:
     - Chandas name
@@ -39,9 +79,12 @@ async def identify_chandas(
       4. Pattern matching against known chandas database
       5. Confidence calculation methodology
     """
+    request = await _parse_body(raw_request, _IDENTIFY_ADAPTER)
     try:
         result = await controller.identify_chandas(request)
-        return result
+        # Encoded once by json_bytes() (orjson over to_dict() when installed), skipping FastAPI's
+        # re-validation and jsonable_encoder pass
+        return Response(content=result.json_bytes(), media_type="application/json")
     except Exception as e:
         logger.error(f"Chandas identification failed: {str(e)}")
         raise HTTPException(
@@ -50,8 +93,16 @@ async def identify_chandas(
         )
 
 
-@router.post("/chandas/analyze-shloka", response_model=ShlokaAnalyzeResponse)
-async def analyze_shloka(request: ShlokaAnalyzeRequest):
+@router.post(
+    "/chandas/analyze-shloka",
+    response_model=ShlokaAnalyzeResponse,
+    openapi_extra=_request_body_schema(ShlokaAnalyzeRequest)
+)
+async def analyze_shloka(
+    raw_request: Request,
+    chandas_service: ChandasService = Depends(get_chandas_service),
+    llm_service: Optional[LLMService] = Depends(get_llm_service)
+):
     """
     Analyze Sanskrit shloka for meter detection with optional LLM enhancement
     
@@ -66,44 +117,45 @@ async def analyze_shloka(request: ShlokaAnalyzeRequest):
     - Confidence score
     - LLM-based analysis (if available)
     """
+    request = await _parse_body(raw_request, _ANALYZE_ADAPTER)
+    if not request.verse.strip():
+        raise HTTPException(status_code=422, detail="Field 'verse' is required and cannot be empty")
+    
+    # Step 1: Identify metre using chandas service (CPU-bound - runs in a worker thread
+    # so it doesn't stall the event loop)
     try:
-        # Validate input
-        if not request.verse or not request.verse.strip():
-            raise HTTPException(status_code=422, detail="Field 'verse' is required and cannot be empty")
-        
-        # Step 1: Identify metre using chandas service
-        chandas_service = ChandasService()
-        metre_info = chandas_service.identify_metre(request.verse)
-        
-        # Step 2: Get LLM analysis (optional)
-        llm_analysis = None
-        try:
-            llm_service = LLMService()
-            llm_analysis = await llm_service.analyze_with_metre(request.verse, metre_info)
-        except Exception as e:
-            logger.debug(f"LLM analysis not available: {e}")
-        
-        # Step 3: Build response
-        response = ShlokaAnalyzeResponse(
-            metre=metre_info.get("metre", "Unknown"),
-            scheme=metre_info.get("scheme", ""),
-            laghu_guru_pattern=metre_info.get("laghu_guru_pattern", ""),
-            confidence=metre_info.get("confidence", 0.0),
-            syllable_count=metre_info.get("syllable_count", []),
-            gana_pattern=metre_info.get("gana_pattern", ""),
-            detected=metre_info.get("detected", False),
-            llm_output=llm_analysis
-        )
-        
-        logger.info(f"Successfully analyzed shloka: {metre_info.get('metre', 'Unknown')}")
-        return response
-        
-    except HTTPException:
-        raise
+        metre_info = await asyncio.to_thread(chandas_service.identify_metre, request.verse)
     except Exception as e:
         logger.error(f"Shloka analysis failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to analyze shloka: {str(e)}"
         )
-
+    
+    # Step 2: Get LLM analysis (optional - a failure just leaves it out)
+    llm_analysis = None
+    if llm_service is not None:
+        try:
+            llm_analysis = await llm_service.analyze_with_metre(request.verse, metre_info)
+        except Exception as e:
+            logger.debug("LLM analysis not available: %s", e)
+    
+    # Step 3: Build response - chandas_service output and the LLM's plain-text commentary
+    # are trusted, so they are only validated in debug mode (to catch schema drift)
+    fields = dict(
+        metre=metre_info.get("metre", "Unknown"),
+        scheme=metre_info.get("scheme", ""),
+        laghu_guru_pattern=metre_info.get("laghu_guru_pattern", ""),
+        confidence=metre_info.get("confidence", 0.0),
+        syllable_count=metre_info.get("syllable_count", []),
+        gana_pattern=metre_info.get("gana_pattern", ""),
+        detected=metre_info.get("detected", False),
+        llm_output=llm_analysis
+    )
+    if settings.debug:
+        response = ShlokaAnalyzeResponse(**fields)
+    else:
+        response = ShlokaAnalyzeResponse.model_construct(**fields)
+    
+    logger.info("Successfully analyzed shloka: %s", fields["metre"])
+    return Response(content=response.json_bytes(), media_type="application/json")
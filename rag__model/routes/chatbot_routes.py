@@ -3,19 +3,138 @@ Routes for Chatbot API - Multimodal Sanskrit AI assistant
 """
 
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from pydantic_core import from_json
 import logging
 import tempfile
 import os
 import json
-from typing import Optional, List, Union
+from typing import Any, Optional, List, Tuple, Union
 
-from models import ChatRequest, ChatResponse, ChatMessage, InputTypeEnum
-from controllers.chatbot_controller import get_chatbot_controller, ChatbotController
+from models import ChatRequest, ChatResponse, ChatMessage
+from controllers.chatbot_controller import get_chatbot_controller, ChatbotController, HISTORY_MAX_MESSAGES
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Validates the conversation_history messages in one pass
+_HISTORY_ADAPTER = TypeAdapter(List[ChatMessage])
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame (data is JSON-encoded so newlines are safe)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _prepare_chat_inputs(
+    input_type: str,
+    message: Optional[str],
+    conversation_history: Optional[str],
+    audio_file: Optional[UploadFile],
+    image_file: Optional[UploadFile]
+) -> Tuple[List[ChatMessage], Optional[str], Optional[str]]:
+    """
+    Validate chat form fields and save uploads to temporary files
+    
+    Returns:
+        (parsed conversation history, audio temp path, image temp path)
+    """
+    # Validate input type
+    if input_type not in ["text", "voice", "image"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid input_type: {input_type}. Must be 'text', 'voice', or 'image'"
+        )
+    
+    # Parse conversation history
+    history = []
+    if conversation_history:
+        try:
+            # Clients resend the whole dialog every turn - only the newest messages can
+            # reach the prompt, so older ones are dropped before validation
+            history = _HISTORY_ADAPTER.validate_python(
+                from_json(conversation_history)[-HISTORY_MAX_MESSAGES:]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to parse conversation history: {str(e)}")
+    
+    # Handle different input types
+    audio_path = None
+    image_path = None
+    
+    if input_type == "text":
+        if not message or not message.strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Message is required for text input"
+            )
+    
+    elif input_type == "voice":
+        if not audio_file:
+            logger.error(f"Voice input requested but audio_file is None. Raw audio param type: {type(audio_file)}, value: {audio_file}")
+            raise HTTPException(
+                status_code=400,
+                detail="Audio file is required for voice input. Please upload an audio file (wav, mp3, m4a, flac, ogg) in the 'audio' field."
+            )
+        
+        # Validate audio format
+        allowed_audio = {"audio/wav", "audio/mpeg", "audio/mp3", "audio/x-m4a", "audio/flac", "audio/ogg", "audio/mp4"}
+        if audio_file.content_type not in allowed_audio:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported audio format: {audio_file.content_type}. Allowed: wav, mp3, m4a, flac, ogg"
+            )
+        
+        # Save audio temporarily
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.filename)[1]) as tmp:
+            content = await audio_file.read()
+            tmp.write(content)
+            audio_path = tmp.name
+        
+        logger.info(f"📥 Audio file saved: {audio_file.filename} ({len(content)} bytes)")
+    
+    elif input_type == "image":
+        if not image_file:
+            raise HTTPException(
+                status_code=400,
+                detail="Image file is required for image input"
+            )
+        
+        # Validate image format
+        allowed_images = {"image/jpeg", "image/png", "image/jpg"}
+        if image_file.content_type not in allowed_images:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported image format: {image_file.content_type}"
+            )
+        
+        # Save image temporarily
+        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(image_file.filename)[1]) as tmp:
+            content = await image_file.read()
+            tmp.write(content)
+            image_path = tmp.name
+        
+        logger.info(f"📥 Image file saved: {image_file.filename} ({len(content)} bytes)")
+    
+    return history, audio_path, image_path
+
+
+def _cleanup_temp_files(audio_path: Optional[str], image_path: Optional[str]) -> None:
+    """Delete temporary upload files"""
+    if audio_path and os.path.exists(audio_path):
+        try:
+            os.unlink(audio_path)
+        except Exception as e:
+            logger.warning(f"Failed to delete temp audio file: {str(e)}")
+    
+    if image_path and os.path.exists(image_path):
+        try:
+            os.unlink(image_path)
+        except Exception as e:
+            logger.warning(f"Failed to delete temp image file: {str(e)}")
+
 
 @router.post("/api/v1/chat", response_model=ChatResponse)
 async def chat(
@@ -66,83 +185,9 @@ async def chat(
         # Debug logging
         logger.info(f"🔍 Received - audio: {audio}, image: {image}, input_type: {input_type}")
         
-        # FastAPI returns UploadFile or None - use them directly
-        audio_file = audio
-        image_file = image
-        
-        # Validate input type
-        if input_type not in ["text", "voice", "image"]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid input_type: {input_type}. Must be 'text', 'voice', or 'image'"
-            )
-        
-        # Parse conversation history
-        history = []
-        if conversation_history:
-            try:
-                history_data = json.loads(conversation_history)
-                history = [ChatMessage(**msg) for msg in history_data]
-            except Exception as e:
-                logger.warning(f"Failed to parse conversation history: {str(e)}")
-        
-        # Handle different input types
-        audio_path = None
-        image_path = None
-        
-        if input_type == "text":
-            if not message or not message.strip():
-                raise HTTPException(
-                    status_code=400,
-                    detail="Message is required for text input"
-                )
-        
-        elif input_type == "voice":
-            if not audio_file:
-                logger.error(f"Voice input requested but audio_file is None. Raw audio param type: {type(audio)}, value: {audio}")
-                raise HTTPException(
-                    status_code=400,
-                    detail="Audio file is required for voice input. Please upload an audio file (wav, mp3, m4a, flac, ogg) in the 'audio' field."
-                )
-            
-            # Validate audio format
-            allowed_audio = {"audio/wav", "audio/mpeg", "audio/mp3", "audio/x-m4a", "audio/flac", "audio/ogg", "audio/mp4"}
-            if audio_file.content_type not in allowed_audio:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported audio format: {audio_file.content_type}. Allowed: wav, mp3, m4a, flac, ogg"
-                )
-            
-            # Save audio temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(audio_file.filename)[1]) as tmp:
-                content = await audio_file.read()
-                tmp.write(content)
-                audio_path = tmp.name
-            
-            logger.info(f"📥 Audio file saved: {audio_file.filename} ({len(content)} bytes)")
-        
-        elif input_type == "image":
-            if not image_file:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Image file is required for image input"
-                )
-            
-            # Validate image format
-            allowed_images = {"image/jpeg", "image/png", "image/jpg"}
-            if image_file.content_type not in allowed_images:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported image format: {image_file.content_type}"
-                )
-            
-            # Save image temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(image_file.filename)[1]) as tmp:
-                content = await image_file.read()
-                tmp.write(content)
-                image_path = tmp.name
-            
-            logger.info(f"📥 Image file saved: {image_file.filename} ({len(content)} bytes)")
+        history, audio_path, image_path = await _prepare_chat_inputs(
+            input_type, message, conversation_history, audio, image
+        )
         
         # Process chat request
         try:
@@ -154,7 +199,8 @@ async def chat(
                 conversation_history=history,
                 persona=persona
             )
-            return result
+            # Cached responses keep their encoded JSON - repeat questions skip serialization
+            return Response(content=result.json_bytes(), media_type="application/json")
         
         except ValueError as ve:
             # Handle validation errors from controller
@@ -165,17 +211,7 @@ async def chat(
             
         finally:
             # Cleanup temporary files
-            if audio_path and os.path.exists(audio_path):
-                try:
-                    os.unlink(audio_path)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp audio file: {str(e)}")
-            
-            if image_path and os.path.exists(image_path):
-                try:
-                    os.unlink(image_path)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp image file: {str(e)}")
+            _cleanup_temp_files(audio_path, image_path)
     
     except HTTPException:
         raise
@@ -192,3 +228,47 @@ async def chat(
             status_code=500,
             detail=f"Chatbot processing failed: {str(e)}"
         )
+
+
+@router.post("/api/v1/chat/stream")
+async def chat_stream(
+    input_type: str = Form("text"),
+    persona: str = Form("default"),
+    message: Optional[str] = Form(None),
+    conversation_history: Optional[str] = Form(None),
+    audio: Optional[UploadFile] = File(None),
+    image: Optional[UploadFile] = File(None),
+    controller: ChatbotController = Depends(get_chatbot_controller)
+):
+    """
+    Streaming version of /api/v1/chat (Server-Sent Events)
+    
+    Accepts the same form fields as /api/v1/chat. The answer is streamed as it is generated:
+    
+    - `event: token` - JSON string with the next piece of the response text
+    - `event: metadata` - sent once at the end: input_detected, sources, confidence, suggestions
+    - `event: error` - sent instead of further tokens if processing fails mid-stream
+    """
+    history, audio_path, image_path = await _prepare_chat_inputs(
+        input_type, message, conversation_history, audio, image
+    )
+    
+    async def event_stream():
+        try:
+            async for item in controller.process_chat_stream(
+                message=message,
+                input_type=input_type,
+                audio_path=audio_path,
+                image_path=image_path,
+                conversation_history=history,
+                persona=persona
+            ):
+                yield _sse(item["event"], item["data"])
+        except Exception as e:
+            logger.error(f"Chatbot stream failed: {str(e)}")
+            yield _sse("error", {"detail": f"Chatbot processing failed: {str(e)}"})
+        finally:
+            # Cleanup temporary files once the stream is done
+            _cleanup_temp_files(audio_path, image_path)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
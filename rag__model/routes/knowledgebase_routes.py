@@ -15,7 +15,8 @@ from models import (
     DocumentDeleteRequest,
     DocumentSearchResponse,
     OperationResponse,
-    CollectionEnum
+    CollectionLiteral,
+    validate_metadata
 )
 from controllers import get_knowledgebase_controller, KnowledgeBaseController
 from services.pdf_loader import get_pdf_loader
@@ -25,6 +26,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _check_metadata(collection: str, metadata: dict) -> None:
+    """Reject metadata that doesn't fit the collection's schema with a 422"""
+    try:
+        validate_metadata(collection, metadata)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid metadata: {str(e)}")
+
+
 @router.post("/kb/document", response_model=OperationResponse)
 async def add_document(
     request: DocumentAddRequest,
@@ -41,6 +50,7 @@ async def add_document(
     Returns:
     - Success status and document ID
     """
+    _check_metadata(request.collection, request.metadata)
     try:
         result = await controller.add_document(request)
         return result
@@ -97,6 +107,8 @@ async def update_document(
     Returns:
     - Success status
     """
+    if request.metadata is not None:
+        _check_metadata(request.collection, request.metadata)
     try:
         result = await controller.update_document(request)
         return result
@@ -136,7 +148,7 @@ async def delete_document(
 
 @router.get("/kb/collection/{collection}/stats", response_model=OperationResponse)
 async def get_collection_stats(
-    collection: CollectionEnum,
+    collection: CollectionLiteral,
     controller: KnowledgeBaseController = Depends(get_knowledgebase_controller)
 ):
     """
@@ -162,7 +174,7 @@ async def get_collection_stats(
 @router.post("/kb/upload-pdf", response_model=OperationResponse)
 async def upload_pdf(
     file: UploadFile = File(..., description="PDF file to upload"),
-    collection: CollectionEnum = Form(..., description="Target collection"),
+    collection: CollectionLiteral = Form(..., description="Target collection"),
     chunk_size: Optional[int] = Form(1000, description="Characters per chunk"),
     controller: KnowledgeBaseController = Depends(get_knowledgebase_controller)
 ):
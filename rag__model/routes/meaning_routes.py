@@ -5,7 +5,7 @@ Routes for Sanskrit Meaning Engine API
 from fastapi import APIRouter, HTTPException, Depends
 import logging
 
-from models import MeaningRequest, MeaningResponse
+from models import MeaningRequest, MeaningResponse, MeaningBatchRequest, MeaningBatchStatus
 from controllers import get_meaning_controller, MeaningController
 
 logger = logging.getLogger(__name__)
@@ -43,3 +43,43 @@ async def extract_meaning(
             status_code=500,
             detail=f"Failed to extract meaning: {str(e)}"
         )
+
+
+@router.post("/meaning/batch", response_model=MeaningBatchStatus)
+async def submit_meaning_batch(
+    request: MeaningBatchRequest,
+    controller: MeaningController = Depends(get_meaning_controller)
+):
+    """
+    Submit many verses for offline translation via the OpenAI Batch API
+    
+    Intended for bulk jobs such as knowledge base seeding: roughly half the cost of
+    /meaning/extract, with results delivered within 24 hours. Poll
+    GET /meaning/batch/{batch_id} for status and results.
+    """
+    try:
+        return await controller.submit_batch(request.requests)
+    except Exception as e:
+        logger.error(f"Meaning batch submission failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to submit meaning batch: {str(e)}"
+        )
+
+
+@router.get("/meaning/batch/{batch_id}", response_model=MeaningBatchStatus)
+async def get_meaning_batch(
+    batch_id: str,
+    controller: MeaningController = Depends(get_meaning_controller)
+):
+    """
+    Get the status of a batch meaning job; results are included once it has completed
+    """
+    try:
+        return await controller.get_batch(batch_id)
+    except Exception as e:
+        logger.error(f"Meaning batch lookup failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get meaning batch: {str(e)}"
+        )
@@ -3,9 +3,10 @@ Routes for Shloka Generator API
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
 import logging
 
-from models import ShlokaGenerateRequest, ShlokaGenerateResponse
+from models import ShlokaGenerateRequest, ShlokaGenerateResponse, ShlokaBatchRequest, ShlokaBatchResponse
 from controllers import get_shloka_controller, ShlokaController
 
 logger = logging.getLogger(__name__)
@@ -38,10 +39,33 @@ async def generate_shloka(
     """
     try:
         result = await controller.generate_shloka(request)
-        return result
+        # Cached results keep their encoded JSON - repeat requests skip serialization
+        return Response(content=result.json_bytes(), media_type="application/json")
     except Exception as e:
         logger.error(f"Shloka generation failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate shloka: {str(e)}"
         )
+
+
+@router.post("/shloka/generate_batch", response_model=ShlokaBatchResponse)
+async def generate_shloka_batch(
+    request: ShlokaBatchRequest,
+    controller: ShlokaController = Depends(get_shloka_controller)
+):
+    """
+    Generate several shlokas in one call (up to 20)
+    
+    Items are generated concurrently, so the batch takes roughly as long as its
+    slowest shloka. Each result matches /shloka/generate; failed items are null.
+    """
+    try:
+        results = await controller.generate_shloka_batch(request.requests)
+        return ShlokaBatchResponse(results=results)
+    except Exception as e:
+        logger.error(f"Shloka batch generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate shloka batch: {str(e)}"
+        )
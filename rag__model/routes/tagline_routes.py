@@ -3,9 +3,10 @@ Routes for Sanskrit Tagline Generator API
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
 import logging
 
-from models import TaglineGenerateRequest, TaglineGenerateResponse
+from models import TaglineGenerateRequest, TaglineGenerateResponse, TaglineBatchRequest, TaglineBatchResponse
 from controllers import get_tagline_controller, TaglineController
 
 logger = logging.getLogger(__name__)
@@ -39,10 +40,33 @@ async def generate_tagline(
     """
     try:
         result = await controller.generate_tagline(request)
-        return result
+        # Cached results keep their encoded JSON - repeat requests skip serialization
+        return Response(content=result.json_bytes(), media_type="application/json")
     except Exception as e:
         logger.error(f"Tagline generation failed: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate tagline: {str(e)}"
         )
+
+
+@router.post("/tagline/generate_batch", response_model=TaglineBatchResponse)
+async def generate_tagline_batch(
+    request: TaglineBatchRequest,
+    controller: TaglineController = Depends(get_tagline_controller)
+):
+    """
+    Generate taglines for several briefs in one call (up to 20)
+    
+    Items are generated concurrently, so the batch takes roughly as long as its
+    slowest brief. Each result matches /tagline/generate; failed items are null.
+    """
+    try:
+        results = await controller.generate_tagline_batch(request.requests)
+        return TaglineBatchResponse(results=results)
+    except Exception as e:
+        logger.error(f"Tagline batch generation failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate tagline batch: {str(e)}"
+        )
@@ -2,13 +2,15 @@
 Voice Karaoke Routes - Sanskrit pronunciation analysis API
 """
 
+import asyncio
 import logging
 import os
+import shutil
 import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Tuple
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
 from fastapi.responses import JSONResponse
 
 from models import VoiceAnalyzeRequest, VoiceAnalyzeResponse
@@ -21,6 +23,17 @@ router = APIRouter(prefix="/api/v1/voice", tags=["Voice Karaoke"])
 voice_controller = get_voice_controller()
 
 
+_COPY_CHUNK_SIZE = 64 * 1024
+
+
+def _save_temp_audio(upload: BinaryIO, suffix: str) -> Tuple[str, int]:
+    """Copy an upload to a temporary file in chunks (blocking); return its path and size"""
+    upload.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        shutil.copyfileobj(upload, temp_file, _COPY_CHUNK_SIZE)
+        return temp_file.name, temp_file.tell()
+
+
 @router.post("/analyze", response_model=VoiceAnalyzeResponse)
 async def analyze_voice_pronunciation(
     audio: UploadFile = File(..., description="Audio file (wav, mp3, m4a, etc.)"),
@@ -30,7 +43,7 @@ async def analyze_voice_pronunciation(
     Analyze Sanskrit pronunciation from audio recording
     
     **Process:**
-    1. Transcribes audio using OpenAI Whisper
+    1. Transcribes audio with Whisper (local faster-whisper, or the OpenAI API)
     2. Identifies which shloka was recited (if reference not provided)
     3. Compares pronunciation against reference
     4. Provides detailed error analysis and suggestions
@@ -50,7 +63,7 @@ async def analyze_voice_pronunciation(
     temp_file_path = None
     
     try:
-        logger.info(f"📥 Received audio file: {audio.filename} ({audio.content_type})")
+        logger.info("📥 Received audio file: %s (%s)", audio.filename, audio.content_type)
         
         # Validate file type
         allowed_extensions = {'.wav', '.mp3', '.m4a', '.flac', '.ogg', '.webm'}
@@ -62,17 +75,18 @@ async def analyze_voice_pronunciation(
                 detail=f"Unsupported audio format: {file_ext}. Supported: {', '.join(allowed_extensions)}"
             )
         
-        # Save uploaded file to temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-            temp_file_path = temp_file.name
-            content = await audio.read()
-            temp_file.write(content)
-            logger.info(f"💾 Saved audio to temp file: {temp_file_path} ({len(content)} bytes)")
+        # Save uploaded file to temporary location (file I/O off the event loop), copying
+        # from the spooled upload in chunks rather than loading it into memory first
+        temp_file_path, size = await asyncio.to_thread(_save_temp_audio, audio.file, file_ext)
+        logger.info("💾 Saved audio to temp file: %s (%d bytes)", temp_file_path, size)
+        
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Audio file is empty")
         
         # Clean empty string to None (FastAPI forms send empty strings)
         cleaned_reference = reference_shloka if reference_shloka and reference_shloka.strip() else None
         
-        logger.info(f"🔍 Raw reference_shloka: '{reference_shloka}' | Cleaned: '{cleaned_reference}'")
+        logger.debug("🔍 Raw reference_shloka: '%s' | Cleaned: '%s'", reference_shloka, cleaned_reference)
         
         # Create request object
         request = VoiceAnalyzeRequest(reference_shloka=cleaned_reference)
@@ -83,9 +97,11 @@ async def analyze_voice_pronunciation(
             request=request
         )
         
-        logger.info(f"✅ Analysis complete - Accuracy: {result.accuracy_metrics.overall_accuracy:.2%}")
+        logger.info("✅ Analysis complete - Accuracy: %.2f%%", result.accuracy_metrics.overall_accuracy * 100)
         
-        return result
+        # Encoded once by json_bytes() (orjson over to_dict() when installed), skipping FastAPI's
+        # re-validation and jsonable_encoder pass
+        return Response(content=result.json_bytes(), media_type="application/json")
         
     except HTTPException:
         raise
@@ -97,10 +113,12 @@ async def analyze_voice_pronunciation(
         )
     finally:
         # Clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
+        if temp_file_path:
             try:
-                os.unlink(temp_file_path)
-                logger.info(f"🗑️ Cleaned up temp file: {temp_file_path}")
+                await asyncio.to_thread(os.unlink, temp_file_path)
+                logger.info("🗑️ Cleaned up temp file: %s", temp_file_path)
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 logger.warning(f"Failed to delete temp file: {str(e)}")
 
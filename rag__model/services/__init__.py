@@ -3,6 +3,8 @@
 from .llm_client import get_llm_client, LLMClient
 from .rag_client import get_rag_client, RAGClient
 from .pdf_loader import get_pdf_loader, PDFLoader
+from .response_cache import RedisResponseCache
+from .semantic_cache import SemanticCache
 
 __all__ = [
     'get_llm_client',
@@ -10,5 +12,7 @@ __all__ = [
     'get_rag_client',
     'RAGClient',
     'get_pdf_loader',
-    'PDFLoader'
+    'PDFLoader',
+    'RedisResponseCache',
+    'SemanticCache'
 ]
@@ -2,6 +2,7 @@
 Chandas identification service with multiple fallback strategies
 """
 import logging
+import threading
 from typing import Dict, Optional, Any
 import os
 import sys
@@ -13,24 +14,28 @@ class ChandasService:
     """Service for identifying Sanskrit chandas"""
     
     _chanda_instance = None
+    _chanda_lock = threading.Lock()
     
     @classmethod
     def _get_chanda_instance(cls):
         """Get or create singleton instance of Chandojñānam"""
         if cls._chanda_instance is None:
-            try:
-                # Add chanda_lib to path
-                chanda_lib_path = os.path.join(os.path.dirname(__file__), '..', 'chanda_lib')
-                if os.path.exists(chanda_lib_path) and chanda_lib_path not in sys.path:
-                    sys.path.insert(0, chanda_lib_path)
-                
-                from chanda import Chanda
-                data_path = os.path.join(chanda_lib_path, 'data')
-                cls._chanda_instance = Chanda(data_path)
-                logger.info("Chandojñānam initialized successfully")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Chandojñānam: {e}")
-                cls._chanda_instance = False  # Mark as unavailable
+            # identify_metre runs in worker threads - load the metre data only once
+            with cls._chanda_lock:
+                if cls._chanda_instance is None:
+                    try:
+                        # Add chanda_lib to path
+                        chanda_lib_path = os.path.join(os.path.dirname(__file__), '..', 'chanda_lib')
+                        if os.path.exists(chanda_lib_path) and chanda_lib_path not in sys.path:
+                            sys.path.insert(0, chanda_lib_path)
+                        
+                        from chanda import Chanda
+                        data_path = os.path.join(chanda_lib_path, 'data')
+                        cls._chanda_instance = Chanda(data_path)
+                        logger.info("Chandojñānam initialized successfully")
+                    except Exception as e:
+                        logger.warning(f"Failed to initialize Chandojñānam: {e}")
+                        cls._chanda_instance = False  # Mark as unavailable
         
         return cls._chanda_instance if cls._chanda_instance is not False else None
     
@@ -133,3 +138,17 @@ class ChandasService:
             "gana_pattern": "",
             "detected": False
         }
+
+
+# Singleton instance
+_chandas_service: Optional[ChandasService] = None
+
+
+def get_chandas_service() -> ChandasService:
+    """Get or create chandas service singleton"""
+    global _chandas_service
+    
+    if _chandas_service is None:
+        _chandas_service = ChandasService()
+    
+    return _chandas_service
@@ -3,10 +3,14 @@ LLM Client - Abstraction layer for OpenAI, Anthropic, and Gemini APIs
 """
 
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+from contextlib import aclosing
+from typing import Optional, Dict, Any, List, AsyncIterator
 from enum import Enum
 import asyncio
 
+import httpx
+
 try:
     from openai import AsyncOpenAI
     OPENAI_AVAILABLE = True
@@ -31,7 +35,14 @@ try:
 except ImportError:
     GROQ_AVAILABLE = False
 
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from config import get_settings
+from utils.cache import hash_key
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -52,41 +63,70 @@ class LLMClient:
         """Initialize LLM clients"""
         logger.info(f"🔧 Initializing LLM clients...")
         logger.info(f"🔑 GEMINI_AVAILABLE: {GEMINI_AVAILABLE}")
-        logger.info(f"🔑 Gemini API key present: {bool(settings.gemini_api_key)}")
-        logger.info(f"🔑 Gemini model: {settings.gemini_model}")
+        logger.info(f"🔑 Gemini API key present: {bool(settings.llm.gemini_api_key)}")
+        logger.info(f"🔑 Gemini model: {settings.llm.gemini_model}")
         
         self.openai_client = None
-        if OPENAI_AVAILABLE and settings.openai_api_key:
-            self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        if OPENAI_AVAILABLE and settings.llm.openai_api_key:
+            # One pooled client shared by every controller (chat, Whisper, Vision)
+            self.openai_client = AsyncOpenAI(
+                api_key=settings.llm.openai_api_key,
+                # SDK retries 429/timeouts/5xx with exponential backoff, honouring Retry-After
+                max_retries=settings.llm.openai_max_retries,
+                # HTTP/2 multiplexes concurrent requests over the kept-alive connection
+                http_client=httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+                    timeout=httpx.Timeout(60.0, connect=5.0)
+                )
+            )
             logger.info("✅ OpenAI client initialized")
         
+        # Caps in-flight OpenAI requests across all controllers to stay under the RPM/TPM tier
+        self.openai_semaphore = asyncio.Semaphore(settings.llm.openai_max_concurrency)
+        
         self.anthropic_client = None
-        if ANTHROPIC_AVAILABLE and settings.anthropic_api_key:
-            self.anthropic_client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        if ANTHROPIC_AVAILABLE and settings.llm.anthropic_api_key:
+            self.anthropic_client = AsyncAnthropic(api_key=settings.llm.anthropic_api_key)
             logger.info("✅ Anthropic client initialized")
         
         self.gemini_client = None
         self.gemini_model_name = None
-        if GEMINI_AVAILABLE and settings.gemini_api_key:
+        if GEMINI_AVAILABLE and settings.llm.gemini_api_key:
             try:
-                genai.configure(api_key=settings.gemini_api_key)
+                genai.configure(api_key=settings.llm.gemini_api_key)
                 # Remove 'models/' prefix if present
-                self.gemini_model_name = settings.gemini_model.replace('models/', '')
+                self.gemini_model_name = settings.llm.gemini_model.replace('models/', '')
                 self.gemini_client = genai.GenerativeModel(self.gemini_model_name)
                 logger.info(f"✅ Gemini client initialized with model: {self.gemini_model_name}")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize Gemini: {str(e)}")
         else:
-            logger.warning(f"⚠️ Gemini not initialized - Available: {GEMINI_AVAILABLE}, Key: {bool(settings.gemini_api_key)}")
+            logger.warning(f"⚠️ Gemini not initialized - Available: {GEMINI_AVAILABLE}, Key: {bool(settings.llm.gemini_api_key)}")
         
         self.groq_client = None
-        if GROQ_AVAILABLE and hasattr(settings, 'groq_api_key') and settings.groq_api_key:
-            self.groq_client = AsyncGroq(api_key=settings.groq_api_key)
+        if GROQ_AVAILABLE and settings.llm.groq_api_key:
+            self.groq_client = AsyncGroq(api_key=settings.llm.groq_api_key)
             logger.info("✅ Groq client initialized")
         
         self.default_provider = settings.default_llm_provider
         logger.info(f"✅ LLM Client initialized with provider: {self.default_provider}")
     
+    async def warmup(self, timeout: float = 5.0) -> None:
+        """
+        Open a pooled connection to OpenAI (DNS + TLS) before the first real request
+        
+        Failures are logged and ignored - the first request will simply connect itself.
+        """
+        if not self.openai_client:
+            return
+        
+        try:
+            await asyncio.wait_for(self.openai_client.models.list(), timeout=timeout)
+            logger.info("✅ OpenAI connection pool warmed")
+        except Exception as e:
+            logger.warning(f"⚠️ OpenAI warm-up skipped: {str(e) or type(e).__name__}")
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -138,6 +178,68 @@ class LLMClient:
             logger.error(f"LLM completion failed: {str(e)}")
             raise
     
+    async def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream chat completion text as it is generated
+        
+        OpenAI responses are streamed token by token; other providers fall back to
+        yielding the complete response once.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            provider: LLM provider (defaults to configured provider)
+            model: Specific model to use
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+            
+        Yields:
+            str: Generated text fragments
+        """
+        provider = provider or self.default_provider
+        temperature = temperature or settings.llm_temperature
+        max_tokens = max_tokens or settings.llm_max_tokens
+        
+        if provider != LLMProvider.OPENAI:
+            yield await self.chat_completion(
+                messages, provider, model, temperature, max_tokens, **kwargs
+            )
+            return
+        
+        model = model or settings.llm.openai_model
+        logger.info(f"🤖 OpenAI streaming request: {model}")
+        
+        try:
+            async with self.openai_semaphore:
+                stream = await self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    **kwargs
+                )
+                
+                # Closing the stream releases the connection if the consumer stops early
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices:
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                yield delta
+                        
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {str(e)}")
+            raise
+    
     async def _openai_completion(
         self,
         messages: List[Dict[str, str]],
@@ -147,17 +249,18 @@ class LLMClient:
         **kwargs
     ) -> str:
         """Get completion from OpenAI"""
-        model = model or settings.openai_model
+        model = model or settings.llm.openai_model
         
         logger.info(f"🤖 OpenAI request: {model}")
         
-        response = await self.openai_client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            **kwargs
-        )
+        async with self.openai_semaphore:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
         
         content = response.choices[0].message.content
         logger.info(f"✅ OpenAI response received ({len(content)} chars)")
@@ -176,18 +279,23 @@ class LLMClient:
         if not self.anthropic_client:
             raise ValueError("Anthropic API key not configured")
         
-        model = model or settings.anthropic_model
+        model = model or settings.llm.anthropic_model
         
-        # Anthropic requires system message separately
-        system_message = None
+        # Anthropic requires system message separately - each system message becomes a
+        # text block; the first (static persona prompt) is marked for prompt caching
+        system_blocks = []
         user_messages = []
         
         for msg in messages:
             if msg["role"] == "system":
-                system_message = msg["content"]
+                system_blocks.append({"type": "text", "text": msg["content"]})
             else:
                 user_messages.append(msg)
         
+        if system_blocks:
+            system_blocks[0]["cache_control"] = {"type": "ephemeral"}
+        system_message = system_blocks or None
+        
         logger.info(f"🤖 Anthropic request: {model}")
         
         response = await self.anthropic_client.messages.create(
@@ -216,16 +324,17 @@ class LLMClient:
         if not self.gemini_client:
             raise ValueError("Gemini API key not configured")
         
-        logger.info(f"🤖 Gemini request: {settings.gemini_model}")
+        logger.info(f"🤖 Gemini request: {settings.llm.gemini_model}")
         
         # Separate system and user messages
-        system_instr = None
+        system_parts = []
         user_prompts = []
         for msg in messages:
             if msg["role"] == "system" and msg["content"].strip():
-                system_instr = msg["content"]
+                system_parts.append(msg["content"])
             elif msg["role"] == "user":
                 user_prompts.append(msg["content"])
+        system_instr = "\n\n".join(system_parts) or None
         
         full_user_prompt = "\n".join(user_prompts)
         logger.info(f"🤖 Gemini: system={len(system_instr or '')} chars, user={len(full_user_prompt)} chars")
@@ -289,7 +398,7 @@ class LLMClient:
         if not self.groq_client:
             raise ValueError("Groq API key not configured")
         
-        model = model or getattr(settings, 'groq_model', 'llama-3.3-70b-versatile')
+        model = model or settings.llm.groq_model
         
         logger.info(f"🤖 Groq request: {model}")
         
@@ -311,6 +420,8 @@ class LLMClient:
         system_prompt: str,
         user_prompt: str,
         provider: Optional[str] = None,
+        json_mode: bool = False,
+        response_schema: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> str:
         """
@@ -320,17 +431,100 @@ class LLMClient:
             system_prompt: System message defining behavior
             user_prompt: User message with the actual request
             provider: LLM provider to use
+            json_mode: Ask the provider to guarantee a valid JSON object (OpenAI/Groq JSON mode)
+            response_schema: JSON schema the response must follow (OpenAI structured
+                outputs; other providers fall back to JSON mode or the prompt)
             **kwargs: Additional parameters
             
         Returns:
             str: Generated response
         """
-        messages = [
+        provider = provider or self.default_provider
+        messages = self._structured_messages(
+            system_prompt, user_prompt, provider, json_mode, response_schema, kwargs
+        )
+        
+        return await self.chat_completion(messages, provider=provider, **kwargs)
+    
+    async def fenced_json_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        provider: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> str:
+        """
+        Structured completion for prompts that return JSON in a ``` fenced block
+        
+        The response is streamed and generation is stopped as soon as the block's closing
+        fence arrives, so trailing commentary after the JSON is never generated and the
+        caller can parse while the connection would otherwise still be busy. Providers
+        that honour `response_schema` return bare JSON instead, read to the end.
+        
+        Args:
+            system_prompt: System message defining behavior
+            user_prompt: User message with the actual request
+            provider: LLM provider to use
+            response_schema: JSON schema the response must follow (see structured_completion)
+            **kwargs: Additional parameters
+            
+        Returns:
+            str: Response text up to and including the closing fence (or the full
+            response if it has no fenced block)
+        """
+        provider = provider or self.default_provider
+        messages = self._structured_messages(
+            system_prompt, user_prompt, provider, False, response_schema, kwargs
+        )
+        
+        text = ""
+        fences = 0
+        pos = 0  # scan position; a fence can straddle two chunks
+        async with aclosing(
+            self.chat_completion_stream(messages, provider=provider, **kwargs)
+        ) as stream:
+            async for chunk in stream:
+                text += chunk
+                while True:
+                    i = text.find("```", pos)
+                    if i < 0:
+                        pos = max(pos, len(text) - 2)
+                        break
+                    fences += 1
+                    pos = i + 3
+                if fences >= 2:
+                    break
+        
+        return text
+    
+    def _structured_messages(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        provider: str,
+        json_mode: bool,
+        response_schema: Optional[Dict[str, Any]],
+        kwargs: Dict[str, Any]
+    ) -> List[Dict[str, str]]:
+        """System + user messages for structured calls (adds provider options to kwargs)"""
+        if response_schema is not None and provider == LLMProvider.OPENAI:
+            # Constrained decoding: the model can only emit JSON matching the schema
+            kwargs.setdefault("response_format", {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": response_schema, "strict": True}
+            })
+        elif (json_mode or response_schema is not None) and provider in (LLMProvider.OPENAI, LLMProvider.GROQ):
+            kwargs.setdefault("response_format", {"type": "json_object"})
+        if provider == LLMProvider.OPENAI:
+            # Requests sharing a system prompt are routed to the same prompt-cache shard,
+            # so the static prefix is prefilled once rather than per request
+            kwargs.setdefault("prompt_cache_key", hash_key(system_prompt).hex())
+        
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        return await self.chat_completion(messages, provider=provider, **kwargs)
     
     async def load_prompt_file(self, filepath: str) -> str:
         """
@@ -357,6 +551,7 @@ class LLMClient:
 
 # Singleton instance
 _llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
 
 
 def get_llm_client() -> LLMClient:
@@ -364,6 +559,8 @@ def get_llm_client() -> LLMClient:
     global _llm_client
     
     if _llm_client is None:
-        _llm_client = LLMClient()
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
     
     return _llm_client
@@ -45,31 +45,31 @@ class LLMClient:
         """Initialize LLM clients"""
         logger.info(f"🔧 Initializing LLM clients...")
         logger.info(f"🔑 GEMINI_AVAILABLE: {GEMINI_AVAILABLE}")
-        logger.info(f"🔑 Gemini API key present: {bool(settings.gemini_api_key)}")
-        logger.info(f"🔑 Gemini model: {settings.gemini_model}")
+        logger.info(f"🔑 Gemini API key present: {bool(settings.llm.gemini_api_key)}")
+        logger.info(f"🔑 Gemini model: {settings.llm.gemini_model}")
         
         self.openai_client = None
-        if OPENAI_AVAILABLE and settings.openai_api_key:
-            self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        if OPENAI_AVAILABLE and settings.llm.openai_api_key:
+            self.openai_client = AsyncOpenAI(api_key=settings.llm.openai_api_key)
             logger.info("✅ OpenAI client initialized")
         
         self.anthropic_client = None
-        if ANTHROPIC_AVAILABLE and settings.anthropic_api_key:
-            self.anthropic_client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        if ANTHROPIC_AVAILABLE and settings.llm.anthropic_api_key:
+            self.anthropic_client = AsyncAnthropic(api_key=settings.llm.anthropic_api_key)
             logger.info("✅ Anthropic client initialized")
         
         self.gemini_client = None
-        if GEMINI_AVAILABLE and settings.gemini_api_key:
+        if GEMINI_AVAILABLE and settings.llm.gemini_api_key:
             try:
-                genai.configure(api_key=settings.gemini_api_key)
+                genai.configure(api_key=settings.llm.gemini_api_key)
                 # Remove 'models/' prefix if present
-                model_name = settings.gemini_model.replace('models/', '')
+                model_name = settings.llm.gemini_model.replace('models/', '')
                 self.gemini_client = genai.GenerativeModel(model_name)
                 logger.info(f"✅ Gemini client initialized with model: {model_name}")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize Gemini: {str(e)}")
         else:
-            logger.warning(f"⚠️ Gemini not initialized - Available: {GEMINI_AVAILABLE}, Key: {bool(settings.gemini_api_key)}")
+            logger.warning(f"⚠️ Gemini not initialized - Available: {GEMINI_AVAILABLE}, Key: {bool(settings.llm.gemini_api_key)}")
         
         self.default_provider = settings.default_llm_provider
         logger.info(f"✅ LLM Client initialized with provider: {self.default_provider}")
@@ -130,7 +130,7 @@ class LLMClient:
         **kwargs
     ) -> str:
         """Get completion from OpenAI"""
-        model = model or settings.openai_model
+        model = model or settings.llm.openai_model
         
         logger.info(f"🤖 OpenAI request: {model}")
         
@@ -159,7 +159,7 @@ class LLMClient:
         if not self.anthropic_client:
             raise ValueError("Anthropic API key not configured")
         
-        model = model or settings.anthropic_model
+        model = model or settings.llm.anthropic_model
         
         # Anthropic requires system message separately
         system_message = None
@@ -199,7 +199,7 @@ class LLMClient:
         if not self.gemini_client:
             raise ValueError("Gemini API key not configured")
         
-        logger.info(f"🤖 Gemini request: {settings.gemini_model}")
+        logger.info(f"🤖 Gemini request: {settings.llm.gemini_model}")
         
         # Combine messages into a single prompt for Gemini
         prompt_parts = []
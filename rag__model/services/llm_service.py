@@ -3,7 +3,8 @@ LLM service for enhanced chandas analysis
 """
 import logging
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
@@ -72,3 +73,29 @@ class LLMService:
         except Exception as e:
             logger.error(f"Error in LLM analysis: {str(e)}")
             return f"LLM analysis unavailable: {str(e)}"
+
+
+# Singleton instance
+_llm_service: Optional[LLMService] = None
+_llm_service_lock = threading.Lock()
+
+
+def get_llm_service() -> Optional[LLMService]:
+    """
+    Get or create LLM service singleton
+    
+    Returns:
+        LLMService, or None when OPENAI_API_KEY is not configured
+    """
+    global _llm_service
+    
+    if _llm_service is None:
+        # Sync dependencies run in the threadpool - build one OpenAI client, not one per thread
+        with _llm_service_lock:
+            if _llm_service is None:
+                try:
+                    _llm_service = LLMService()
+                except ValueError as e:
+                    logger.debug(f"LLM analysis not available: {e}")
+    
+    return _llm_service
@@ -2,19 +2,44 @@
 RAG Client - Qdrant vector database operations
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
 import uuid
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import (
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams
+)
 
 from config import get_settings
+from utils.cache import LRUCache, hash_key
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Index layout for every collection: HNSW graph plus int8 scalar-quantized vectors kept
+# in RAM (4x smaller than float32, so the index stays memory-resident as it grows)
+_HNSW_CONFIG = HnswConfigDiff(m=16, ef_construct=200)
+_QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+)
+
+# Searches walk the quantized graph, then rescore the candidates with the original
+# vectors so recall matches an unquantized search
+_SEARCH_PARAMS = SearchParams(hnsw_ef=64, quantization=QuantizationSearchParams(rescore=True))
+
 # Try to import sentence-transformers for local embeddings
 try:
     from sentence_transformers import SentenceTransformer
@@ -29,6 +54,13 @@ class RAGClient:
     
     def __init__(self):
         """Initialize Qdrant client and embedding model"""
+        self._query_embeddings = LRUCache(maxsize=1024)
+        
+        # search_batched() queue: (collection, query text, limit, score threshold, future)
+        self._pending_searches: List[Tuple[str, str, int, float, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        
         try:
             self.client = QdrantClient(
                 host=settings.qdrant_host,
@@ -92,28 +124,36 @@ class RAGClient:
                         logger.warning(f"⚠️ Collection {collection_name} has wrong vector size ({existing_size} vs {vector_size})")
                         logger.info(f"🔄 Recreating collection {collection_name} with correct size...")
                         self.client.delete_collection(collection_name)
-                        self.client.create_collection(
+                        self._create_collection(collection_name, vector_size)
+                        logger.info(f"✅ Recreated collection: {collection_name}")
+                    elif collection_info.config.quantization_config is None:
+                        # Collections created before quantization was enabled
+                        self.client.update_collection(
                             collection_name=collection_name,
-                            vectors_config=VectorParams(
-                                size=vector_size,
-                                distance=Distance.COSINE
-                            )
+                            hnsw_config=_HNSW_CONFIG,
+                            quantization_config=_QUANTIZATION_CONFIG
                         )
-                        logger.info(f"✅ Recreated collection: {collection_name}")
+                        logger.info(f"📦 Collection exists: {collection_name} (enabled int8 quantization)")
                     else:
                         logger.info(f"📦 Collection exists: {collection_name}")
                 else:
-                    self.client.create_collection(
-                        collection_name=collection_name,
-                        vectors_config=VectorParams(
-                            size=vector_size,
-                            distance=Distance.COSINE
-                        )
-                    )
+                    self._create_collection(collection_name, vector_size)
                     logger.info(f"📦 Created collection: {collection_name}")
             except Exception as e:
                 logger.warning(f"Could not create collection {collection_name}: {str(e)}")
     
+    def _create_collection(self, collection_name: str, vector_size: int) -> None:
+        """Create a cosine-distance collection with the shared HNSW / quantization layout"""
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE
+            ),
+            hnsw_config=_HNSW_CONFIG,
+            quantization_config=_QUANTIZATION_CONFIG
+        )
+    
     def _generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding vector for text using local model
@@ -126,11 +166,11 @@ class RAGClient:
         """
         if self.embedding_model:
             try:
-                logger.info(f"🧠 Encoding text: '{text[:100]}...'")
+                logger.info("🧠 Encoding text: '%.100s...'", text)
                 # Generate embedding locally (no API calls!)
                 embedding = self.embedding_model.encode(text, convert_to_tensor=False)
                 embedding_list = embedding.tolist()
-                logger.info(f"✅ Generated {len(embedding_list)}-dim embedding")
+                logger.info("✅ Generated %d-dim embedding", len(embedding_list))
                 return embedding_list
             except Exception as e:
                 logger.error(f"❌ Failed to generate embedding: {str(e)}", exc_info=True)
@@ -140,6 +180,77 @@ class RAGClient:
             logger.warning("⚠️ No embedding model loaded - using dummy vector!")
             return [0.0] * self.vector_size
     
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for several texts in one model call
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            List of embedding vectors, in order
+        """
+        if self.embedding_model:
+            try:
+                embeddings = self.embedding_model.encode(texts, convert_to_tensor=False)
+                return [embedding.tolist() for embedding in embeddings]
+            except Exception as e:
+                logger.error(f"❌ Failed to generate embeddings: {str(e)}", exc_info=True)
+        else:
+            logger.warning("⚠️ No embedding model loaded - using dummy vectors!")
+        return [[0.0] * self.vector_size for _ in texts]
+    
+    async def embed_queries(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Embeddings of several search queries - memoized ones are reused and the rest are
+        encoded together in one batch
+        
+        Args:
+            texts: Query texts
+            
+        Returns:
+            List of embedding vectors, in order
+        """
+        keys = [hash_key(" ".join(text.split())) for text in texts]
+        embeddings = [self._query_embeddings.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = await asyncio.to_thread(self._generate_embeddings, [texts[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+                if any(embedding):  # don't memoize the dummy / failed-encode zero vector
+                    self._query_embeddings.set(keys[i], embedding)
+        return embeddings
+    
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Embedding of a search query, memoized so repeated queries skip the model
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            List[float]: Embedding vector
+        """
+        key = hash_key(" ".join(text.split()))
+        embedding = self._query_embeddings.get(key)
+        if embedding is None:
+            embedding = await asyncio.to_thread(self._generate_embedding, text)
+            if any(embedding):  # don't memoize the dummy / failed-encode zero vector
+                self._query_embeddings.set(key, embedding)
+        return embedding
+    
+    def warmup(self) -> None:
+        """Run one embedding so model weights and kernels are loaded before the first search"""
+        if not self.embedding_model:
+            return
+        
+        try:
+            self.embedding_model.encode("warmup", convert_to_tensor=False)
+            logger.info("✅ Embedding model warmed")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding warm-up skipped: {str(e)}")
+    
     async def add_document(
         self,
         collection: str,
@@ -221,14 +332,14 @@ class RAGClient:
             
             # Generate embedding from query text if not provided
             if query_embedding is None and query_text:
-                logger.info(f"🔍 Generating embedding for query: {query_text[:50]}...")
-                query_embedding = self._generate_embedding(query_text)
+                logger.info("🔍 Generating embedding for query: %.50s...", query_text)
+                query_embedding = await self.embed_query(query_text)
                 logger.debug(f"Query embedding: {len(query_embedding)} dimensions")
             elif query_embedding is None:
                 raise ValueError("Either query_text or query_embedding must be provided")
             
             # Check collection stats first
-            collection_info = self.client.get_collection(collection_name)
+            collection_info = await asyncio.to_thread(self.client.get_collection, collection_name)
             points_count = collection_info.points_count
             logger.info(f"📊 Collection {collection_name} has {points_count} points")
             
@@ -238,12 +349,16 @@ class RAGClient:
             
             logger.info(f"🔎 Executing search with limit={limit}, threshold={score_threshold}")
             
-            results = self.client.query_points(
+            # Blocking Qdrant call runs in a worker thread so concurrent searches overlap
+            response = await asyncio.to_thread(
+                self.client.query_points,
                 collection_name=collection_name,
                 query=query_embedding,
                 limit=limit,
-                score_threshold=score_threshold
-            ).points
+                score_threshold=score_threshold,
+                search_params=_SEARCH_PARAMS
+            )
+            results = response.points
             
             logger.info(f"📝 Qdrant search completed. Results type: {type(results)}, Length: {len(results)}")
             
@@ -256,13 +371,7 @@ class RAGClient:
             documents = []
             for idx, result in enumerate(results):
                 logger.info(f"Result {idx+1}: ID={result.id}, Score={result.score}")
-                doc = {
-                    "id": result.id,
-                    "score": result.score,
-                    "content": result.payload.get("content", ""),
-                    "metadata": {k: v for k, v in result.payload.items() if k != "content"}
-                }
-                documents.append(doc)
+                documents.append(self._to_document(result))
             
             logger.info(f"🔍 Returning {len(documents)} documents from {collection_name}")
             return documents
@@ -271,6 +380,176 @@ class RAGClient:
             logger.error(f"Search failed: {str(e)}")
             raise
     
+    async def search_batched(
+        self,
+        collection: str,
+        query_text: str,
+        limit: int = 5,
+        score_threshold: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents, coalescing with concurrent searches
+        
+        Searches arriving within `rag_batch_ms` of each other (up to `rag_batch_size`)
+        are embedded in one model call and sent as one Qdrant batch query per
+        collection; identical searches in a batch share a single query.
+        
+        Args:
+            collection: Collection name
+            query_text: Query text (will be embedded)
+            limit: Maximum number of results
+            score_threshold: Minimum similarity score
+            
+        Returns:
+            List of matching documents with scores
+        """
+        if not self.client:
+            logger.warning("⚠️ Qdrant not available - skipping search")
+            return []
+        
+        collection_name = str(collection.value) if hasattr(collection, 'value') else str(collection)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_searches.append((collection_name, query_text, limit, score_threshold, future))
+        
+        if len(self._pending_searches) >= settings.rag_batch_size:
+            self._flush_searches()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(settings.rag_batch_ms / 1000, self._flush_searches)
+        
+        # Deduplicated callers share the result - each gets its own list
+        return list(await future)
+    
+    def _flush_searches(self) -> None:
+        """Send the pending searches as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending_searches = self._pending_searches, []
+        task = asyncio.ensure_future(self._run_search_batch(batch))
+        self._batch_tasks.add(task)  # keep a reference until it finishes
+        task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _run_search_batch(self, batch: List[Tuple[str, str, int, float, asyncio.Future]]) -> None:
+        """Embed and run a batch of searches, resolving each caller's future"""
+        texts: Dict[bytes, str] = {}
+        queries: Dict[Tuple[str, bytes, int, float], List[asyncio.Future]] = {}
+        for collection_name, query_text, limit, score_threshold, future in batch:
+            text_key = hash_key(" ".join(query_text.split()))
+            texts.setdefault(text_key, query_text)
+            queries.setdefault((collection_name, text_key, limit, score_threshold), []).append(future)
+        
+        def _resolve(futures: List[asyncio.Future], result: Any = None, error: Optional[Exception] = None) -> None:
+            for future in futures:
+                if future.done():  # caller went away
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        
+        try:
+            embeddings = dict(zip(texts, await self.embed_queries(list(texts.values()))))
+        except Exception as e:
+            logger.error(f"Batched search embedding failed: {str(e)}")
+            for futures in queries.values():
+                _resolve(futures, error=e)
+            return
+        
+        by_collection: Dict[str, List[Tuple[str, bytes, int, float]]] = {}
+        for query in queries:
+            by_collection.setdefault(query[0], []).append(query)
+        
+        async def _query(collection_name: str, collection_queries: List[Tuple[str, bytes, int, float]]) -> None:
+            try:
+                responses = await asyncio.to_thread(
+                    self.client.query_batch_points,
+                    collection_name=collection_name,
+                    requests=[
+                        QueryRequest(
+                            query=embeddings[text_key],
+                            limit=limit,
+                            score_threshold=score_threshold,
+                            params=_SEARCH_PARAMS,
+                            with_payload=True
+                        )
+                        for _, text_key, limit, score_threshold in collection_queries
+                    ]
+                )
+            except Exception as e:
+                logger.error(f"Batched search in {collection_name} failed: {str(e)}")
+                for query in collection_queries:
+                    _resolve(queries[query], error=e)
+                return
+            
+            for query, response in zip(collection_queries, responses):
+                _resolve(queries[query], [self._to_document(point) for point in response.points])
+        
+        logger.info("🔎 Batched %d searches (%d unique) over %d collection(s)", len(batch), len(queries), len(by_collection))
+        await asyncio.gather(*[_query(name, qs) for name, qs in by_collection.items()])
+    
+    @staticmethod
+    def _to_document(point) -> Dict[str, Any]:
+        """Convert a Qdrant scored point into the document dict returned by searches"""
+        document = {
+            "id": point.id,
+            "score": point.score,
+            "content": point.payload.get("content", ""),
+            "metadata": {k: v for k, v in point.payload.items() if k != "content"}
+        }
+        if point.vector is not None:
+            document["vector"] = point.vector
+        return document
+    
+    async def search_multi(
+        self,
+        collections: Sequence[Tuple[str, int]],
+        query_text: str,
+        score_threshold: float = 0.0,
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search several collections with one query embedding
+        
+        The query is embedded once and the per-collection ANN queries run concurrently.
+        A collection whose search fails contributes an empty list (the failure is logged).
+        
+        Args:
+            collections: (collection name, limit) pairs
+            query_text: Query text (embedded once for all collections)
+            score_threshold: Minimum similarity score
+            with_vectors: Include each document's stored embedding under "vector"
+            
+        Returns:
+            One list of matching documents per requested collection, in order
+        """
+        if not self.client:
+            logger.warning("⚠️ Qdrant not available - skipping search")
+            return [[] for _ in collections]
+        
+        logger.info("🔍 Generating embedding for multi-collection query: %.50s...", query_text)
+        query_embedding = await self.embed_query(query_text)
+        
+        async def _search(collection: str, limit: int) -> List[Dict[str, Any]]:
+            collection_name = str(collection.value) if hasattr(collection, 'value') else str(collection)
+            try:
+                response = await asyncio.to_thread(
+                    self.client.query_points,
+                    collection_name=collection_name,
+                    query=query_embedding,
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_vectors=with_vectors,
+                    search_params=_SEARCH_PARAMS
+                )
+            except Exception as e:
+                logger.warning(f"Search in {collection_name} failed: {str(e)}")
+                return []
+            return [self._to_document(point) for point in response.points]
+        
+        return await asyncio.gather(*[_search(collection, limit) for collection, limit in collections])
+    
     async def update_document(
         self,
         collection: str,
@@ -388,6 +667,7 @@ class RAGClient:
 
 # Singleton instance
 _rag_client: Optional[RAGClient] = None
+_rag_client_lock = threading.Lock()
 
 
 def get_rag_client() -> RAGClient:
@@ -395,6 +675,10 @@ def get_rag_client() -> RAGClient:
     global _rag_client
     
     if _rag_client is None:
-        _rag_client = RAGClient()
+        # Concurrent first requests (sync dependencies run in the threadpool) must not
+        # each load their own embedding model and Qdrant connection
+        with _rag_client_lock:
+            if _rag_client is None:
+                _rag_client = RAGClient()
     
     return _rag_client
@@ -0,0 +1,83 @@
+"""
+Response Cache - Redis-backed response cache shared across workers
+"""
+
+import logging
+from typing import Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# A slow or unreachable Redis must degrade to a cache miss, not stall the request
+_SOCKET_TIMEOUT = 0.5
+
+_redis = None
+
+
+def _get_redis():
+    """Shared Redis connection pool (from_url connects lazily, on first command)"""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+            socket_timeout=_SOCKET_TIMEOUT,
+            socket_connect_timeout=_SOCKET_TIMEOUT
+        )
+    return _redis
+
+
+class RedisResponseCache:
+    """
+    Serialized responses in Redis, keyed by the same digests as the in-process cache
+    
+    Enabled only when `redis` is installed and REDIS_URL is set. Redis errors are
+    logged and treated as misses / dropped writes.
+    """
+    
+    def __init__(self, namespace: str, ttl: Optional[int] = None):
+        self.prefix = f"svaram:{namespace}:".encode('utf-8')
+        self.ttl = ttl or settings.response_cache_ttl
+        self.enabled = REDIS_AVAILABLE and bool(settings.redis_url)
+    
+    async def get(self, key: bytes) -> Optional[bytes]:
+        """
+        Look up a serialized response
+        
+        Args:
+            key: Cache key digest
+        
+        Returns:
+            Stored bytes or None
+        """
+        if not self.enabled:
+            return None
+        try:
+            return await _get_redis().get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis cache read failed: {str(e)}")
+            return None
+    
+    async def set(self, key: bytes, value: bytes, ttl: Optional[int] = None) -> None:
+        """
+        Store a serialized response (an existing entry is kept)
+        
+        Args:
+            key: Cache key digest
+            value: Serialized response
+            ttl: Expiry in seconds (defaults to the cache's ttl)
+        """
+        if not self.enabled:
+            return
+        try:
+            await _get_redis().set(self.prefix + key, value, ex=ttl or self.ttl, nx=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis cache write failed: {str(e)}")
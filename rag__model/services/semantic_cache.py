@@ -0,0 +1,212 @@
+"""
+Semantic Cache - Exact-match and embedding-similarity response cache for LLM endpoints
+"""
+
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple, Type
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from config import get_settings
+from models import CachedJSONModel
+from services.rag_client import get_rag_client
+from services.response_cache import RedisResponseCache
+from utils.cache import LRUCache, hash_key
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class SemanticCache:
+    """
+    Two-tier response cache
+    
+    1. Exact tier: LRU keyed on a hash of (scope, normalized query)
+    2. Semantic tier: cosine similarity between query embeddings within the same scope,
+       enabled only when the local embedding model (and NumPy) is available
+    
+    The semantic tier indexes embeddings with random-hyperplane LSH: each of `lsh_tables`
+    tables hashes a vector to the signs of `lsh_bits` projections, and a lookup only
+    compares against entries sharing a bucket in at least one table.
+    
+    Given a `shared` Redis cache and the response `model`, the exact tier is backed by
+    Redis (L2): misses fall through to it and puts write through, so workers share hits.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 512,
+        threshold: Optional[float] = None,
+        semantic_maxsize: int = 256,
+        lsh_bits: Optional[int] = None,
+        lsh_tables: Optional[int] = None,
+        shared: Optional[RedisResponseCache] = None,
+        model: Optional[Type[CachedJSONModel]] = None
+    ):
+        self.threshold = settings.semantic_cache_threshold if threshold is None else threshold
+        self.semantic_maxsize = semantic_maxsize
+        self.lsh_bits = lsh_bits or settings.semantic_cache_lsh_bits
+        self.lsh_tables = lsh_tables or settings.semantic_cache_lsh_tables
+        self._exact = LRUCache(maxsize=maxsize)
+        self._vectors: "OrderedDict[bytes, Tuple[str, Any, Tuple[bytes, ...]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, str, bytes], Set[bytes]] = {}
+        self._planes = None  # (tables, bits, dim) projections, created once the dimension is known
+        self.shared = shared if shared is not None and shared.enabled and model is not None else None
+        self.model = model
+        self.rag_client = get_rag_client()
+    
+    @property
+    def semantic_enabled(self) -> bool:
+        """Semantic tier needs real embeddings - dummy zero vectors would match nothing"""
+        return NUMPY_AVAILABLE and getattr(self.rag_client, "embedding_model", None) is not None
+    
+    @staticmethod
+    def _normalize(query: str) -> str:
+        """
+        Collapse Unicode forms (e.g. precomposed vs. nukta-sign Devanagari), whitespace
+        and case so trivially different queries share a key
+        """
+        return " ".join(unicodedata.normalize("NFKC", query).split()).lower()
+    
+    async def _embed(self, query: str) -> Optional[Any]:
+        """
+        Unit-length query embedding
+        
+        Goes through the RAG client's memoized embed_query, so a cache miss followed by a
+        knowledge-base search for the same text encodes it only once.
+        """
+        vector = np.asarray(await self.rag_client.embed_query(query), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+    
+    def _lsh_codes(self, vector: Any) -> Tuple[bytes, ...]:
+        """Bucket code of a vector in each LSH table"""
+        if self._planes is None:
+            rng = np.random.default_rng(0)
+            self._planes = rng.standard_normal(
+                (self.lsh_tables, self.lsh_bits, vector.shape[0])
+            ).astype(np.float32)
+        signs = (self._planes @ vector) > 0
+        return tuple(np.packbits(row).tobytes() for row in signs)
+    
+    async def prefetch(self, query: str) -> None:
+        """
+        Compute (and memoize) the query embedding ahead of a later get()/put()
+        
+        Lets callers overlap the embedding with other work. Best-effort: a failure here
+        just leaves the embedding to be computed by get().
+        
+        Args:
+            query: User query
+        """
+        if not self.semantic_enabled:
+            return
+        try:
+            await self._embed(query)
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding prefetch failed: {str(e)}")
+    
+    async def get(self, query: str, scope: str = "") -> Optional[Any]:
+        """
+        Look up a cached response
+        
+        Args:
+            query: User query
+            scope: Context the response depends on besides the query (persona, history, ...)
+        
+        Returns:
+            Cached value or None
+        """
+        key = hash_key(scope, self._normalize(query))
+        
+        value = self._exact.get(key)
+        if value is not None:
+            logger.info("⚡ Response cache hit (exact)")
+            return value
+        
+        if self.shared is not None:
+            data = await self.shared.get(key)
+            if data is not None:
+                try:
+                    value = self.model.from_json_bytes(data)
+                except ValueError as e:
+                    logger.warning(f"⚠️ Discarding unreadable shared cache entry: {str(e)}")
+                else:
+                    logger.info("⚡ Response cache hit (shared)")
+                    self._exact.set(key, value)
+                    return value
+        
+        if not self.semantic_enabled or not self._vectors:
+            return None
+        
+        vector = await self._embed(query)
+        if vector is None:
+            return None
+        
+        candidates = set()
+        for table, code in enumerate(self._lsh_codes(vector)):
+            candidates.update(self._buckets.get((table, scope, code), ()))
+        
+        best_key, best_score = None, self.threshold
+        for cached_key in candidates:
+            score = float(np.dot(vector, self._vectors[cached_key][1]))
+            if score >= best_score:
+                best_key, best_score = cached_key, score
+        
+        if best_key is None:
+            return None
+        
+        value = self._exact.get(best_key)
+        if value is not None:
+            logger.info("⚡ Response cache hit (semantic, cosine=%.3f)", best_score)
+        return value
+    
+    async def put(self, query: str, value: Any, scope: str = "") -> None:
+        """
+        Store a response
+        
+        Args:
+            query: User query
+            value: Response to cache
+            scope: Same scope string passed to get()
+        """
+        key = hash_key(scope, self._normalize(query))
+        self._exact.set(key, value)
+        
+        if self.shared is not None:
+            await self.shared.set(key, value.json_bytes())
+        
+        if not self.semantic_enabled:
+            return
+        
+        vector = await self._embed(query)
+        if vector is None:
+            return
+        
+        codes = self._lsh_codes(vector)
+        self._vectors[key] = (scope, vector, codes)
+        self._vectors.move_to_end(key)
+        for table, code in enumerate(codes):
+            self._buckets.setdefault((table, scope, code), set()).add(key)
+        
+        if len(self._vectors) > self.semantic_maxsize:
+            evicted_key, (evicted_scope, _, evicted_codes) = self._vectors.popitem(last=False)
+            for table, code in enumerate(evicted_codes):
+                bucket = self._buckets[(table, evicted_scope, code)]
+                bucket.discard(evicted_key)
+                if not bucket:
+                    del self._buckets[(table, evicted_scope, code)]
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._exact.clear()
+        self._vectors.clear()
+        self._buckets.clear()
@@ -0,0 +1,59 @@
+"""
+Tests for CachedJSONModel's memoized encoding on chat cache hits
+"""
+
+import asyncio
+
+import orjson
+
+from models import ChatResponse
+from services.semantic_cache import SemanticCache
+
+
+def _response(input_detected: str) -> ChatResponse:
+    return ChatResponse(
+        response="Anushtup has 8 syllables per quarter.",
+        input_detected=input_detected,
+        sources=["Chandas Shastra"],
+        confidence=0.9,
+        suggestions=[]
+    )
+
+
+def test_model_copy_drops_memoized_encoding():
+    original = _response("Hello World")
+    original.json_bytes()
+    
+    copy = original.model_copy(update={"input_detected": "new q"})
+    
+    assert orjson.loads(copy.json_bytes())["input_detected"] == "new q"
+    assert orjson.loads(original.json_bytes())["input_detected"] == "Hello World"
+
+
+def test_shared_cache_entry_copy_reencodes():
+    # Redis hits are rebuilt with from_json_bytes, which pre-sets the encoding
+    cached = ChatResponse.from_json_bytes(_response("Hello World").json_bytes())
+    
+    copy = cached.model_copy(update={"input_detected": "new q"})
+    
+    assert orjson.loads(copy.json_bytes())["input_detected"] == "new q"
+
+
+def test_cache_hit_reencodes_new_input_detected():
+    cache = SemanticCache(maxsize=8)
+    
+    async def serve(query: str) -> bytes:
+        # Mirrors ChatbotController: a hit is served as a copy carrying the new query
+        cached = await cache.get(query)
+        if cached is None:
+            response = _response(query)
+            await cache.put(query, response)
+        else:
+            response = cached.model_copy(update={"input_detected": query})
+        return response.json_bytes()
+    
+    first = asyncio.run(serve("Hello World"))
+    second = asyncio.run(serve("hello   world"))
+    
+    assert orjson.loads(first)["input_detected"] == "Hello World"
+    assert orjson.loads(second)["input_detected"] == "hello   world"
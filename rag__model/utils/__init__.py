@@ -13,10 +13,13 @@ from .text_cleaner import (
 
 from .splitter import SanskritSplitter, get_splitter
 
+from .cache import LRUCache, SingleFlight, hash_key
+
 from .helpers import (
     format_timestamp,
     truncate_text,
     extract_json_from_text,
+    extract_json,
     sanitize_filename,
     validate_sanskrit_text,
     chunk_text,
@@ -25,6 +28,7 @@ from .helpers import (
     safe_divide,
     count_words,
     get_file_extension,
+    load_prompt,
     ProgressTracker
 )
 
@@ -41,10 +45,15 @@ __all__ = [
     # splitter
     'SanskritSplitter',
     'get_splitter',
+    # cache
+    'LRUCache',
+    'SingleFlight',
+    'hash_key',
     # helpers
     'format_timestamp',
     'truncate_text',
     'extract_json_from_text',
+    'extract_json',
     'sanitize_filename',
     'validate_sanskrit_text',
     'chunk_text',
@@ -53,5 +62,6 @@ __all__ = [
     'safe_divide',
     'count_words',
     'get_file_extension',
+    'load_prompt',
     'ProgressTracker'
 ]
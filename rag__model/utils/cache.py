@@ -0,0 +1,95 @@
+"""
+In-process caching utilities for LLM-backed endpoints
+"""
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def hash_key(*parts: str) -> bytes:
+    """
+    Build a compact cache key from one or more text parts
+    
+    Args:
+        *parts: Text values identifying the request
+    
+    Returns:
+        16-byte BLAKE2b digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\x00')
+    return h.digest()
+
+
+class LRUCache:
+    """Bounded least-recently-used cache"""
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value (marking it recently used) or None"""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return None
+        return self._data[key]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value, evicting the least recently used entry when full"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution
+    
+    The first caller starts the work as a task; callers arriving while it runs await
+    the same task instead of repeating it. The work is shielded, so a caller being
+    cancelled (e.g. client disconnect) doesn't cancel it for the others.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `work()` unless a call with the same key is already in flight
+        
+        Args:
+            key: Identity of the call
+            work: Zero-argument coroutine function doing the actual work
+        
+        Returns:
+            Result of the (possibly shared) call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._discard(key, t))
+        return await asyncio.shield(task)
+    
+    def _discard(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
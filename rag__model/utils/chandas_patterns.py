@@ -4,6 +4,16 @@ Chandas pattern detection without LLM - pure algorithmic approach.
 import re
 from typing import Dict, List, Tuple, Any
 
+_PUNCT_SPACE_RE = re.compile(r'[।॥\n\r\s]+')
+
+# Character classes for syllable scanning
+_HALANT = '्'
+_DEPENDENT_SIGNS = frozenset('ािीुूृॄेैोौंः')
+_CLUSTER_STOPS = _DEPENDENT_SIGNS | frozenset('।॥')
+# Marks that make a syllable Guru: long vowels (independent and dependent), halant
+# (conjunct), anusvara and visarga
+_GURU_MARKS = frozenset('आईऊएऐओऔाीूेैोौ्ंः')
+
 
 # Syllable patterns for common meters
 CHANDAS_PATTERNS = {
@@ -49,30 +59,28 @@ CHANDAS_PATTERNS = {
 def split_into_syllables(text: str) -> List[str]:
     """Split Sanskrit text into syllables with improved handling."""
     # Remove punctuation, newlines, and normalize
-    text = re.sub(r'[।॥\n\r\s]+', '', text)
+    text = _PUNCT_SPACE_RE.sub('', text)
     
     syllables = []
+    n = len(text)
     i = 0
     
-    while i < len(text):
-        syllable = text[i]
+    # Scan for syllable boundaries and slice once per syllable (no per-character concatenation)
+    while i < n:
+        start = i
         i += 1
         
         # Handle dependent vowel signs
-        while i < len(text) and text[i] in 'ािीुूृॄेैोौंः':
-            syllable += text[i]
+        while i < n and text[i] in _DEPENDENT_SIGNS:
             i += 1
         
         # Handle halant/virama (्) and following consonant cluster
-        while i < len(text) and text[i] == '्':
-            syllable += text[i]
+        while i < n and text[i] == _HALANT:
             i += 1
-            if i < len(text) and text[i] not in 'ािीुूृॄेैोौंः।॥':
-                syllable += text[i]
+            if i < n and text[i] not in _CLUSTER_STOPS:
                 i += 1
         
-        if syllable:  # Only add non-empty syllables
-            syllables.append(syllable)
+        syllables.append(text[start:i])
     
     return syllables
 
@@ -88,18 +96,8 @@ def classify_syllable(syllable: str, is_line_end: bool = False) -> str:
     if is_line_end:
         return "G"
     
-    # Long vowels
-    long_vowels = ['आ', 'ई', 'ऊ', 'ए', 'ऐ', 'ओ', 'औ', 'ा', 'ी', 'ू', 'े', 'ै', 'ो', 'ौ']
-    for v in long_vowels:
-        if v in syllable:
-            return "G"
-    
-    # Conjunct consonants (halant present)
-    if '्' in syllable:
-        return "G"
-    
-    # Anusvara or Visarga
-    if 'ं' in syllable or 'ः' in syllable:
+    # Long vowel, conjunct (halant), anusvara or visarga - one set lookup per character
+    if not _GURU_MARKS.isdisjoint(syllable):
         return "G"
     
     # Default: Laghu for short vowels
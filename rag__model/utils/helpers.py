@@ -3,12 +3,25 @@ Helper utilities for Sanskrit AI backend
 """
 
 import re
+import json
 import logging
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+# Last-resort span for extract_json: first '{' to last '}'
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+_JSON_BLOCK_PATTERNS = (
+    re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL),
+    re.compile(r'```\s*(\{.*?\})\s*```', re.DOTALL),
+    re.compile(r'(\{.*?\})', re.DOTALL)
+)
+_INVALID_FILENAME_RE = re.compile(r'[<>:"/\\|?*]')
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]')
+
 
 def format_timestamp(dt: Optional[datetime] = None) -> str:
     """
@@ -53,20 +66,49 @@ def extract_json_from_text(text: str) -> Optional[str]:
         Extracted JSON string or None
     """
     # Try to find JSON in code blocks
-    json_patterns = [
-        r'```json\s*(\{.*?\})\s*```',
-        r'```\s*(\{.*?\})\s*```',
-        r'(\{.*?\})'
-    ]
-    
-    for pattern in json_patterns:
-        match = re.search(pattern, text, re.DOTALL)
+    for pattern in _JSON_BLOCK_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1).strip()
     
     return None
 
 
+def extract_json(text: str) -> Dict[str, Any]:
+    """
+    Parse the first JSON object in an LLM response
+    
+    Looks inside the first ``` fenced block when there is one, then decodes from the
+    first '{' with a single linear scan that stops where the object ends. Only if that
+    fails does it fall back to the widest '{...}' span of the whole text.
+    
+    Args:
+        text: Response text containing a JSON object
+        
+    Returns:
+        Parsed object
+        
+    Raises:
+        ValueError: No JSON object found, or it is malformed
+    """
+    _, fence, fenced = text.partition("```")
+    body = fenced if fence else text
+    
+    start = body.find("{")
+    if start >= 0:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(body, start)
+            return obj
+        except json.JSONDecodeError:
+            pass
+    
+    # e.g. a "```" inside a string value cut the object apart
+    match = _JSON_OBJ_RE.search(text)
+    if match is None:
+        raise ValueError("No JSON object found in text")
+    return json.loads(match.group())
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename by removing invalid characters
@@ -78,7 +120,7 @@ def sanitize_filename(filename: str) -> str:
         Sanitized filename
     """
     # Remove invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = _INVALID_FILENAME_RE.sub('', filename)
     
     # Replace spaces with underscores
     filename = filename.replace(' ', '_')
@@ -103,8 +145,7 @@ def validate_sanskrit_text(text: str) -> bool:
     Returns:
         True if contains Devanagari
     """
-    devanagari_pattern = r'[\u0900-\u097F]'
-    return bool(re.search(devanagari_pattern, text))
+    return _DEVANAGARI_RE.search(text) is not None
 
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> list:
@@ -216,6 +257,26 @@ def get_file_extension(filename: str) -> str:
     return filename.rsplit('.', 1)[-1].lower()
 
 
+@lru_cache(maxsize=None)
+def load_prompt(path: str, default: str) -> str:
+    """
+    Read a prompt file once per process
+    
+    Args:
+        path: Prompt file path (relative to the working directory)
+        default: Prompt to use when the file doesn't exist
+        
+    Returns:
+        Prompt text
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.warning(f"Prompt file not found: {path} - using built-in default")
+        return default
+
+
 class ProgressTracker:
     """Simple progress tracker for long-running operations"""
     
@@ -5,6 +5,8 @@ Sanskrit syllable splitter and pattern analyzer
 import re
 from typing import List, Tuple
 
+_PUNCT_SPACE_RE = re.compile(r'[\s।॥]')
+
 
 class SanskritSplitter:
     """Split Sanskrit text into syllables and analyze patterns"""
@@ -40,7 +42,7 @@ class SanskritSplitter:
             List of syllables
         """
         # Remove punctuation and spaces
-        text = re.sub(r'[\s।॥]', '', text)
+        text = _PUNCT_SPACE_RE.sub('', text)
         
         syllables = []
         i = 0
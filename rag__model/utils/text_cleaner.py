@@ -4,6 +4,15 @@ Text cleaning utilities for Sanskrit processing
 
 import re
 
+_WHITESPACE_RE = re.compile(r'\s+')
+_DANDA_RE = re.compile(r'\s*।\s*')
+_DOUBLE_DANDA_RE = re.compile(r'\s*॥\s*')
+_SPACES_RE = re.compile(r' +')
+_BLANK_LINES_RE = re.compile(r'\n\n+')
+_DEVANAGARI_RUN_RE = re.compile(r'[\u0900-\u097F\s।॥]+')
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]')
+_PUNCT_SPACE_RE = re.compile(r'[\s।॥]')
+
 
 def remove_diacritics(text: str) -> str:
     """
@@ -47,11 +56,11 @@ def clean_devanagari(text: str) -> str:
         Cleaned text
     """
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # Remove spaces around danda (।) and double danda (॥)
-    text = re.sub(r'\s*।\s*', '।', text)
-    text = re.sub(r'\s*॥\s*', '॥', text)
+    text = _DANDA_RE.sub('।', text)
+    text = _DOUBLE_DANDA_RE.sub('॥', text)
     
     # Trim
     text = text.strip()
@@ -70,10 +79,10 @@ def normalize_whitespace(text: str) -> str:
         Text with normalized whitespace
     """
     # Replace multiple spaces with single space
-    text = re.sub(r' +', ' ', text)
+    text = _SPACES_RE.sub(' ', text)
     
     # Replace multiple newlines with double newline
-    text = re.sub(r'\n\n+', '\n\n', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
     
     # Trim each line
     text = '\n'.join(line.strip() for line in text.split('\n'))
@@ -92,8 +101,7 @@ def extract_devanagari(text: str) -> str:
         Only Devanagari characters
     """
     # Devanagari Unicode range: 0900-097F
-    devanagari_pattern = r'[\u0900-\u097F\s।॥]+'
-    matches = re.findall(devanagari_pattern, text)
+    matches = _DEVANAGARI_RUN_RE.findall(text)
     return ''.join(matches).strip()
 
 
@@ -108,7 +116,7 @@ def split_verses(text: str) -> list:
         List of individual verses
     """
     # Split on double danda
-    verses = re.split(r'॥', text)
+    verses = text.split('॥')
     
     # Clean each verse
     verses = [clean_devanagari(v) for v in verses if v.strip()]
@@ -126,8 +134,7 @@ def is_devanagari(text: str) -> bool:
     Returns:
         True if text contains Devanagari characters
     """
-    devanagari_pattern = r'[\u0900-\u097F]'
-    return bool(re.search(devanagari_pattern, text))
+    return _DEVANAGARI_RE.search(text) is not None
 
 
 def count_syllables_approximate(text: str) -> int:
@@ -141,7 +148,7 @@ def count_syllables_approximate(text: str) -> int:
         Approximate syllable count
     """
     # Remove spaces and punctuation
-    text = re.sub(r'[\s।॥]', '', text)
+    text = _PUNCT_SPACE_RE.sub('', text)
     
     # Count vowel marks and independent vowels as syllables
     # This is a rough approximation